@@ -1,11 +1,13 @@
-import os, logging, re, shutil, subprocess, base64, sys
+import os, logging, re, shutil, functools, subprocess, base64, sys, hashlib, tempfile, threading, time, io, difflib, zlib, binascii
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
 import json,configparser
-from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple, Optional, Iterable, Iterator, Union
 
 __VERSION__:str="2.0.0"
 
-class __hlp:
+class _hlp:
     log:logging.Logger=None
     
     @staticmethod
@@ -24,7 +26,7 @@ class __hlp:
     @staticmethod
     def write_file(path: Path, data: bytes, mode: int = 0o600, owner: Optional[str] = None, dry_run: bool = True):
         if dry_run:
-            __hlp.log.info(f"[DRY] write {path} ({len(data)} bytes) mode={oct(mode)} owner={owner}")
+            _hlp.log.info(f"[DRY] write {path} ({len(data)} bytes) mode={oct(mode)} owner={owner}")
             return
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, "wb") as f:
@@ -37,12 +39,47 @@ class __hlp:
                 gid = pwd.getpwnam(owner).pw_gid
                 os.chown(path, uid, gid)
             except Exception as e:
-                __hlp.log.warning(f"chown {path} -> {owner} failed: {e}")
+                _hlp.log.warning(f"chown {path} -> {owner} failed: {e}")
+
+    @staticmethod
+    def write_chunks(path: Path, chunks: Iterable[bytes], mode: int = 0o600, owner: Optional[str] = None, dry_run: bool = True) -> int:
+        """Zapíše data po částech přes dočasný soubor, cíl se nahradí až po úspěšném zápisu
+        (chyba dekódování nebo kontrolního součtu tak nenechá poloviční soubor).
+        Returns:
+            int: počet zapsaných bajtů, při dry_run 0
+        """
+        if dry_run:
+            _hlp.log.info(f"[DRY] write {path} (stream) mode={oct(mode)} owner={owner}")
+            return 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".res-")
+        n = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for ch in chunks:
+                    f.write(ch)
+                    n += len(ch)
+            os.chmod(tmp, mode)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        if owner:
+            try:
+                import pwd
+                pw = pwd.getpwnam(owner)
+                os.chown(path, pw.pw_uid, pw.pw_gid)
+            except Exception as e:
+                _hlp.log.warning(f"chown {path} -> {owner} failed: {e}")
+        return n
 
     @staticmethod
     def ensure_dir(path: Path, mode: int = 0o700, owner: Optional[str] = None, dry_run: bool = True):
         if dry_run:
-            __hlp.log.info(f"[DRY] ensure dir {path} mode={oct(mode)} owner={owner}")
+            _hlp.log.info(f"[DRY] ensure dir {path} mode={oct(mode)} owner={owner}")
             return
         path.mkdir(parents=True, exist_ok=True)
         os.chmod(path, mode)
@@ -53,12 +90,12 @@ class __hlp:
                 gid = pwd.getpwnam(owner).pw_gid
                 os.chown(path, uid, gid)
             except Exception as e:
-                __hlp.log.warning(f"chown {path} -> {owner} failed: {e}")
+                _hlp.log.warning(f"chown {path} -> {owner} failed: {e}")
 
     @staticmethod
     def rm_dir(path: Path, dry_run: bool = True):
         if dry_run:
-            __hlp.log.info(f"[DRY] rmtree {path}")
+            _hlp.log.info(f"[DRY] rmtree {path}")
             return
         if path.exists():
             shutil.rmtree(path)
@@ -66,7 +103,7 @@ class __hlp:
     @staticmethod
     def remove_file(path: Path, dry_run: bool = True):
         if dry_run:
-            __hlp.log.info(f"[DRY] unlink {path}")
+            _hlp.log.info(f"[DRY] unlink {path}")
             return
         try:
             path.unlink()
@@ -83,6 +120,133 @@ class __hlp:
         except Exception as e:
             return 255, "", str(e)    
 
+def _splitQuoted(line: str, splitter:str) -> list[str]:
+    """Rozdělení řádku bez escape sekvencí - po částech mezi uvozovkami místo po znacích.
+    Sudé části jsou mimo uvozovky, liché uvnitř.
+    Raises:
+        ValueError: neukončené uvozovky
+    """
+    segs = line.split('"')
+    result = []
+    cur = []
+    space = splitter == " "
+    comment = False
+    for idx, seg in enumerate(segs):
+        if idx % 2:
+            cur.append(seg)
+            continue
+        h = seg.find("#")
+        if h >= 0:
+            # komentář, ignorujeme zbytek řádku
+            seg = seg[:h]
+            comment = True
+        if seg:
+            if space:
+                words = seg.split()
+                if seg[0].isspace() and cur:
+                    result.append("".join(cur))
+                    cur = []
+                for k, w in enumerate(words):
+                    if k and cur:
+                        result.append("".join(cur))
+                        cur = []
+                    cur.append(w)
+                if seg[-1].isspace() and cur:
+                    result.append("".join(cur))
+                    cur = []
+            else:
+                words = seg.split(splitter)
+                for k, w in enumerate(words):
+                    if k and cur:
+                        result.append("".join(cur))
+                        cur = []
+                    if w:
+                        cur.append(w)
+        if comment:
+            break
+    if not comment and len(segs) % 2 == 0:
+        raise ValueError("Řetězec obsahuje neukončené uvozovky")
+    if cur:
+        result.append("".join(cur))
+    return result
+
+def _splitChars(line: str, splitter:str, escapeOutsideError: bool) -> list[str]:
+    """Rozdělení po znacích, pro řádky s escape sekvencemi."""
+    result = []
+    current = []
+    in_quote = False
+    escape = False
+
+    for ch in line:
+        if escape:
+            if not in_quote and escapeOutsideError:
+                raise ValueError("Escape sekvence mimo uvozovky není povolena")
+
+            if ch == 'n':
+                current.append('\n')
+            elif ch == 'r':
+                current.append('\r')
+            elif ch in ['"', '\\']:
+                current.append(ch)
+            else:
+                current.append('\\' + ch)  # neznámá sekvence zůstává včetně lomítka
+            escape = False
+
+        elif ch == '#' and not in_quote:
+            # komentář, ignorujeme zbytek řádku
+            break
+
+        elif ch == '\\':
+            escape = True
+
+        elif ch == '"':
+            in_quote = not in_quote
+
+        elif not in_quote and ((splitter == " " and ch.isspace()) or ch == splitter):
+            if current:
+                result.append(''.join(current))
+                current = []
+
+        else:
+            current.append(ch)
+
+    if in_quote:
+        raise ValueError("Řetězec obsahuje neukončené uvozovky")
+
+    if escape:
+        raise ValueError("Řetězec končí neukončeným escape '\\'")
+
+    if current:
+        result.append(''.join(current))
+    return result
+
+@functools.lru_cache(maxsize=8192)
+def _splitCached(line: str, splitter:str, escapeOutsideError: bool) -> tuple[tuple[str,...],bool,bool]:
+    """Tokenizer pro c_row_parser._smart_split, výsledek se cachuje (opakované property cesty, řádky).
+    Výjimky se necachují.
+    """
+    if not line or line.strip() == "":
+        return (), True, False  # prázdný řádek
+
+    if line.strip().startswith("#"):
+        return (), False, True  # komentářový řádek
+
+    if "\\" in line:
+        result = _splitChars(line, splitter, escapeOutsideError)
+    elif '"' in line or "#" in line:
+        result = _splitQuoted(line, splitter)
+    elif splitter == " ":
+        # nejčastější případ - bez uvozovek, escape a komentáře
+        result = line.split()
+    else:
+        result = line.split(splitter)
+
+    result = [x for x in result if x] # odstranění prázdných částí
+    if not result:
+        return (), True, False  # prázdný řádek
+
+    return tuple(result), False, False
+
 class c_row_parser:
     """parser pro řádek:
     - mezera se bere jako oddělovač argumentů
@@ -141,81 +305,611 @@ class c_row_parser:
             - true poku je to koment řádek
             
         Raises: 
-        
+            ValueError: neplatný oddělovač, neukončené uvozovky nebo escape
         """
-        result = []
-        current = []
-        in_quote = False
-        escape = False
-        
         if not isinstance(splitter, str) or len(splitter) != 1:
             raise ValueError("Splitter must be a single character string")
-        
-        if not line or line.strip() == "":
-            return [], True, False  # prázdný řádek
-        
-        if line.strip().startswith("#"):
-            return [], False, True  # komentářový řádek
-
-        for ch in line:
-            if escape:
-                if not in_quote and escapeOutsideError:
-                    raise ValueError("Escape sekvence mimo uvozovky není povolena")
-
-                if ch == 'n':
-                    current.append('\n')
-                elif ch == 'r':
-                    current.append('\r')
-                elif ch in ['"', '\\']:
-                    current.append(ch)
-                else:
-                    if in_quote:
-                        current.append('\\' + ch)
-                    else:
-                        current.append('\\' + ch)  # pokud je escape povolen i mimo quote
-                escape = False
+        parts, empty, comment = _splitCached(line, splitter, escapeOutsideError)
+        return list(parts), empty, comment
 
-            elif ch == '#' and not in_quote:
-                # komentář, ignorujeme zbytek řádku
-                break
+    def __repr__(self):
+        if self.ok:
+            if self.emptyLine:
+                return "<c_row_parser EMPTY LINE>"
+            if self.commentLine:
+                return "<c_row_parser COMMENT LINE>"
+            return f"<c_row_parser cmd={self.cmd!r} args={self.args}>"
+        return f"<c_row_parser ERROR={self.error!r}>"
 
-            elif ch == '\\':
-                escape = True
+_RES_CHUNK:int=1<<16
+"""velikost čtených bloků resource"""
 
-            elif ch == '"':
-                in_quote = not in_quote
+class c_resRef:
+    """Resource uložený mimo paměť - externí soubor nebo oblast konfiguračního souboru.
 
-            elif not in_quote and ((splitter == " " and ch.isspace()) or ch == splitter):
-                if current:
-                    result.append(''.join(current))
-                    current = []
+    Zápis v sekci `__res__`:
+        - `<name> @<soubor> [b64] [gzip] [sha256=<hex>]` - externí soubor (relativně ke konfiguraci), výchozí je raw obsah
+        - `<name> << [raw] [gzip] [sha256=<hex>]` a na dalších řádcích data až po řádek `>>` - blok v konfiguraci,
+          výchozí je base64, do plánu se uloží jen offset a délka bloku
+    Kontrolní součet se počítá z dekódovaných (a rozbalených) dat.
+    """
+    __slots__ = ("file","offset","length","encoding","compress","sha256","data")
+
+    def __init__(self,file:str|None,offset:int=0,length:int|None=None,encoding:str="raw",compress:str|None=None,sha256:str|None=None,data:bytes|None=None):
+        self.file:str|None=file
+        """None = data jsou v paměti (blok z fromLines)"""
+        self.offset:int=int(offset)
+        self.length:int|None=None if length is None else int(length)
+        """None = do konce souboru"""
+        self.encoding:str=encoding
+        """'raw' nebo 'b64'"""
+        self.compress:str|None=compress
+        """None nebo 'gzip'"""
+        self.sha256:str|None=sha256.lower() if sha256 else None
+        self.data:bytes|None=data
+        """nezakódovaný obsah bloku pokud file je None"""
 
+    @staticmethod
+    def parseOpts(opts:list[str],encoding:str)->dict:
+        """rozparsuje volby za odkazem
+        Raises:
+            ValueError: neznámá volba
+        """
+        r={"encoding":encoding,"compress":None,"sha256":None}
+        for o in opts:
+            ol=o.lower()
+            if ol in ("b64","base64"):
+                r["encoding"]="b64"
+            elif ol=="raw":
+                r["encoding"]="raw"
+            elif ol in ("gz","gzip"):
+                r["compress"]="gzip"
+            elif ol.startswith("sha256="):
+                r["sha256"]=ol[7:]
             else:
-                current.append(ch)
+                raise ValueError(f"Syntax error in resource line: unknown option '{o}'.")
+        return r
+
+    def toDict(self)->dict:
+        d={"ref":[self.file,self.offset,self.length,self.encoding,self.compress,self.sha256]}
+        if self.data is not None:
+            d["data"]=base64.b64encode(self.data).decode("ascii")
+        return d
+
+    @classmethod
+    def fromDict(cls,d:dict)->'c_resRef':
+        return cls(*d["ref"],data=base64.b64decode(d["data"]) if d.get("data") is not None else None)
+
+    def fingerprint(self)->str:
+        """otisk pro porovnání stavu, u souboru bez sha256 podle velikosti a času změny"""
+        if self.sha256:
+            return f"sha256:{self.sha256}"
+        if self.data is not None:
+            return "data:"+hashlib.sha256(self.data).hexdigest()
+        try:
+            st=os.stat(self.file)
+            return f"{self.file}:{self.offset}:{self.length}:{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            return f"{self.file}:{self.offset}:{self.length}:missing"
+
+    def inlined(self)->'c_resRef':
+        """kopie s daty v paměti (pro přenos plánu na jiný stroj)"""
+        if self.data is not None:
+            return self
+        return c_resRef(None,0,None,self.encoding,self.compress,self.sha256,b"".join(self._raw()))
+
+    def _raw(self)->Iterator[bytes]:
+        if self.data is not None:
+            for i in range(0,len(self.data),_RES_CHUNK):
+                yield self.data[i:i+_RES_CHUNK]
+            return
+        with open(self.file,"rb") as f:
+            f.seek(self.offset)
+            left=self.length
+            while left is None or left>0:
+                ch=f.read(_RES_CHUNK if left is None else min(_RES_CHUNK,left))
+                if not ch:
+                    break
+                if left is not None:
+                    left-=len(ch)
+                yield ch
+
+    def chunks(self)->Iterator[bytes]:
+        """Dekódovaná data po částech.
+        Raises:
+            OSError: soubor nelze přečíst
+            ValueError: chybná base64 / gzip data nebo nesouhlasí sha256
+        """
+        src=self._raw()
+        if self.encoding=="b64":
+            src=_b64Stream(src)
+        if self.compress=="gzip":
+            src=_gunzipStream(src)
+        h=hashlib.sha256() if self.sha256 else None
+        for ch in src:
+            if h is not None:
+                h.update(ch)
+            yield ch
+        if h is not None and h.hexdigest()!=self.sha256:
+            raise ValueError(f"Resource {self.file}@{self.offset}: sha256 mismatch")
+
+    def __repr__(self):
+        return f"<c_resRef {self.file}@{self.offset}+{self.length} {self.encoding} {self.compress or ''}>"
+
+_RX_B64_WS=re.compile(rb"\s+")
+
+def _b64Stream(src:Iterable[bytes])->Iterator[bytes]:
+    """průběžné dekódování base64, bílé znaky a konce řádků se ignorují"""
+    rest=b""
+    try:
+        for ch in src:
+            ch=rest+_RX_B64_WS.sub(b"",ch)
+            cut=len(ch)-len(ch)%4
+            rest=ch[cut:]
+            if cut:
+                yield binascii.a2b_base64(ch[:cut])
+        if rest:
+            yield binascii.a2b_base64(rest+b"="*(-len(rest)%4))
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 resource data: {e}")
+
+def _gunzipStream(src:Iterable[bytes])->Iterator[bytes]:
+    """průběžné rozbalení gzip"""
+    d=zlib.decompressobj(wbits=31)
+    try:
+        for ch in src:
+            out=d.decompress(ch)
+            if out:
+                yield out
+        out=d.flush()
+        if out:
+            yield out
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip resource data: {e}")
+    if not d.eof:
+        raise ValueError("Invalid gzip resource data: truncated stream")
+
+def resourceChunks(data:Union[str,c_resRef])->Iterator[bytes]:
+    """Vrátí data resource po částech - inline řetězec (base64 nebo text) i c_resRef."""
+    if isinstance(data,c_resRef):
+        yield from data.chunks()
+    elif _hlp.is_base64(data):
+        yield base64.b64decode(data)
+    else:
+        yield data.encode('utf-8')
+
+_RX_SKC_HEAD=re.compile(r"^(?:\*a|__res__|\*\*|\?\?)(.*)$", re.IGNORECASE)
+"""hlavička sekce"""
+
+_RX_PKG_CMD=re.compile(r"^([+\-=])(app|npm|pip|pip3)$")
+"""příkaz balíčkovače"""
+
+_PLAN_FORMAT:int=2
+"""verze formátu uloženého plánu, změna zneplatní cache"""
+
+def _rowToDict(r:c_row_parser)->dict:
+    return {"c":r.cmd,"a":r.args,"ok":r.ok,"e":r.error,"el":r.emptyLine,"cl":r.commentLine}
+
+def _rowFromDict(d:dict)->c_row_parser:
+    r=c_row_parser.__new__(c_row_parser)
+    r.cmd=d["c"]
+    r.args=list(d["a"])
+    r.ok=d["ok"]
+    r.error=d["e"]
+    r.emptyLine=d["el"]
+    r.commentLine=d["cl"]
+    return r
+
+class c_configPlan:
+    """Zkompilovaný konfigurační soubor, read-only.
+
+    Řádky jsou rozparsované do `c_row_parser`, regexy sekcí `??` zkompilované,
+    takže vyhodnocení pro další ID zařízení je jen výběr sekcí.
+    Plán lze uložit do cache adresáře, klíčem je sha256 obsahu souboru.
+
+    Example:
+        >>> plan = c_configPlan.fromFile("/etc/kiosk/config.txt", cacheDir="/var/cache/kiosk")
+        >>> for devID, rows in plan.resolveMany(ids).items():
+        ...     print(devID, [r.cmd for r in rows])
+    """
+    __slots__ = ("fileHash","all","byID","byRGX","resources","onBeforeStart","onEnd","invalidRGX")
 
-        if in_quote:
-            raise ValueError("Řetězec obsahuje neukončené uvozovky")
+    def __init__(
+        self,
+        all:Iterable[c_row_parser],
+        byID:Dict[str,Iterable[c_row_parser]],
+        byRGX:Iterable[Tuple[str,Iterable[c_row_parser]]],
+        resources:Dict[str,Union[str,c_resRef]],
+        onBeforeStart:c_row_parser|None=None,
+        onEnd:c_row_parser|None=None,
+        fileHash:str|None=None
+    ):
+        self.fileHash:str|None=fileHash
+        """sha256 zdrojového souboru, None pokud plán nevznikl ze souboru"""
+        self.all:tuple[c_row_parser,...]=tuple(all)
+        """řádky sekce `*a`"""
+        self.byID:MappingProxyType=MappingProxyType({k:tuple(v) for k,v in byID.items()})
+        """ID -> řádky sekce `**<ID>`"""
+        rgx=[]
+        inv=[]
+        for src,items in byRGX:
+            cp=self._compileRGX(src)
+            if cp is None:
+                inv.append(src)
+            rgx.append((src,cp,tuple(items)))
+        self.byRGX:tuple[tuple[str,re.Pattern|None,tuple[c_row_parser,...]],...]=tuple(rgx)
+        """(zdroj regexu, zkompilovaný regex nebo None pokud je neplatný, řádky) v pořadí souboru"""
+        self.invalidRGX:tuple[str,...]=tuple(inv)
+        """regex sekce které nejdou zkompilovat, při vyhodnocení se přeskakují"""
+        self.resources:MappingProxyType=MappingProxyType(dict(resources))
+        """název -> data resource (inline řetězec nebo c_resRef)"""
+        self.onBeforeStart:c_row_parser|None=onBeforeStart
+        self.onEnd:c_row_parser|None=onEnd
 
-        if escape:
-            raise ValueError("Řetězec končí neukončeným escape '\\'")
+    @staticmethod
+    def _compileRGX(rgx:str)->re.Pattern|None:
+        """zkompiluje `/pattern/` nebo `/pattern/i`, None pokud je neplatný"""
+        # musí začínat '/' a končit '/i' nebo '/'
+        if len(rgx)<3 or not rgx.startswith("/") or not (rgx.endswith("/i") or rgx.endswith("/")):
+            return None
+        pattern=rgx[1:-2] if rgx.endswith("/i") else rgx[1:-1]
+        flags=re.IGNORECASE if rgx.endswith("/i") else 0
+        try:
+            return re.compile(pattern, flags)
+        except re.error:
+            return None
+
+    @classmethod
+    def fromLines(cls,lines:Iterable[str],fileHash:str|None=None,baseDir:str|None=None)->'c_configPlan':
+        """Zkompiluje řádky konfigurace. Bloky `<<` resource se drží v paměti.
+        Args:
+            baseDir (str|None): adresář pro relativní odkazy `@soubor`, None = aktuální
+        Raises:
+            ValueError: syntaktická chyba v konfiguraci
+        """
+        return cls._compile(((l,None) for l in lines),fileHash,None,baseDir)
+
+    @classmethod
+    def _compile(cls,lines:Iterable[Tuple[str,Optional[int]]],fileHash:str|None,srcFile:str|None,baseDir:str|None)->'c_configPlan':
+        """Zkompiluje řádky (řádek, offset v srcFile nebo None)."""
+        detected:set=set()
+        """detekované sekce""" # nesmí být zdvojené
+        all:list[c_row_parser]=[]
+        byID:dict[str,list[c_row_parser]]={}
+        byRGX:dict[str,list[c_row_parser]]={}
+        resources:dict[str,Union[str,c_resRef]]={}
+        onBeforeStart=None
+        onEnd=None
+        currentSekce=None
+        lineTyp:Optional[str]=None
+        block=None
+        """rozpracovaný blok `<<`: [název, volby, offset začátku, části textu]"""
+
+        for line,offset in lines:
+            if block is not None:
+                # data bloku resource se neparsují, jen hledáme konec
+                if block[2] is None:
+                    block[2]=offset
+                if line.strip()==">>":
+                    name,opts,start,parts=block
+                    if srcFile is not None:
+                        resources[name]=c_resRef(srcFile,start,offset-start,**opts)
+                    else:
+                        resources[name]=c_resRef(None,**opts,data=("\n".join(parts)+"\n" if parts else "").encode("utf-8"))
+                    block=None
+                elif srcFile is None:
+                    block[3].append(line)
+                continue
+            line=line.strip()
+            if not line or line.startswith("#"):
+                continue
+            # pokud je detekována sekce, změníme aktuální sekci
+            m=_RX_SKC_HEAD.match(line)
+            if m:
+                sekceID=m.group(1).strip()
+                if line.startswith("*a"):
+                    if "all" in detected:
+                        raise ValueError("Duplicate 'all' section detected in configuration file.")
+                    detected.add("all")
+                    currentSekce=all
+                    lineTyp=None
+                    continue
+                elif line.startswith("**"):
+                    if "byID_"+sekceID in detected:
+                        raise ValueError(f"Duplicate section ID '{sekceID}' detected in configuration file.")
+                    detected.add("byID_"+sekceID)
+                    currentSekce=byID.setdefault(sekceID,[])
+                    lineTyp=None
+                    continue
+                elif line.startswith("??"):
+                    if "byRGX_"+sekceID in detected:
+                        raise ValueError(f"Duplicate section regex '{sekceID}' detected in configuration file.")
+                    detected.add("byRGX_"+sekceID)
+                    currentSekce=byRGX.setdefault(sekceID,[])
+                    lineTyp=None
+                    continue
+                elif line.startswith("__res__"):
+                    currentSekce=resources
+                    lineTyp='r'
+                    continue
+            elif line.startswith("^") or line.startswith("~"):
+                # speciální příkazy
+                cmdLine=c_row_parser(line[1:].strip())
+                if line.startswith("^"):
+                    onBeforeStart=cmdLine
+                else:
+                    onEnd=cmdLine
+                continue
+
+            # jen zpracování řádku
+            if currentSekce is None:
+                # řádek před jakoukoliv sekí je problém syntaxerror
+                raise ValueError("Syntax error in configuration file: command found outside of any section.")
+            if lineTyp=='r':
+                # resource řádek
+                resParts=line.split()
+                if len(resParts)<2:
+                    raise ValueError("Syntax error in resource line: missing data.")
+                resKey=resParts[0].strip()
+                if resParts[1]=="<<":
+                    block=[resKey,c_resRef.parseOpts(resParts[2:],"b64"),None,[]]
+                elif resParts[1].startswith("@") and len(resParts[1])>1:
+                    p=os.path.expanduser(resParts[1][1:])
+                    if not os.path.isabs(p):
+                        p=os.path.join(baseDir or os.getcwd(),p)
+                    currentSekce[resKey]=c_resRef(os.path.normpath(p),0,None,**c_resRef.parseOpts(resParts[2:],"raw"))
+                else:
+                    currentSekce[resKey]=line.split(None,1)[1].strip()
+            else:
+                item=c_row_parser(line)
+                if not item.ok:
+                    raise ValueError("Syntax error in configuration line: missing command.")
+                currentSekce.append(item)
 
-        if current:
-            result.append(''.join(current))
+        if block is not None:
+            raise ValueError(f"Syntax error in resource '{block[0]}': missing '>>'.")
+        return cls(all,byID,byRGX.items(),resources,onBeforeStart,onEnd,fileHash)
 
-        result = [x for x in result if x] # odstranění prázdných částí
-        if not result:
-            return [], True, False  # prázdný řádek
+    @classmethod
+    def fromFile(cls,file:str,cacheDir:str|None=None)->'c_configPlan':
+        """Načte a zkompiluje konfigurační soubor.
+        Args:
+            file (str): cesta ke konfiguraci
+            cacheDir (str|None): adresář pro uložené plány, None = bez cache
+        Raises:
+            OSError: soubor nelze přečíst
+            ValueError: syntaktická chyba v konfiguraci
+        """
+        h=hashlib.sha256()
+        with open(file,"rb") as f:
+            for ch in iter(lambda: f.read(_RES_CHUNK),b""):
+                h.update(ch)
+        h=h.hexdigest()
+        file=os.path.abspath(file)
+        # plán obsahuje odkazy na bloky `<<` a `@file` relativně k souboru, klíč cache proto zahrnuje i cestu
+        key=hashlib.sha256(f"{h}\0{file}".encode("utf-8","surrogateescape")).hexdigest()
+        cachePath=os.path.join(cacheDir,f"{key}.plan.json") if cacheDir else None
+        if cachePath and os.path.isfile(cachePath):
+            try:
+                with open(cachePath,"r",encoding="utf-8") as f:
+                    d=json.load(f)
+                if d.get("format")==_PLAN_FORMAT and d.get("version")==__VERSION__ and d.get("hash")==h:
+                    return cls.fromDict(d)
+            except (OSError,ValueError,KeyError,TypeError):
+                pass # poškozená cache, zkompilujeme znovu
+
+        def lines()->Iterator[Tuple[str,int]]:
+            # po řádcích s offsetem, bloky `<<` se tak nemusí držet v paměti
+            with open(file,"rb") as f:
+                pos=0
+                for bl in f:
+                    yield bl.decode("utf-8","surrogateescape"),pos
+                    pos+=len(bl)
+
+        plan=cls._compile(lines(),h,file,os.path.dirname(file))
+        if cachePath:
+            try:
+                plan.save(cachePath)
+            except OSError:
+                pass # cache je jen optimalizace
+        return plan
+
+    def toDict(self)->dict:
+        return {
+            "format":_PLAN_FORMAT,
+            "version":__VERSION__,
+            "hash":self.fileHash,
+            "all":[_rowToDict(r) for r in self.all],
+            "byID":{k:[_rowToDict(r) for r in v] for k,v in self.byID.items()},
+            "byRGX":[[src,[_rowToDict(r) for r in items]] for src,_,items in self.byRGX],
+            "resources":{k:(v.toDict() if isinstance(v,c_resRef) else v) for k,v in self.resources.items()},
+            "onBeforeStart":_rowToDict(self.onBeforeStart) if self.onBeforeStart else None,
+            "onEnd":_rowToDict(self.onEnd) if self.onEnd else None,
+        }
+
+    @classmethod
+    def fromDict(cls,d:dict)->'c_configPlan':
+        return cls(
+            [_rowFromDict(x) for x in d["all"]],
+            {k:[_rowFromDict(x) for x in v] for k,v in d["byID"].items()},
+            [(src,[_rowFromDict(x) for x in items]) for src,items in d["byRGX"]],
+            {k:(c_resRef.fromDict(v) if isinstance(v,dict) else v) for k,v in d["resources"].items()},
+            _rowFromDict(d["onBeforeStart"]) if d.get("onBeforeStart") else None,
+            _rowFromDict(d["onEnd"]) if d.get("onEnd") else None,
+            d.get("hash")
+        )
+
+    def inlined(self)->'c_configPlan':
+        """Vrátí plán kde resource odkazující na soubory mají data v sobě,
+        takový plán lze přenést a vykonat na jiném stroji."""
+        res={k:(v.inlined() if isinstance(v,c_resRef) else v) for k,v in self.resources.items()}
+        return c_configPlan(
+            self.all,
+            dict(self.byID),
+            [(src,items) for src,_,items in self.byRGX],
+            res,
+            self.onBeforeStart,
+            self.onEnd,
+            self.fileHash
+        )
+
+    def save(self,path:str)->None:
+        """uloží plán jako JSON, zápis přes dočasný soubor a os.replace"""
+        dn=os.path.dirname(path) or "."
+        os.makedirs(dn,exist_ok=True)
+        fd,tmp=tempfile.mkstemp(dir=dn,prefix=".plan-")
+        try:
+            with os.fdopen(fd,"w",encoding="utf-8") as f:
+                json.dump(self.toDict(),f,ensure_ascii=False)
+            os.replace(tmp,path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
 
-        return result, False, False
+    def sections(self,devID:str)->list[tuple[str,tuple[c_row_parser,...]]]:
+        """Vrátí sekce které platí pro zařízení v pořadí vykonání.
+        Returns:
+            list[tuple[str,tuple]]: (název sekce '*a' | '**<ID>' | '??<regex>', řádky)
+        """
+        devID=str(devID).strip()
+        r=[("*a",self.all)]
+        x=self.byID.get(devID)
+        if x is not None:
+            r.append(("**"+devID,x))
+        for src,cp,items in self.byRGX:
+            if cp is not None and cp.match(devID):
+                r.append(("??"+src,items))
+        return r
+
+    def resolve(self,devID:str)->list[c_row_parser]:
+        """Vrátí seznam příkazů které se vykonají pro zařízení."""
+        r=[]
+        for _,items in self.sections(devID):
+            r.extend(items)
+        return r
+
+    def resolveMany(self,devIDs:Iterable[str])->dict[str,list[c_row_parser]]:
+        """Jako resolve() pro více zařízení, vrací ID -> seznam příkazů."""
+        return {str(d).strip():self.resolve(d) for d in devIDs}
+
+class c_step:
+    """Jeden krok paralelního zpracování sekce, viz Configurator.workers"""
+    __slots__ = ("index","items","kind","ctx","keys","barrier","deps")
+
+    def __init__(self,index:int,items:list[c_row_parser],kind:str,ctx:dict,keys:set,barrier:bool=False):
+        self.index:int=index
+        """pořadí v sekci"""
+        self.items:list[c_row_parser]=items
+        """řádky kroku, víc řádků jen u =mod bloku a sloučených balíčků"""
+        self.kind:str=kind
+        """'cmd', 'mod', 'pkg' nebo 'ctx' (jen změna kontextu, nic se nespouští)"""
+        self.ctx:dict=ctx
+        """kopie kontextu (run_user, workdir, g_path) platná pro krok"""
+        self.keys:set=keys
+        """prostředky kroku, ('path', cesta) nebo ('lock', název)"""
+        self.barrier:bool=barrier
+        """krok musí běžet sám, čeká na všechny předchozí a všechny další čekají na něj"""
+        self.deps:list[int]=[]
+        """indexy kroků na které se čeká"""
 
     def __repr__(self):
-        if self.ok:
-            if self.emptyLine:
-                return "<c_row_parser EMPTY LINE>"
-            if self.commentLine:
-                return "<c_row_parser COMMENT LINE>"
-            return f"<c_row_parser cmd={self.cmd!r} args={self.args}>"
-        return f"<c_row_parser ERROR={self.error!r}>"
+        return f"<c_step {self.index} {self.kind} {[r.cmd for r in self.items]} deps={self.deps}{' BARRIER' if self.barrier else ''}>"
+
+def _keysConflict(a:set,b:set)->bool:
+    """True pokud kroky sdílí zámek nebo jedna cesta je stejná / nadřazená druhé"""
+    for ka in a:
+        for kb in b:
+            if ka[0]!=kb[0]:
+                continue
+            if ka[1]==kb[1]:
+                return True
+            if ka[0]=="path" and (ka[1].startswith(kb[1].rstrip("/")+"/") or kb[1].startswith(ka[1].rstrip("/")+"/")):
+                return True
+    return False
+
+class c_stateStore:
+    """Úložiště stavu provedených kroků pro jedno zařízení (JSON soubor).
+
+    Pro každý krok se ukládá otisk příkazu (příkaz, argumenty, kontext, data resource)
+    a stav cíle po provedení (stat souboru, resp. stav balíčků) a doba provedení.
+    Pokud se při dalším běhu shoduje otisk i aktuální stav cíle, krok se přeskočí.
+    """
+    FORMAT:int=1
+
+    def __init__(self,path:str):
+        self.path:str=path
+        self._lock=threading.Lock()
+        self.steps:Dict[str,dict]={}
+        """otisk -> {"cmd","state","dur","ts"}"""
+        self.dirty:bool=False
+        try:
+            with open(path,"r",encoding="utf-8") as f:
+                d=json.load(f)
+            if d.get("format")==self.FORMAT and isinstance(d.get("steps"),dict):
+                self.steps=d["steps"]
+        except (OSError,ValueError):
+            pass
+
+    def get(self,fp:str)->Optional[dict]:
+        with self._lock:
+            return self.steps.get(fp)
+
+    def put(self,fp:str,cmd:str,state,dur:float)->None:
+        with self._lock:
+            self.steps[fp]={"cmd":cmd,"state":state,"dur":round(dur,6),"ts":int(time.time())}
+            self.dirty=True
+
+    def drop(self,fp:str)->None:
+        with self._lock:
+            if self.steps.pop(fp,None) is not None:
+                self.dirty=True
+
+    def save(self)->None:
+        """uloží stav přes dočasný soubor a os.replace, jen pokud se změnil"""
+        with self._lock:
+            if not self.dirty:
+                return
+            data=json.dumps({"format":self.FORMAT,"steps":self.steps},ensure_ascii=False)
+            self.dirty=False
+        dn=os.path.dirname(self.path) or "."
+        os.makedirs(dn,exist_ok=True)
+        fd,tmp=tempfile.mkstemp(dir=dn,prefix=".state-")
+        try:
+            with os.fdopen(fd,"w",encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp,self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+_IDEM_CMDS=("+fl","!fl","=acc","+ssh","+g","!g")
+"""jednoduché příkazy u kterých se sleduje stav cíle, dále =mod bloky a balíčky"""
+
+_MOD_NOFLUSH=("=u","=d","=g","=mod","+prop","-prop","=prop")
+"""příkazy před kterými se rozpracované mod soubory nezapisují, viz Configurator._modFlushFor"""
+
+_G_CMDS=("+g","!g","-g")
+"""příkazy credential souborů, po sobě jdoucí se provádí současně, viz Configurator.g_workers"""
+
+DRY_COST: Dict[str,float]={
+    "dir":0.005,
+    "file_write":0.02,
+    "file_meta":0.005,
+    "config_edit":0.05,
+    "user":0.5,
+    "script":5.0,
+    "package_install":30.0,
+    "package_remove":5.0,
+    "none":0.0,
+}
+"""odhad doby operace v sec podle třídy nákladů (balíčky na jeden balíček, instalace včetně stažení ze sítě),
+použije se pokud není známá doba stejného kroku z minulého běhu (stateDir)"""
 
 class c_sekce:
     def __init__(self):
@@ -242,9 +936,33 @@ class Configurator:
         logger:logging.Logger,
         supportColonInFloat=False,
         supportWhiteSpaceInNumbers=False,
-        dry_run: bool = True
+        dry_run: bool = True,
+        plan: c_configPlan|None = None,
+        planCacheDir: str|None = None,
+        workers: int = 1,
+        stateDir: str|None = None,
+        gWorkers: int = 1,
+        pkgBatch: bool = True
     ):
+        """
+        Args:
+            file (str): konfigurační soubor, nepoužije se pokud je zadaný plan
+            devID (str): ID zařízení
+            logger (logging.Logger): logger
+            dry_run (bool): jen logovat co by se provedlo
+            plan (c_configPlan|None): předkompilovaný plán, např. sdílený pro více zařízení
+            planCacheDir (str|None): adresář cache zkompilovaných plánů, klíčem je hash souboru
+            workers (int): počet vláken pro nezávislé příkazy, 1 = vše postupně
+            stateDir (str|None): adresář pro stav provedených kroků (`<devID>.json`),
+                nezměněné kroky se při dalším běhu přeskočí. None = vše se provede vždy
+            gWorkers (int): počet současně prováděných po sobě jdoucích +g/!g/-g operací, 1 = postupně
+            pkgBatch (bool): slučovat po sobě jdoucí příkazy stejného balíčkovače do jednoho volání
+        """
         self.dry_run = dry_run
+        self.workers:int = max(1, int(workers))
+        """počet vláken, viz _processSekceParallel"""
+        self._tls = threading.local()
+        """kontext kroku ve vlákně, viz property context"""
         self.context = {
             "run_user": os.getenv("USER") or "root",
             "workdir": None,
@@ -255,7 +973,7 @@ class Configurator:
         if logger is None:
             raise ValueError("Logger must be provided")
         
-        __hlp.log=logger
+        _hlp.log=logger
         
         self.supportColonInFloat:bool = supportColonInFloat == True
         """zda podporovat desetinná čísla s čárkou místo tečky"""
@@ -273,7 +991,15 @@ class Configurator:
         """cesta k modifikovanému souboru"""
         
         self.mod_file: Optional[os.FileIO] = None
-        """instance otevřeného souboru"""
+        """nepoužívá se, úpravy se drží v _modDocs a zapíší se v _flushModFiles"""
+        
+        self._modDocs: Dict[str,dict] = {}
+        """cesta -> {"type", "content", "base"} - rozparsované mod soubory, drží se dokud soubor
+        nepotřebuje jiný krok (viz _modFlushFor) nebo do konce běhu, base je serializace obsahu při načtení"""
+        self._modLock = threading.Lock()
+        
+        self.modSummary: Dict[str,Tuple[int,int]] = {}
+        """cesta -> (přidané, odebrané řádky) zapsaných mod souborů z posledního běhu"""
         
         self.mod_json_content: Optional[Dict] = None
         """obsah json souboru pokud je mod typu json"""
@@ -283,27 +1009,55 @@ class Configurator:
         
         self.mod_type: Optional[str] = None
         """typ modu"""
+        
+        self.pkg_batch: bool = pkgBatch == True
+        """slučovat po sobě jdoucí příkazy stejného balíčkovače a akce do jednoho volání"""
+        
+        self._pkgSnapshot: Dict[Tuple[str,str],Optional[set]] = {}
+        """(správce, uživatel) -> množina nainstalovaných balíčků, None = nelze zjistit"""
+        
+        self.g_workers: int = max(1, int(gWorkers))
+        """počet současně prováděných po sobě jdoucích +g/!g/-g operací, 1 = postupně (výchozí), >1 = souběžně"""
+        
+        self.gStats: List[Dict[str,Any]] = []
+        """+g/!g/-g operace posledního běhu: op, name, path, result, bytes, duration (sec)"""
+        self._gLock = threading.Lock()
+        
+        self.dryPlan: List[Dict[str,Any]] = []
+        """při dry_run operace posledního běhu: cmd, args, target, cost, wouldChange, reason, estimate, viz dryRunPlan"""
+        
+        self.stateDir: Optional[str] = stateDir
+        """adresář se stavem kroků, viz c_stateStore"""
+        
+        self.state: Optional[c_stateStore] = None
+        """stav kroků aktuálního zařízení"""
+        
+        self.idemStats: Dict[str,float] = {"run":0,"skipped":0,"saved":0.0}
+        """počet provedených a přeskočených kroků a odhad ušetřeného času v sec"""
+        self._idemLock = threading.Lock()
+        self._idemDone: list = []
+        """(otisk, druh, řádky, kontext, doba) sledovaných kroků, stav se zapíše na konci běhu"""
                 
-        # načteme soubor pokud existuje a rozdělíme na řádky, příprava pro parser
-        self.lines=[]
-        self.log.info(f"Loading configuration file '{file}'...")
-        if file and os.path.exists(file):
+        self.plan:c_configPlan|None=plan
+        """zkompilovaný konfigurační soubor"""
+        if self.plan is None:
+            self.log.info(f"Loading configuration file '{file}'...")
+            if not file or not os.path.exists(file):
+                self.log.warning(f"Configuration file '{file}' not found, using empty configuration.")
+                sys.exit(1)
             try:
-                with open(file,"r",encoding="utf-8") as f:
-                    self.lines=f.readlines()
-                    self.log.info(f"Configuration file '{file}' loaded, {len(self.lines)} lines.")
+                self.plan=c_configPlan.fromFile(file,planCacheDir)
+            except ValueError as e:
+                self.log.error(str(e))
+                sys.exit(1)
             except Exception as e:
                 self.log.error(f"Error loading configuration file '{file}'")
                 self.log.exception(e)
                 sys.exit(1)
-        else:
-            self.log.warning(f"Configuration file '{file}' not found, using empty configuration.")
-            sys.exit(1)
-        # odstraníme řádky od prázdných řádků a komentářů
-        self.lines=[line.strip() for line in self.lines if line.strip() and not line.strip().startswith("#")]
-        self.log.info(f"Configuration file '{file}' processed, {len(self.lines)} valid lines.")
-        
-        
+            self.log.info(f"Configuration file '{file}' loaded, hash {self.plan.fileHash[:12]}.")
+        for rgx in self.plan.invalidRGX:
+            self.log.error(f"Invalid regex section '{rgx}' in configuration file.")
+
         self.device_id =str(devID).strip()
         if not self.device_id or self.device_id=="" or len(self.device_id)<2:
             self.log.error("Device ID is required for configuration parsing.")
@@ -323,100 +1077,25 @@ class Configurator:
             self.log.info(f"Running onEnd script: {self.sekce.onEnd}")
             self._cmd_inline_script(self.sekce.onEnd.cmd, self.sekce.onEnd.args)
     
+    @property
+    def context(self) -> dict:
+        """kontext (run_user, workdir, g_path), ve vlákně paralelního kroku jeho vlastní kopie"""
+        ctx = getattr(self._tls, "ctx", None)
+        return self._context if ctx is None else ctx
+
+    @context.setter
+    def context(self, value: dict) -> None:
+        self._context = value
+
     def _getSekce(self):
-        """načteme obsahy sekcí"""
-        
-        detected:list=[]
-        """detekované sekce""" # nesmí být zdvojené
-        
-        currentSekce:Optional[list[c_row_parser]]=None
-        """aktuální sekce"""
-        
-        lineTyp:Optional[str]=None
-        """typ řádku"""
-        
-        for line in self.lines:
-            # vybíráme regexpem
-            skcHead=re.compile(r"^(?:\*a|__res__|\*\*|\?\?)(.*)$", re.IGNORECASE)
-            # pokud je detekována sekce, změníme aktuální sekci
-            m=skcHead.match(line)
-            if m:
-                sekceID=m.group(1).strip()
-                if line.startswith("*a"):
-                    if detected.count("all")>0:
-                        self.log.error("Duplicate 'all' section detected in configuration file.")
-                        sys.exit(1)
-                    detected.append("all")
-                    currentSekce=self.sekce.all
-                    lineTyp=None
-                    continue
-                elif line.startswith("**"):
-                    # sekce podle ID
-                    sekceID="byID_"+sekceID
-                    if sekceID in detected:
-                        self.log.error(f"Duplicate section ID '{sekceID}' detected in configuration file.")
-                        sys.exit(1)
-                    detected.append(sekceID)
-                    if sekceID not in self.sekce.byID:
-                        self.sekce.byID[sekceID]=[]
-                    currentSekce=self.sekce.byID[sekceID]
-                    lineTyp=None
-                    continue
-                elif line.startswith("??"):
-                    # sekce podle regexu
-                    sekceID="byRGX_"+sekceID
-                    if sekceID in detected:
-                        self.log.error(f"Duplicate section regex '{sekceID}' detected in configuration file.")
-                        sys.exit(1)
-                    detected.append(sekceID)
-                    if sekceID not in self.sekce.byRGX:
-                        self.sekce.byRGX[sekceID]=[]
-                    currentSekce=self.sekce.byRGX[sekceID]
-                    lineTyp=None
-                    continue
-                elif line.startswith("__res__"):
-                    # resource sekce
-                    sekceID="resource_"+sekceID
-                    if sekceID in detected:
-                        self.log.error(f"Duplicate resource '{sekceID}' detected in configuration file.")
-                        sys.exit(1)
-                    currentSekce=self.sekce.resources
-                    lineTyp='r'
-                    continue
-            elif line.startswith("^") or line.startswith("~"):
-                # speciální příkazy
-                cmdLine=c_row_parser(line[1:].strip())
-                if line.startswith("^"):
-                    self.sekce.onBeforeStart=cmdLine
-                else:
-                    self.sekce.onEnd=cmdLine
-                continue
-            
-            if line=="" or line.startswith("#") or line.strip()=="":
-                continue
-            
-            # jen zpracování řádku
-            if currentSekce is None:
-                # řádek před jakoukoliv sekí je problém syntaxerror
-                self.log.error("Syntax error in configuration file: command found outside of any section.")
-                sys.exit(1)
-            if lineTyp=='r':
-                # resource řádek
-                resParts=line.split(None,1)
-                if len(resParts)<2:
-                    self.log.error("Syntax error in resource line: missing data.")
-                    sys.exit(1)
-                resKey=resParts[0].strip()
-                resData=resParts[1].strip()
-                currentSekce[resKey]=resData
-            else:
-                # běžný řádek
-                item=c_row_parser(line)
-                if not item.ok:
-                    self.log.error("Syntax error in configuration line: missing command.")
-                    sys.exit(1)
-                currentSekce.append(item)
-                
+        """naplní sekce z plánu"""
+        self.sekce.all=list(self.plan.all)
+        self.sekce.byID={k:list(v) for k,v in self.plan.byID.items()}
+        self.sekce.byRGX={src:list(items) for src,_,items in self.plan.byRGX}
+        self.sekce.resources=dict(self.plan.resources)
+        self.sekce.onBeforeStart=self.plan.onBeforeStart
+        self.sekce.onEnd=self.plan.onEnd
+
     def processID(self,ID:str|None=None):
         """zpracuje sekci pro dané zařízení
         Args:
@@ -425,33 +1104,555 @@ class Configurator:
             None
         """
         if ID is not None:
-            self.device_id=ID
-        self._processSekce(self.sekce.all)
-        sekce=self.sekce.byID.get(self.device_id)
-        if sekce is not None:
-            self._processSekce(sekce)
-        for rgx, items in self.sekce.byRGX.items():
-            # musí začínat '/' a končit '/i' nebo '/'
-            if len(rgx)<3 or not rgx.startswith("/") or not (rgx.endswith("/i") or rgx.endswith("/")):
-                self.log.error(f"Invalid regex section '{rgx}' in configuration file.")
-                continue
-            pattern=rgx[1:-2] if rgx.endswith("/i") else rgx[1:-1]
-            flags=re.IGNORECASE if rgx.endswith("/i") else 0
-            try:
-                rgxCompiled=re.compile(pattern, flags)
-            except re.error as e:
-                self.log.error(f"Invalid regex pattern '{pattern}' in configuration file: {e}")
-                continue
-            if rgxCompiled.match(self.device_id):
+            self.device_id=str(ID).strip()
+        if self.stateDir:
+            self.state=c_stateStore(os.path.join(self.stateDir,f"{self.device_id}.json"))
+        self.idemStats={"run":0,"skipped":0,"saved":0.0}
+        self._idemDone=[]
+        self._modDocs={}
+        self.modSummary={}
+        self.gStats=[]
+        self.dryPlan=[]
+        try:
+            for _,items in self.plan.sections(self.device_id):
                 self._processSekce(items)
+            self._flushModFiles()
+            if self.dry_run:
+                for e in self.dryPlan:
+                    if e["cost"]=="config_edit" and e["wouldChange"] is None:
+                        e["wouldChange"]=os.path.realpath(e["target"]) in self.modSummary
+                        e["reason"]="content differs" if e["wouldChange"] else "no change"
+                        if not e["wouldChange"]:
+                            e["estimate"]=0.0
+        finally:
+            if self.state is not None:
+                st=self.idemStats
+                self.log.info(f"State: {st['run']} steps run, {st['skipped']} skipped (unchanged), ~{st['saved']:.2f} s saved")
+                if not self.dry_run:
+                    self._idemRecord()
+                    self.state.save()
+
+    def _idemRecord(self) -> None:
+        """Zapíše stav cílů všech sledovaných kroků.
+        Stav se bere až na konci běhu, protože pozdější kroky mohou cíl ještě změnit (např. +fl a pak =acc),
+        při dalším běhu se porovnává s tímto konečným stavem.
+        """
+        self._pkgSnapshot.clear()
+        for fp,kind,items,ctx,dur in self._idemDone:
+            self._tls.ctx=ctx
+            try:
+                cur=self._idemState(kind,items)
+            except Exception:
+                cur=None
+            finally:
+                self._tls.ctx=None
+            if cur is None:
+                self.state.drop(fp)
+            else:
+                self.state.put(fp,items[0].cmd,cur,dur)
+        self._idemDone=[]
                 
     def _processSekce(self,sekce:list[c_row_parser]):
         """zpracuje sekci pro dané zařízení"""
-        for item in sekce:
-            self.log.info(f"Processing command: {item.cmd} {' '.join(item.args)}")
-            x=self._processLine(item)
-            if x!='m':
+        if self.workers>1:
+            self._processSekceParallel(sekce)
+            return
+        i=0
+        while i<len(sekce):
+            item=sekce[i]
+            i+=1
+            kind="cmd"
+            items=[item]
+            if item.ok and item.cmd and item.args and _RX_PKG_CMD.match(item.cmd):
+                kind="pkg"
+                if self.pkg_batch:
+                    # po sobě jdoucí stejné příkazy balíčkovače se provedou jedním voláním
+                    while i<len(sekce) and sekce[i].ok and sekce[i].cmd==item.cmd and sekce[i].args:
+                        items.append(sekce[i])
+                        i+=1
+            elif item.ok and item.cmd in _G_CMDS and item.args and self.g_workers>1:
+                # po sobě jdoucí +g/!g/-g nad různými resource se provedou současně
+                names={item.args[0]}
+                while i<len(sekce) and sekce[i].ok and sekce[i].cmd in _G_CMDS and sekce[i].args and sekce[i].args[0] not in names:
+                    names.add(sekce[i].args[0])
+                    items.append(sekce[i])
+                    i+=1
+                if len(items)>1:
+                    kind="g"
+            elif item.ok and item.cmd=="=mod" and len(item.args)>=2:
+                kind="mod"
+                while i<len(sekce) and sekce[i].ok and sekce[i].cmd in ("+prop","-prop","=prop"):
+                    items.append(sekce[i])
+                    i+=1
+            if kind=="pkg":
+                self.log.info(f"Processing command: {item.cmd} {' '.join(x.args[0] for x in items)}")
+            elif kind=="g":
+                self.log.info(f"Processing command: {' '.join(x.cmd+' '+x.args[0] for x in items)}")
+            else:
+                self.log.info(f"Processing command: {item.cmd} {' '.join(item.args)}")
+            t0=time.perf_counter()
+            self._execStep(kind,items)
+            self.log.info(f"Command {item.cmd} done in {(time.perf_counter()-t0)*1000:.1f} ms")
+
+    def _execItems(self, kind:str, items:list[c_row_parser]) -> Optional[bool]:
+        """Provede řádky kroku, vrací False pokud balíčkový krok nebyl úspěšný."""
+        first=items[0]
+        if kind=="pkg":
+            return self._cmd_packages(first.cmd[0], first.cmd[1:], [x.args[0] for x in items])
+        elif kind=="g":
+            self._execGroup(items)
+        elif kind=="mod":
+            try:
+                for x in items:
+                    self._processLine(x)
+            finally:
                 self._closeModFile()
+        else:
+            self._processLine(first)
+
+    def _execGroup(self, items:list[c_row_parser]) -> None:
+        """Provede skupinu +g/!g/-g operací nad různými resource, nejvýše g_workers současně.
+        Každá operace je samostatný krok (stav kroků platí pro každou zvlášť), první chyba se vyhodí
+        po doběhnutí ostatních.
+        """
+        ctx=dict(self.context)
+        def run(x:c_row_parser) -> None:
+            self._tls.ctx=dict(ctx)
+            try:
+                self._execStep("cmd",[x])
+            finally:
+                self._tls.ctx=None
+        t0=time.perf_counter()
+        n0=len(self.gStats)
+        with ThreadPoolExecutor(max_workers=min(self.g_workers,len(items)),thread_name_prefix="cfg-g") as ex:
+            futures=[ex.submit(run,x) for x in items]
+        errs=[f.exception() for f in futures if f.exception() is not None]
+        done=self.gStats[n0:]
+        self.log.info(f"g: {len(done)} ops, {sum(x['bytes'] for x in done)} B in {(time.perf_counter()-t0)*1000:.1f} ms "
+                      f"(sum of ops {sum(x['duration'] for x in done)*1000:.1f} ms)")
+        if errs:
+            raise errs[0]
+
+    def _idemTargets(self, kind:str, items:list[c_row_parser]) -> Optional[list[str]]:
+        """Vrátí cesty jejichž stav určuje zda je krok potřeba, None = krok se nesleduje."""
+        first=items[0]
+        if kind=="mod":
+            return [self._abs_path(first.args[0])]
+        if kind!="cmd" or first.cmd not in _IDEM_CMDS or not first.args:
+            return None
+        if first.cmd=="+ssh":
+            home = "/root" if self.context["run_user"] == "root" else f"/home/{self.context['run_user']}"
+            return [os.path.join(home,".ssh","authorized_keys")]
+        if first.cmd in ("+g","!g"):
+            gpath=self.context.get("g_path")
+            return [os.path.join(gpath,first.args[0])] if gpath else None
+        return [self._abs_path(first.args[0])]
+
+    def _idemTracked(self, kind:str, items:list[c_row_parser]) -> bool:
+        """Zda se stav kroku sleduje, aktualizace balíčků ('=') se nesleduje - má se zkusit při každém běhu."""
+        if kind=="pkg":
+            return items[0].cmd[0]!="="
+        return kind=="mod" or self._idemTargets(kind,items) is not None
+
+    def _idemState(self, kind:str, items:list[c_row_parser]):
+        """Aktuální stav cíle kroku (JSON serializovatelný), None = nelze zjistit."""
+        if kind=="pkg":
+            first=items[0]
+            if first.cmd[0]=="=":
+                return None
+            mgr,_=self._pkgManager(first.cmd[1:])
+            installed=self._pkgInstalled(mgr)
+            if installed is None:
+                return None
+            r=[]
+            for x in items:
+                n=self._pkgName(mgr,x.args[0])
+                if n is None:
+                    return None # verze se ze snapshotu nepozná
+                if (n in installed)!=(first.cmd[0]=="+"):
+                    return None # skutečný stav neodpovídá požadovanému, krok se nesmí přeskočit
+                r.append([n,n in installed])
+            return r
+        paths=self._idemTargets(kind,items)
+        if paths is None:
+            return None
+        r=[]
+        for p in paths:
+            try:
+                st=os.stat(p)
+                r.append([p,st.st_size,st.st_mtime_ns,st.st_mode,st.st_uid,st.st_gid])
+            except OSError:
+                r.append([p,None])
+        return r
+
+    def _idemFingerprint(self, kind:str, items:list[c_row_parser]) -> str:
+        """Otisk kroku - příkazy, kontext a data použitých resource."""
+        h=hashlib.sha256()
+        ctx=self.context
+        h.update(json.dumps([kind,ctx.get("run_user"),ctx.get("workdir"),ctx.get("g_path")]).encode())
+        res=self.plan.resources
+        for x in items:
+            h.update(json.dumps([x.cmd,x.args]).encode())
+            name=None
+            if x.cmd in ("+fl","!fl") and len(x.args)>=2:
+                name=x.args[1]
+            elif x.cmd in ("+ssh","+g","!g") and x.args:
+                name=x.args[0]
+            if name is not None:
+                r=res.get(name,"")
+                h.update((r.fingerprint() if isinstance(r,c_resRef) else r).encode())
+        return h.hexdigest()
+
+    def _execStep(self, kind:str, items:list[c_row_parser]) -> None:
+        """Provede krok, pokud je zapnutý stav (stateDir) tak nezměněný krok přeskočí."""
+        self._modFlushFor(kind,items)
+        if self.dry_run and kind!="g":
+            self._dryRecord(kind,items)
+        store=self.state
+        tracked=store is not None and self._idemTracked(kind,items)
+        if not tracked:
+            self._execItems(kind,items)
+            return
+        fp=self._idemFingerprint(kind,items)
+        ctx=dict(self.context)
+        prev=store.get(fp)
+        if prev is not None:
+            cur=self._idemState(kind,items)
+            if cur is not None and cur==prev.get("state"):
+                self.log.info(f"skip {items[0].cmd} {' '.join(items[0].args)} (unchanged since last run)")
+                dur=float(prev.get("dur",0.0))
+                with self._idemLock:
+                    self.idemStats["skipped"]+=1
+                    self.idemStats["saved"]+=dur
+                    self._idemDone.append((fp,kind,items,ctx,dur))
+                return
+        t0=time.perf_counter()
+        try:
+            ok=self._execItems(kind,items)
+        except BaseException:
+            store.drop(fp)
+            raise
+        dur=time.perf_counter()-t0
+        if ok is False:
+            store.drop(fp)
+        with self._idemLock:
+            self.idemStats["run"]+=1
+            if ok is not False:
+                self._idemDone.append((fp,kind,items,ctx,dur))
+
+    def _dryCost(self, kind:str, items:list[c_row_parser]) -> Tuple[Optional[str],str]:
+        """Vrátí (třída nákladů, cíl) kroku, třída None = jen změna kontextu, do plánu se nezapisuje."""
+        first=items[0]
+        cmd=first.cmd
+        args=first.args
+        if kind=="pkg":
+            return ("package_remove" if cmd[0]=="-" else "package_install"), f"{cmd[1:]}:{' '.join(x.args[0] for x in items)}"
+        if kind=="mod":
+            return "config_edit", self._abs_path(args[0])
+        if not first.ok or not cmd or cmd in ("=u","=d","=g"):
+            return None, ""
+        if cmd.startswith("°"):
+            return "script", cmd[1:]
+        if not args:
+            return "none", ""
+        if cmd in ("+d","!d","-d"):
+            return "dir", self._abs_path(args[0])
+        if cmd in ("+fl","!fl","+g","!g","+ssh"):
+            paths=self._idemTargets(kind,items)
+            return "file_write", paths[0] if paths else args[0]
+        if cmd in ("-fl","=acc"):
+            return "file_meta", self._abs_path(args[0])
+        if cmd=="-g":
+            gpath=self.context.get("g_path")
+            return "file_meta", os.path.join(gpath,args[0]) if gpath else args[0]
+        if cmd=="-ssh":
+            home = "/root" if self.context["run_user"] == "root" else f"/home/{self.context['run_user']}"
+            return "file_meta", os.path.join(home,".ssh","authorized_keys")
+        if cmd=="+u":
+            return "user", args[0]
+        return "none", args[0]
+
+    def _dryChange(self, kind:str, items:list[c_row_parser], target:str) -> Tuple[Optional[bool],str]:
+        """Zjistí z aktuálního stavu cíle zda by krok něco změnil.
+        Returns:
+            Tuple[Optional[bool],str]: (změní, důvod), None = nelze zjistit bez provedení
+        """
+        first=items[0]
+        cmd=first.cmd
+        args=first.args
+        if kind=="pkg":
+            mgr,_=self._pkgManager(cmd[1:])
+            if cmd[0] not in ("+","-"):
+                return None, "update"
+            installed=self._pkgInstalled(mgr)
+            if installed is None:
+                return None, "installed packages unknown"
+            todo=0
+            for x in items:
+                n=self._pkgName(mgr,x.args[0])
+                if n is None:
+                    return None, "versioned package"
+                if (n in installed)!=(cmd[0]=="+"):
+                    todo+=1
+            if not todo:
+                return False, "already installed" if cmd[0]=="+" else "not installed"
+            return True, f"{todo} of {len(items)} packages"
+        if kind=="mod":
+            return None, ""
+        if cmd.startswith("°"):
+            return True, "script"
+        if cmd in ("+d","!d"):
+            return (False, "exists") if os.path.isdir(target) else (True, "missing")
+        if cmd=="-d" or cmd in ("-fl","-g"):
+            return (True, "exists") if os.path.lexists(target) else (False, "missing")
+        if cmd in ("+fl","!fl","+g","!g"):
+            name=args[1] if cmd in ("+fl","!fl") else args[0]
+            if name not in self.sekce.resources:
+                return False, "resource not found"
+            if not os.path.exists(target):
+                return True, "missing"
+            if cmd[0]=="+":
+                return False, "exists"
+            h=hashlib.sha256()
+            for ch in resourceChunks(self.sekce.resources[name]):
+                h.update(ch)
+            f=hashlib.sha256()
+            with open(target,"rb") as fh:
+                for ch in iter(lambda: fh.read(1<<16), b""):
+                    f.update(ch)
+            return (False, "same content") if f.digest()==h.digest() else (True, "content differs")
+        if cmd in ("+ssh","-ssh"):
+            try:
+                text=Path(target).read_text(encoding="utf-8")
+            except OSError:
+                return (True, "missing") if cmd=="+ssh" else (False, "missing")
+            if cmd=="-ssh":
+                return (True, "present") if args[0] in text else (False, "not present")
+            key=self.sekce.resources.get(args[0])
+            if key is None:
+                return False, "resource not found"
+            key=b"".join(resourceChunks(key)) if isinstance(key,c_resRef) else key.encode()
+            return (False, "present") if key.strip().decode("utf-8","replace") in text else (True, "not present")
+        if cmd=="+u":
+            try:
+                import pwd
+                pwd.getpwnam(args[0])
+                return False, "exists"
+            except KeyError:
+                return True, "missing"
+            except ImportError:
+                return None, ""
+        return None, ""
+
+    def _dryRecord(self, kind:str, items:list[c_row_parser]) -> None:
+        """Zapíše krok do dryPlan s odhadem zda by něco změnil a jak dlouho by trval."""
+        cost,target=self._dryCost(kind,items)
+        if cost is None:
+            return
+        first=items[0]
+        prev=None
+        try:
+            change,reason=None,""
+            if self.state is not None and self._idemTracked(kind,items):
+                prev=self.state.get(self._idemFingerprint(kind,items))
+                if prev is not None:
+                    cur=self._idemState(kind,items)
+                    if cur is not None and cur==prev.get("state"):
+                        change,reason=False,"unchanged since last run"
+            if change is None and not reason:
+                change,reason=self._dryChange(kind,items,target)
+        except Exception as e:
+            change,reason=None,f"check failed: {e}"
+        if change is False:
+            est=0.0
+        elif prev is not None and prev.get("dur") is not None:
+            est=float(prev["dur"])
+        else:
+            est=DRY_COST.get(cost,0.0)*(len(items) if kind=="pkg" else 1)
+        e={"cmd":first.cmd,"args":list(first.args),"target":target,"cost":cost,"wouldChange":change,"reason":reason,"estimate":round(est,3)}
+        if kind=="pkg":
+            e["args"]=[x.args[0] for x in items]
+        elif kind=="mod":
+            e["lines"]=len(items)
+        with self._idemLock:
+            self.dryPlan.append(e)
+
+    def dryRunPlan(self) -> Dict[str,Any]:
+        """Plán operací z posledního běhu s dry_run jako dict pro JSON.
+        Returns:
+            Dict[str,Any]: {"dev", "ops": dryPlan, "summary": {"ops", "changes", "unchanged", "unknown",
+                "estimate", "byCost": {třída: {"ops", "changes", "estimate"}}}}, estimate v sec,
+                neznámé (wouldChange None) se počítají do odhadu
+        """
+        by:Dict[str,Dict[str,Any]]={}
+        for e in self.dryPlan:
+            b=by.setdefault(e["cost"],{"ops":0,"changes":0,"estimate":0.0})
+            b["ops"]+=1
+            b["changes"]+=1 if e["wouldChange"] else 0
+            b["estimate"]+=e["estimate"]
+        for b in by.values():
+            b["estimate"]=round(b["estimate"],3)
+        ops=self.dryPlan
+        return {
+            "dev":self.device_id,
+            "ops":ops,
+            "summary":{
+                "ops":len(ops),
+                "changes":sum(1 for e in ops if e["wouldChange"]),
+                "unchanged":sum(1 for e in ops if e["wouldChange"] is False),
+                "unknown":sum(1 for e in ops if e["wouldChange"] is None),
+                "estimate":round(sum(e["estimate"] for e in ops),3),
+                "byCost":by,
+            },
+        }
+
+    def _modFlushFor(self, kind:str, items:list[c_row_parser]) -> None:
+        """Zapíše rozpracované mod soubory, se kterými pracuje následující krok.
+        Po sobě jdoucí =mod bloky nad stejným souborem se zapíší jednou, ale krok nad stejnou
+        cestou (+fl, !fl, -fl, =acc, -d...) nebo bariéra (skript, +u) musí vidět aktuální obsah
+        a nesmí být přepsán pozdějším zápisem.
+        """
+        if not self._modDocs or kind not in ("cmd",):
+            return
+        item=items[0]
+        if not item.ok or item.commentLine or item.emptyLine or not item.cmd or item.cmd in _MOD_NOFLUSH:
+            return
+        keys,barrier=self._stepKeys(item)
+        with self._modLock:
+            docs=list(self._modDocs)
+        if not barrier:
+            keys={("path",os.path.realpath(k[1])) for k in keys if k[0]=="path"}
+            docs=[p for p in docs if _keysConflict(keys,{("path",p)})]
+        if docs:
+            self._flushModFiles(set(docs))
+
+    def _stepKeys(self, item:c_row_parser) -> Tuple[set,bool]:
+        """Vrátí (prostředky, barrier) příkazu podle aktuálního kontextu."""
+        cmd=item.cmd
+        args=item.args
+        if cmd in ("+d","!d","-d","+fl","!fl","-fl","=acc") and args:
+            return {("path",os.path.normpath(self._abs_path(args[0])))}, False
+        if cmd in ("+ssh","-ssh") and args:
+            home = "/root" if self.context["run_user"] == "root" else f"/home/{self.context['run_user']}"
+            return {("path",os.path.join(home,".ssh"))}, False
+        if cmd in ("+g","!g","-g") and args:
+            gpath=self.context.get("g_path")
+            if gpath:
+                return {("path",os.path.normpath(os.path.join(gpath,args[0])))}, False
+            return set(), False
+        # skripty, přidání uživatele a neznámé příkazy můžou ovlivnit cokoliv
+        return set(), True
+
+    def _buildSteps(self, sekce:list[c_row_parser]) -> list[c_step]:
+        """Rozdělí sekci na kroky a určí závislosti.
+        Kontext se během sestavení simuluje stejnými funkcemi jako při běhu (=u, =d, !d, =g),
+        každý krok dostane kopii kontextu platnou v jeho místě. Po sestavení je self.context
+        nastavený na kontext na konci sekce.
+        """
+        steps:list[c_step]=[]
+        i=0
+        while i<len(sekce):
+            item=sekce[i]
+            i+=1
+            ctx=dict(self.context)
+            if not item.ok or item.commentLine or item.emptyLine or not item.cmd:
+                continue
+            cmd=item.cmd
+            if cmd in ("=u","=d","=g") and item.args:
+                self._processLine(item)
+                continue
+            if cmd=="=mod" and len(item.args)>=2:
+                items=[item]
+                while i<len(sekce) and sekce[i].ok and sekce[i].cmd in ("+prop","-prop","=prop"):
+                    items.append(sekce[i])
+                    i+=1
+                # mod stav je na instanci, bloky se proto provádí postupně
+                keys={("path",os.path.normpath(self._abs_path(item.args[0]))),("lock","mod")}
+                steps.append(c_step(len(steps),items,"mod",ctx,keys))
+                continue
+            if _RX_PKG_CMD.match(cmd) and item.args:
+                items=[item]
+                if self.pkg_batch:
+                    while i<len(sekce) and sekce[i].ok and sekce[i].cmd==cmd and sekce[i].args:
+                        items.append(sekce[i])
+                        i+=1
+                # správce balíčků drží zámek (dpkg), stejný typ se provádí postupně
+                keys={("lock","pkg:"+("pip" if cmd[1:]=="pip3" else cmd[1:]))}
+                steps.append(c_step(len(steps),items,"pkg",ctx,keys))
+                continue
+            keys,barrier=self._stepKeys(item)
+            steps.append(c_step(len(steps),[item],"cmd",ctx,keys,barrier))
+            if cmd=="!d" and item.args:
+                self._set_dir(self._abs_path(item.args[0]))
+
+        lastBarrier=-1
+        for s in steps:
+            if s.barrier:
+                s.deps=list(range(lastBarrier+1,s.index))
+                if lastBarrier>=0 and lastBarrier not in s.deps:
+                    s.deps.insert(0,lastBarrier)
+                lastBarrier=s.index
+                continue
+            s.deps=[lastBarrier] if lastBarrier>=0 else []
+            for p in steps[lastBarrier+1:s.index]:
+                if _keysConflict(s.keys,p.keys):
+                    s.deps.append(p.index)
+        return steps
+
+    def _runStep(self, step:c_step) -> None:
+        """Provede krok s jeho kopií kontextu (ve vlákně poolu)."""
+        self._tls.ctx=dict(step.ctx)
+        t0=time.perf_counter()
+        try:
+            first=step.items[0]
+            self.log.info(f"[{step.index}] Processing command: {first.cmd} {' '.join(first.args)}{f' (+{len(step.items)-1})' if len(step.items)>1 else ''}")
+            self._execStep(step.kind,step.items)
+        finally:
+            self._tls.ctx=None
+            self.log.info(f"[{step.index}] Command {step.items[0].cmd} done in {(time.perf_counter()-t0)*1000:.1f} ms")
+
+    def _processSekceParallel(self,sekce:list[c_row_parser]):
+        """Zpracuje sekci s nezávislými příkazy paralelně.
+        Závislosti:
+            - příkazy nad stejnou cestou nebo cestou nadřazenou/podřízenou běží v pořadí souboru
+            - =mod blok (=mod a následující prop řádky) je jeden krok, mod bloky běží postupně
+            - příkazy stejného balíčkovače běží postupně
+            - skripty (°), +u a neznámé příkazy jsou bariéra
+        Při chybě se další kroky nespouští a první výjimka se vyhodí po doběhnutí rozběhnutých kroků.
+        """
+        self._closeModFile()
+        steps=self._buildSteps(sekce)
+        if not steps:
+            return
+        self.log.info(f"Parallel section: {len(steps)} steps, {self.workers} workers")
+        futures:list[Future]=[]
+        failed=threading.Event()
+
+        def run(step:c_step):
+            # kroky se zadávají v pořadí a čekají jen na dřívější, FIFO pool proto nezablokuje
+            for d in step.deps:
+                futures[d].exception()
+            if failed.is_set():
+                return
+            for d in step.deps:
+                if futures[d].exception() is not None:
+                    failed.set()
+                    return
+            try:
+                self._runStep(step)
+            except BaseException:
+                failed.set()
+                raise
+
+        t0=time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cfg") as ex:
+            for st in steps:
+                futures.append(ex.submit(run, st))
+        self.log.info(f"Parallel section done in {(time.perf_counter()-t0)*1000:.1f} ms")
+        for f in futures:
+            e=f.exception()
+            if e is not None:
+                raise e
             
     def _processLine(self, item:c_row_parser):
         """zpracuje jeden řádek příkazu
@@ -523,7 +1724,7 @@ class Configurator:
                 action=cmd[0]  # + - =
                 self._cmd_prop(action, args[0], args[1] if len(args)>=2 else None)            
             return 'm'
-        if re.match(r"^([+-=])(app|npm|pip|pip3)$", cmd):
+        if _RX_PKG_CMD.match(cmd):
             action = cmd[0]
             pkg_type = cmd[1:]
             if args:
@@ -556,7 +1757,7 @@ class Configurator:
             return
         
         self.log.info(f"Running inline script: {' '.join(cmd)}")
-        retcode, stdout, stderr = __hlp.run_as_user(self.context["run_user"], cmd, cwd=self.context["workdir"])
+        retcode, stdout, stderr = _hlp.run_as_user(self.context["run_user"], cmd, cwd=self.context["workdir"])
         if retcode != 0:
             self._raise(RuntimeError(f"Inline script '{fullpath}' failed with code {retcode}: {stderr.strip()}"))
         else:
@@ -569,7 +1770,7 @@ class Configurator:
             prop_path (str): cesta ve formátu "root.section.key" (s podporou quoted částí)
             value (str|None): nová hodnota (není potřeba pro '-')
         """
-        if not self.mod_active or not self.mod_file or not self.mod_type:
+        if not self.mod_active or not self.mod_type:
             self._raise(ValueError(f"{action}prop použito mimo modifikační režim."))
 
         # Rozparsuj property path (podpora "quoted"."path with space")
@@ -702,38 +1903,35 @@ class Configurator:
                 self.log.info(f"JSON -prop {'.'.join(path)} removed")
     
     def _closeModFile(self)->None:
-        """Uzavře modifikační soubor pokud je otevřený.
+        """Ukončí modifikační režim. Obsah zůstává v _modDocs, na disk se zapíše v _flushModFiles.
         Returns:
             None
         """
-        if self.mod_active and self.mod_file is not None:
-            # =============== Uložení změn ===============
-            try:
-                self.mod_file.seek(0)
-                self.mod_file.truncate()
-                if self.mod_type == "json":
-                    json.dump(self.mod_json_content, self.mod_file, indent=2, ensure_ascii=False)
-                else:
-                    parser = configparser.ConfigParser()
-                    for sec, kv in self.mod_ini_content.items():
-                        parser[sec] = kv
-                    parser.write(self.mod_file)
-                self.mod_file.flush()
-            except Exception as e:
-                self._raise(ValueError(f"Chyba při zápisu modifikačního souboru: {e}"))            
-            
-            # Uzavření souboru
+        if self.mod_active:
             self.log.info(f"Closing modification file: {self.mod_filePath}")
-            self.mod_file.close()
             self.mod_active = False
             self.mod_file = None
             self.mod_type = None
             self.mod_filePath = None
             self.mod_json_content = None
             self.mod_ini_content = None
+
+    @staticmethod
+    def _modSerialize(mod_type:str, content)->str:
+        """Vrátí text souboru pro obsah mod dokumentu."""
+        if mod_type == "json":
+            return json.dumps(content, indent=2, ensure_ascii=False)
+        parser = configparser.ConfigParser()
+        for sec, kv in content.items():
+            parser[sec] = kv
+        buf = io.StringIO()
+        parser.write(buf)
+        return buf.getvalue()
             
     def _openModFile(self,mod_type,filePath)->None:
         """Otevře modifikační soubor pro úpravy.
+        Soubor se načte jen při prvním použití v běhu, další =mod bloky nad stejným souborem
+        pracují se stejným obsahem v paměti.
         Args:
             mod_type (str): typ modifikace ("json" nebo "ini")
             filePath (str): cesta k souboru
@@ -741,25 +1939,97 @@ class Configurator:
             None
         """        
         self._closeModFile()
-        if not os.path.exists(filePath):
-            self._raise(FileNotFoundError(f"File for modification not found: {filePath}"))
-        self.mod_file = open(filePath, "r+", encoding="utf-8")
+        if mod_type not in ("json", "ini"):
+            self._raise(ValueError(f"Neznámý mod_type '{mod_type}'"))
+        key = os.path.realpath(filePath)
+        doc = self._modDocs.get(key)
+        if doc is None:
+            if not os.path.exists(filePath):
+                self._raise(FileNotFoundError(f"File for modification not found: {filePath}"))
+            with open(filePath, "r", encoding="utf-8") as f:
+                if mod_type == "json":
+                    try:
+                        content = json.load(f)
+                    except Exception as e:
+                        self._raise(ValueError(f"Failed to parse JSON file '{filePath}': {e}"))
+                else:
+                    parser = configparser.ConfigParser()
+                    try:
+                        parser.read_file(f)
+                        content = {s: dict(parser.items(s)) for s in parser.sections()}
+                    except Exception as e:
+                        self._raise(ValueError(f"Failed to parse INI file '{filePath}': {e}"))
+            doc = {"type": mod_type, "content": content, "base": self._modSerialize(mod_type, content)}
+            with self._modLock:
+                self._modDocs[key] = doc
+        elif doc["type"] != mod_type:
+            self._raise(ValueError(f"File '{filePath}' already modified as {doc['type']}, not {mod_type}"))
         self.mod_active = True
         self.mod_filePath = filePath
         self.mod_type = mod_type
-        self.log.info(f"Opened modification file: {filePath} ({mod_type})")
         if mod_type == "json":
+            self.mod_json_content = doc["content"]
+        else:
+            self.mod_ini_content = doc["content"]
+        self.log.info(f"Opened modification file: {filePath} ({mod_type})")
+
+    def _flushModFiles(self, paths:Optional[set]=None)->Dict[str,Tuple[int,int]]:
+        """Zapíše změněné mod soubory, každý jednou přes dočasný soubor a os.replace
+        (práva a vlastník zůstanou původní). Zaloguje souhrn změn a přičte ho do modSummary.
+        Args:
+            paths (set|None): cesty (realpath) které se mají zapsat, None = všechny a ukončí mod režim
+        Returns:
+            Dict[str,Tuple[int,int]]: cesta -> (přidané, odebrané řádky) pro změněné soubory
+        """
+        if paths is None:
+            self._closeModFile()
+        summary: Dict[str,Tuple[int,int]] = {}
+        with self._modLock:
+            if paths is None:
+                docs, self._modDocs = self._modDocs, {}
+            else:
+                docs = {p: self._modDocs.pop(p) for p in paths if p in self._modDocs}
+        for path, doc in docs.items():
+            new = self._modSerialize(doc["type"], doc["content"])
+            if new == doc["base"]:
+                self.log.info(f"mod {path}: no change")
+                continue
+            diff = list(difflib.unified_diff(doc["base"].splitlines(), new.splitlines(), path, path, lineterm="", n=0))
+            add = sum(1 for l in diff if l.startswith("+") and not l.startswith("+++"))
+            rem = sum(1 for l in diff if l.startswith("-") and not l.startswith("---"))
+            summary[path] = (add, rem)
+            self.log.info(f"{'[DRY] ' if self.dry_run else ''}mod {path}: +{add} -{rem} lines")
+            for l in diff[2:]:
+                self.log.info(f"    {l}")
+            if self.dry_run:
+                continue
             try:
-                self.mod_json_content = json.load(self.mod_file)
-            except Exception as e:
-                self._raise(ValueError(f"Failed to parse JSON file '{filePath}': {e}"))
-        elif mod_type == "ini":
-            parser = configparser.ConfigParser()
-            try:
-                parser.read_file(self.mod_file)
-                self.mod_ini_content = {s: dict(parser.items(s)) for s in parser.sections()}
+                st = os.stat(path)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".mod-")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        f.write(new)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.chmod(tmp, st.st_mode & 0o7777)
+                    try:
+                        os.chown(tmp, st.st_uid, st.st_gid)
+                    except OSError:
+                        pass
+                    os.replace(tmp, path)
+                except BaseException:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+                    raise
             except Exception as e:
-                self._raise(ValueError(f"Failed to parse INI file '{filePath}': {e}"))
+                self._raise(ValueError(f"Chyba při zápisu modifikačního souboru '{path}': {e}"))
+        with self._modLock:
+            for path, (add, rem) in summary.items():
+                a0, r0 = self.modSummary.get(path, (0, 0))
+                self.modSummary[path] = (a0 + add, r0 + rem)
+        return summary
     
     def _raise(self,msg:Exception)->None:
         """Loguje a vyhazuje výjimku.
@@ -791,13 +2061,13 @@ class Configurator:
 
     def _cmd_mkdir(self, path: str, chdir: bool=False):
         p = Path(self._abs_path(path))
-        __hlp.ensure_dir(p, owner=self.context["run_user"], dry_run=self.dry_run)
+        _hlp.ensure_dir(p, owner=self.context["run_user"], dry_run=self.dry_run)
         if chdir:
             self._set_dir(str(p))
 
     def _cmd_rmdir(self, path: str):
         p = Path(self._abs_path(path))
-        __hlp.rm_dir(p, dry_run=self.dry_run)
+        _hlp.rm_dir(p, dry_run=self.dry_run)
 
     def _abs_path(self, path: str) -> str:
         if path.startswith("/"):
@@ -817,18 +2087,15 @@ class Configurator:
             self.log.error(f"resource {resource_name} not found")
             return
         data = self.sekce.resources[resource_name]
-        
-        if isinstance(data, str):
-            if __hlp.is_base64(data):
-                data = base64.b64decode(data)
-            else:
-                data = data.encode('utf-8')
                             
         dest = Path(self._abs_path(filename))
         if dest.exists() and not overwrite:
             self.log.info(f"skip add file {dest} (exists)")
             return
-        __hlp.write_file(dest, data, dry_run=self.dry_run)
+        try:
+            _hlp.write_chunks(dest, resourceChunks(data), dry_run=self.dry_run)
+        except (OSError, ValueError) as e:
+            self._raise(ValueError(f"resource {resource_name} -> {dest}: {e}"))
         # set ownership to run_user
         if not self.dry_run:
             try:
@@ -841,7 +2108,7 @@ class Configurator:
 
     def _cmd_remove_file(self, filename: str):
         p = Path(self._abs_path(filename))
-        __hlp.remove_file(p, dry_run=self.dry_run)
+        _hlp.remove_file(p, dry_run=self.dry_run)
 
     def _cmd_acc(self, filename: str, spec: str):
         """Upraví přístupová práva podle specifikace (např. gourwx nebo g+rwx)."""
@@ -918,7 +2185,10 @@ class Configurator:
         if resource_name not in self.sekce.resources:
             self.log.error(f"ssh resource {resource_name} not found")
             return
-        keydata = self.sekce.resources[resource_name].strip()
+        keydata = self.sekce.resources[resource_name]
+        if isinstance(keydata, c_resRef):
+            keydata = b"".join(keydata.chunks())
+        keydata = keydata.strip()
         # trusted string from resource (we expect the full authorized_keys line)
         if isinstance(keydata, bytes):
             try:
@@ -930,7 +2200,7 @@ class Configurator:
         home = "/root" if self.context["run_user"] == "root" else f"/home/{self.context['run_user']}"
         sshdir = Path(home) / ".ssh"
         auth = sshdir / "authorized_keys"
-        __hlp.ensure_dir(sshdir, owner=self.context["run_user"], dry_run=self.dry_run)
+        _hlp.ensure_dir(sshdir, owner=self.context["run_user"], dry_run=self.dry_run)
         if self.dry_run:
             self.log.info(f"[DRY] add ssh key to {auth} -> {resource_name}")
             return
@@ -975,26 +2245,38 @@ class Configurator:
         if not gpath:
             self.log.error("g_path not set; use =g <path>")
             return
+        t0 = time.perf_counter()
         dest = Path(gpath)
         dest.mkdir(parents=True, exist_ok=True)
         dest_file = dest / resource_name
+        n = 0
         if op == '-':
-            __hlp.remove_file(dest_file, dry_run=self.dry_run)
-            return
-        if resource_name not in self.sekce.resources:
+            _hlp.remove_file(dest_file, dry_run=self.dry_run)
+            result = "removed"
+        elif resource_name not in self.sekce.resources:
             self.log.error(f"resource {resource_name} not found")
-            return
-        if op == '+' and dest_file.exists():
+            result = "missing"
+        elif op == '+' and dest_file.exists():
             self.log.info(f"g: {dest_file} exists -> skip")
-            return
-        data = self.sekce.resources[resource_name]
-        if isinstance(data, str):
-            if __hlp.is_base64(data):
-                data = base64.b64decode(data)
-            else:
-                data = data.encode('utf-8')
-        __hlp.write_file(dest_file, data, dry_run=self.dry_run)        
-        self.log.info(f"g: wrote {dest_file}")
+            result = "exists"
+        else:
+            data = self.sekce.resources[resource_name]
+            try:
+                n = _hlp.write_chunks(dest_file, resourceChunks(data), dry_run=self.dry_run)
+            except (OSError, ValueError) as e:
+                self._gStat(op, resource_name, dest_file, "error", 0, t0)
+                self._raise(ValueError(f"resource {resource_name} -> {dest_file}: {e}"))
+            result = "written"
+        dur = self._gStat(op, resource_name, dest_file, result, n, t0)
+        if result == "written":
+            self.log.info(f"g: wrote {dest_file} ({n} B, {dur*1000:.1f} ms)")
+
+    def _gStat(self, op: str, name: str, path: Path, result: str, n: int, t0: float) -> float:
+        """zaznamená výsledek +g/!g/-g operace do gStats, vrací dobu v sec"""
+        dur = time.perf_counter() - t0
+        with self._gLock:
+            self.gStats.append({"op": op + "g", "name": name, "path": str(path), "result": result, "bytes": n, "duration": dur})
+        return dur
         
     def _cmd_package(self, action: str, pkg_type: str, package: str):
         """
@@ -1003,70 +2285,221 @@ class Configurator:
             action (str): '+', '=', nebo '-'
             pkg_type (str): 'app', 'pip', 'pip3', 'npm'
             package (str): název balíčku
+        Returns:
+            bool: True = úspěch
         """
-        if not package or package.strip() == "":
-            self.log.error(f"{pkg_type}: prázdný název balíčku není platný")
-            return
+        return self._cmd_packages(action, pkg_type, [package])
 
-        dry = "[DRY]" if self.dry_run else ""
-        self.log.info(f"{dry} {pkg_type} {action}pkg {package}")
-
-        # určování příkazu
+    def _pkgManager(self, pkg_type: str) -> Tuple[str, Dict[str, List[str]]]:
+        """Vrátí (správce, akce -> argumenty bez balíčků) pro typ balíčku."""
         if pkg_type == "app":
             # detekce správce balíčků
             if shutil.which("apt-get"):
-                mgr = "apt-get"
-                cmds = {
-                    '+': ["install", "-y", package],
-                    '=': ["install", "-y", "--only-upgrade", package],
-                    '-': ["remove", "-y", package],
+                return "apt-get", {
+                    '+': ["install", "-y"],
+                    '=': ["install", "-y", "--only-upgrade"],
+                    '-': ["remove", "-y"],
                 }
-            elif shutil.which("dnf"):
-                mgr = "dnf"
-                cmds = {
-                    '+': ["install", "-y", package],
-                    '=': ["upgrade", "-y", package],
-                    '-': ["remove", "-y", package],
+            if shutil.which("dnf"):
+                return "dnf", {
+                    '+': ["install", "-y"],
+                    '=': ["upgrade", "-y"],
+                    '-': ["remove", "-y"],
                 }
-            elif shutil.which("yum"):
-                mgr = "yum"
-                cmds = {
-                    '+': ["install", "-y", package],
-                    '=': ["update", "-y", package],
-                    '-': ["remove", "-y", package],
+            if shutil.which("yum"):
+                return "yum", {
+                    '+': ["install", "-y"],
+                    '=': ["update", "-y"],
+                    '-': ["remove", "-y"],
                 }
-            else:
-                self._raise(RuntimeError("Nebyl nalezen žádný systémový správce balíčků (apt, dnf, yum)."))
-                return
-
-        elif pkg_type in ("pip", "pip3"):
-            mgr = "pip3" if pkg_type == "pip3" else "pip"
-            cmds = {
-                '+': ["install", package],
-                '=': ["install", "--upgrade", package],
-                '-': ["uninstall", "-y", package],
+            self._raise(RuntimeError("Nebyl nalezen žádný systémový správce balíčků (apt, dnf, yum)."))
+        if pkg_type in ("pip", "pip3"):
+            return ("pip3" if pkg_type == "pip3" else "pip"), {
+                '+': ["install"],
+                '=': ["install", "--upgrade"],
+                '-': ["uninstall", "-y"],
             }
-
-        elif pkg_type == "npm":
-            mgr = "npm"
-            cmds = {
-                '+': ["install", "-g", package],
-                '=': ["update", "-g", package],
-                '-': ["uninstall", "-g", package],
+        if pkg_type == "npm":
+            return "npm", {
+                '+': ["install", "-g"],
+                '=': ["update", "-g"],
+                '-': ["uninstall", "-g"],
             }
+        self._raise(ValueError(f"Neznámý typ balíčku '{pkg_type}'"))
 
-        else:
-            self._raise(ValueError(f"Neznámý typ balíčku '{pkg_type}'"))
-            return
+    @staticmethod
+    def _pkgName(mgr: str, package: str) -> Optional[str]:
+        """Vrátí čistý název balíčku pro porovnání se snapshotem,
+        None pokud zápis obsahuje verzi nebo jiné upřesnění (pak se nepřeskakuje)."""
+        if mgr == "npm":
+            base = package[1:] if package.startswith("@") else package
+            if "@" in base:
+                return None
+            return package.lower()
+        if re.search(r"[<>=!~\[;@:/ ]", package):
+            return None
+        if mgr in ("pip", "pip3"):
+            return re.sub(r"[-_.]+", "-", package).lower()
+        return package.lower()
+
+    def _pkgInstalled(self, mgr: str) -> Optional[set]:
+        """Vrátí množinu nainstalovaných balíčků jedním dotazem, výsledek se cachuje
+        do další změny přes tento správce. None pokud nelze zjistit."""
+        key = (mgr, self.context["run_user"])
+        if key in self._pkgSnapshot:
+            return self._pkgSnapshot[key]
+        names = None
+        try:
+            if mgr == "apt-get":
+                code, out, _ = _hlp.run_as_user(self.context["run_user"], ["dpkg-query", "-W", "-f=${Package} ${db:Status-Status}\n"])
+                if code == 0:
+                    names = {l.split()[0].lower() for l in out.splitlines() if l.endswith(" installed")}
+            elif mgr in ("dnf", "yum"):
+                code, out, _ = _hlp.run_as_user(self.context["run_user"], ["rpm", "-qa", "--qf", "%{NAME}\n"])
+                if code == 0:
+                    names = {l.strip().lower() for l in out.splitlines() if l.strip()}
+            elif mgr in ("pip", "pip3"):
+                code, out, _ = _hlp.run_as_user(self.context["run_user"], [mgr, "list", "--format=json"], cwd=self.context["workdir"])
+                if code == 0:
+                    names = {re.sub(r"[-_.]+", "-", x["name"]).lower() for x in json.loads(out or "[]")}
+            elif mgr == "npm":
+                code, out, _ = _hlp.run_as_user(self.context["run_user"], ["npm", "ls", "-g", "--json", "--depth=0"])
+                # npm ls vrací !=0 i při varování, JSON je ale platný
+                if out:
+                    names = {k.lower() for k in (json.loads(out).get("dependencies") or {})}
+        except Exception as e:
+            self.log.warning(f"{mgr}: nelze zjistit nainstalované balíčky: {e}")
+            names = None
+        self._pkgSnapshot[key] = names
+        return names
 
-        cmd = [mgr] + cmds[action]
+    def _cmd_packages(self, action: str, pkg_type: str, packages: List[str]) -> bool:
+        """
+        Instalace, aktualizace nebo odstranění více balíčků jedním voláním správce.
+        Balíčky které už jsou nainstalované ('+') nebo nejsou nainstalované ('-') se přeskočí.
+        Pokud hromadné volání selže, zkusí se balíčky po jednom aby bylo jasné který selhal.
+        Args:
+            action (str): '+', '=', nebo '-'
+            pkg_type (str): 'app', 'pip', 'pip3', 'npm'
+            packages (list[str]): názvy balíčků
+        Returns:
+            bool: True = všechny balíčky jsou v požadovaném stavu, False = některý selhal
+        """
+        ok = True
+        pkgs = []
+        for package in packages:
+            if not package or package.strip() == "":
+                self.log.error(f"{pkg_type}: prázdný název balíčku není platný")
+                ok = False
+                continue
+            pkgs.append(package)
+        if not pkgs:
+            return ok
+
+        mgr, cmds = self._pkgManager(pkg_type)
+        dry = "[DRY]" if self.dry_run else ""
+        self.log.info(f"{dry} {pkg_type} {action}pkg {' '.join(pkgs)}")
+
+        # přeskočení podle snapshotu nainstalovaných balíčků
+        if action in ('+', '-'):
+            installed = self._pkgInstalled(mgr)
+            if installed is not None:
+                todo = []
+                for p in pkgs:
+                    n = self._pkgName(mgr, p)
+                    if n is not None and (n in installed) == (action == '+'):
+                        self.log.info(f"{pkg_type} {action}pkg '{p}' -> skip ({'already installed' if action == '+' else 'not installed'})")
+                        continue
+                    todo.append(p)
+                pkgs = todo
+            if not pkgs:
+                return ok
+
+        cmd = [mgr] + cmds[action] + pkgs
         self.log.info(f"Spouštím příkaz: {' '.join(cmd)}")
 
         if self.dry_run:
-            return
+            return ok
 
-        code, out, err = __hlp.run_as_user(self.context["run_user"], cmd)
+        code, out, err = _hlp.run_as_user(self.context["run_user"], cmd)
+        self._pkgSnapshot.pop((mgr, self.context["run_user"]), None)
         if code == 0:
-            self.log.info(f"{pkg_type} {action}pkg '{package}' -> OK")
-        else:
-            self.log.error(f"{pkg_type} {action}pkg '{package}' selhalo: {err or out}")
+            self.log.info(f"{pkg_type} {action}pkg '{' '.join(pkgs)}' -> OK")
+            return ok
+        if len(pkgs) == 1:
+            self.log.error(f"{pkg_type} {action}pkg '{pkgs[0]}' selhalo: {err or out}")
+            return False
+
+        self.log.warning(f"{pkg_type} {action}pkg hromadně selhalo, zkouším po jednom: {err or out}")
+        for p in pkgs:
+            code, out, err = _hlp.run_as_user(self.context["run_user"], [mgr] + cmds[action] + [p])
+            if code == 0:
+                self.log.info(f"{pkg_type} {action}pkg '{p}' -> OK")
+            else:
+                self.log.error(f"{pkg_type} {action}pkg '{p}' selhalo: {err or out}")
+                ok = False
+        return ok
+
+RESULT_PREFIX:str="@@CFG-RESULT "
+"""prefix řádku s JSON výsledkem na stdout, viz main() a configuratorFleet"""
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Spuštění z příkazové řádky, plán se čte ze stdin (`--plan -`), ze souboru nebo se zkompiluje z `--config`.
+    Na konci vypíše na stdout řádek `RESULT_PREFIX{json}` se souhrnem pro sběr výsledků z více zařízení,
+    při dry run včetně plánu operací (`plan`, viz Configurator.dryRunPlan).
+    Returns:
+        int: 0 = OK, 1 = chyba
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Configurator - konfigurace zařízení podle plánu")
+    parser.add_argument("--dev", required=True, help="ID zařízení")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--plan", help="zkompilovaný plán JSON (c_configPlan.toDict), '-' = stdin")
+    src.add_argument("--config", help="konfigurační soubor")
+    parser.add_argument("--run", action="store_true", help="provést změny, bez toho jen dry run")
+    parser.add_argument("--workers", type=int, default=1, help="počet vláken pro nezávislé příkazy")
+    parser.add_argument("--state-dir", default=None, help="adresář se stavem kroků")
+    parser.add_argument("--g-workers", type=int, default=1, help="počet současně prováděných +g/!g/-g operací")
+    parser.add_argument("--dry-plan", default=None, help="při dry run uložit plán operací jako JSON do souboru")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(levelname)s %(message)s")
+    log = logging.getLogger("configurator")
+    t0 = time.monotonic()
+    res = {"dev": args.dev, "ok": False, "error": None, "dry_run": not args.run}
+    try:
+        plan = None
+        if args.plan:
+            if args.plan == "-":
+                plan = c_configPlan.fromDict(json.load(sys.stdin))
+            else:
+                with open(args.plan, "r", encoding="utf-8") as f:
+                    plan = c_configPlan.fromDict(json.load(f))
+        c = Configurator(
+            args.config, args.dev, log,
+            dry_run=not args.run,
+            plan=plan,
+            workers=args.workers,
+            stateDir=args.state_dir,
+            gWorkers=args.g_workers
+        )
+        res["ok"] = True
+        res["idemStats"] = c.idemStats
+        res["modSummary"] = {k: list(v) for k, v in c.modSummary.items()}
+        res["gStats"] = c.gStats
+        if c.dry_run:
+            res["plan"] = c.dryRunPlan()
+            if args.dry_plan:
+                with open(args.dry_plan, "w", encoding="utf-8") as f:
+                    json.dump(res["plan"], f, ensure_ascii=False, indent=2)
+    except SystemExit as e:
+        res["error"] = f"exit {e.code}"
+    except Exception as e:
+        res["error"] = f"{type(e).__name__}: {e}"
+    res["duration"] = round(time.monotonic() - t0, 3)
+    sys.stdout.flush()
+    print(RESULT_PREFIX + json.dumps(res, ensure_ascii=False), flush=True)
+    return 0 if res["ok"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
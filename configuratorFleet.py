@@ -0,0 +1,270 @@
+"""Spuštění Configuratoru na více zařízeních přes SSH.
+
+Konfigurace se zkompiluje jednou (`c_configPlan`), plán se pošle na každé zařízení přes stdin
+a tam se vykoná `configurator.py --dev <ID> --plan -`. Samotný `configurator.py` nemá závislosti
+na zbytku balíčku, takže se na zařízení před spuštěním nakopíruje (`shipScript=True`) pod jednorázovým
+názvem do `remoteDir`, který musí patřit přihlášenému uživateli a být jen pro něj (0700), a po běhu se smaže.
+
+Zařízení běží paralelně v omezeném poolu vláken, výstup každého zařízení se průběžně loguje
+s prefixem `[<devID>]` a na konci se z řádku `RESULT_PREFIX{json}` sestaví výsledek.
+
+Přenos je vyměnitelný - `c_sshTransport` (výchozí) nebo `c_localTransport`, který spouští
+příkazy lokálně (pro test bez sshd, adresa se ignoruje).
+
+Example:
+    >>> plan = c_configPlan.fromFile("config.txt")
+    >>> fleet = c_fleetRunner(plan, {"kiosk_01": "root@10.0.0.11", "kiosk_02": "root@10.0.0.12"}, maxWorkers=16)
+    >>> results = fleet.run()
+    >>> print(fleet.report(results))
+"""
+
+import os, json, shlex, subprocess, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Union
+
+from .helper import getLogger
+from .configurator import c_configPlan, RESULT_PREFIX
+
+log = getLogger(__name__)
+
+CONFIGURATOR_SRC: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configurator.py")
+"""zdroj configurator.py který se kopíruje na zařízení"""
+
+@dataclass
+class c_fleetResult:
+    """Výsledek jednoho zařízení"""
+    dev: str
+    address: str
+    ok: bool = False
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    """doba včetně přenosu v sec"""
+    result: dict = field(default_factory=dict)
+    """JSON výsledek z configurator.main(), prázdný pokud nedorazil"""
+    error: Optional[str] = None
+    tail: List[str] = field(default_factory=list)
+    """posledních pár řádků výstupu"""
+
+class c_sshTransport:
+    """Spouští příkazy přes ssh, BatchMode - bez interaktivních dotazů."""
+
+    def __init__(self, sshCmd: str = "ssh", options: Optional[List[str]] = None, connectTimeout: int = 10):
+        """
+        Parameters:
+            sshCmd (str): ssh binárka
+            options (List[str]): další volby, např. ["-i", "/root/.ssh/fleet", "-p", "2222"]
+            connectTimeout (int): ConnectTimeout v sec
+        """
+        self.sshCmd = sshCmd
+        self.options = list(options or [])
+        self.connectTimeout = int(connectTimeout)
+
+    def popen(self, address: str, remoteCmd: str) -> subprocess.Popen:
+        """ spustí remoteCmd (shell řetězec) na adrese, stdin/stdout jsou roury, stderr jde do stdout """
+        cmd = [self.sshCmd, "-o", "BatchMode=yes", "-o", f"ConnectTimeout={self.connectTimeout}"] + self.options + [address, remoteCmd]
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+class c_localTransport:
+    """Spouští příkazy lokálně přes `sh -c`, adresa se ignoruje. Pro test fleet runneru bez sshd."""
+
+    def popen(self, address: str, remoteCmd: str) -> subprocess.Popen:
+        return subprocess.Popen(["sh", "-c", remoteCmd], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+class c_fleetRunner:
+    """Paralelní spuštění plánu na zařízeních z inventáře."""
+
+    def __init__(
+        self,
+        plan: c_configPlan,
+        inventory: Dict[str, str],
+        transport: Union[c_sshTransport, c_localTransport, None] = None,
+        maxWorkers: int = 8,
+        dryRun: bool = True,
+        workers: int = 1,
+        stateDir: Optional[str] = None,
+        gWorkers: int = 1,
+        remotePython: str = "python3",
+        remoteDir: str = "/var/lib/configurator",
+        shipScript: bool = True,
+        timeout: Optional[float] = None,
+        onLine: Optional[Callable[[str, str], None]] = None
+    ):
+        """
+        Parameters:
+            plan (c_configPlan): zkompilovaný plán, resource ze souborů se přenesou v plánu
+            inventory (Dict[str,str]): ID zařízení -> adresa pro transport (např. 'root@10.0.0.11')
+            transport: objekt s metodou popen(address, remoteCmd), výchozí c_sshTransport
+            maxWorkers (int): max počet současně konfigurovaných zařízení
+            dryRun (bool): předá se Configuratoru, True = jen vypíše co by udělal
+            workers (int): paralelní kroky na zařízení, viz Configurator.workers
+            stateDir (str|None): adresář stavu kroků na zařízení, viz Configurator.stateDir
+            gWorkers (int): současné +g/!g/-g operace na zařízení, viz Configurator.g_workers
+            remotePython (str): python na zařízení
+            remoteDir (str): kam se na zařízení nakopíruje configurator.py, adresář musí patřit přihlášenému
+                uživateli a nesmí být symlink, nastaví se mu práva 0700 (ne sdílený adresář jako /tmp)
+            shipScript (bool): kopírovat configurator.py (jednorázový název, po běhu se smaže),
+                False = už na zařízení je jako remoteDir/configurator.py
+            timeout (float|None): max doba na zařízení v sec, pak se proces ukončí
+            onLine (Callable[[str,str],None]|None): volá se pro každý řádek výstupu jako onLine(devID, line), z vlákna poolu
+        """
+        self.inventory = dict(inventory)
+        self.transport = transport or c_sshTransport()
+        self.maxWorkers = max(1, int(maxWorkers))
+        self.dryRun = dryRun
+        self.workers = max(1, int(workers))
+        self.stateDir = stateDir
+        self.gWorkers = max(1, int(gWorkers))
+        self.remotePython = remotePython
+        self.remoteDir = remoteDir
+        self.shipScript = shipScript
+        self.timeout = timeout
+        self.onLine = onLine
+        self._payload: bytes = json.dumps(plan.inlined().toDict(), ensure_ascii=False).encode("utf-8")
+        """plán serializovaný jednou pro všechna zařízení"""
+        self._script: Optional[bytes] = None
+
+    def _remoteScript(self, name: str = "configurator.py") -> str:
+        return f"{self.remoteDir.rstrip('/')}/{name}"
+
+    def _shipCmd(self, script: str) -> str:
+        """ zápis skriptu - adresář se ověří (vlastník, ne symlink) a zamkne, aby skript nešel podvrhnout """
+        d = shlex.quote(self.remoteDir)
+        return (f"umask 077 && mkdir -p {d} && test -O {d} && test ! -L {d} && chmod 700 {d}"
+                f" && cat > {shlex.quote(script)}")
+
+    def _remoteCmd(self, dev: str, script: Optional[str] = None) -> str:
+        """ příkaz spuštění, script = nakopírovaný skript který se po běhu smaže, None = remoteDir/configurator.py """
+        cmd = [self.remotePython, script or self._remoteScript(), "--dev", dev, "--plan", "-", "--workers", str(self.workers)]
+        if not self.dryRun:
+            cmd.append("--run")
+        if self.stateDir:
+            cmd += ["--state-dir", self.stateDir]
+        if self.gWorkers > 1:
+            cmd += ["--g-workers", str(self.gWorkers)]
+        if script is None:
+            return shlex.join(cmd)
+        return f"{shlex.join(cmd)}; rc=$?; rm -f {shlex.quote(script)}; exit $rc"
+
+    def _exec(self, dev: str, address: str, remoteCmd: str, stdin: bytes, res: c_fleetResult) -> int:
+        """ spustí příkaz, pošle stdin a průběžně zpracovává výstup """
+        p = self.transport.popen(address, remoteCmd)
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, p.kill)
+            timer.daemon = True
+            timer.start()
+        # stdin se zapisuje ve vlákně, aby velký plán nezablokoval čtení výstupu
+        def feed():
+            try:
+                p.stdin.write(stdin)
+            except (BrokenPipeError, OSError):
+                pass
+            finally:
+                try:
+                    p.stdin.close()
+                except OSError:
+                    pass
+        wr = threading.Thread(target=feed, daemon=True)
+        wr.start()
+        try:
+            for raw in p.stdout:
+                line = raw.decode("utf-8", "replace").rstrip("\n")
+                if line.startswith(RESULT_PREFIX):
+                    try:
+                        res.result = json.loads(line[len(RESULT_PREFIX):])
+                    except ValueError:
+                        pass
+                    continue
+                res.tail.append(line)
+                if len(res.tail) > 20:
+                    del res.tail[0]
+                log.info(f"[{dev}] {line}")
+                if self.onLine:
+                    try:
+                        self.onLine(dev, line)
+                    except Exception as e:
+                        log.error(f"fleet onLine: {e}")
+            rc = p.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if p.poll() is None:
+                p.kill()
+                p.wait()
+            p.stdout.close()
+        wr.join(timeout=1)
+        return rc
+
+    def runOne(self, dev: str, address: Optional[str] = None) -> c_fleetResult:
+        """ nakonfiguruje jedno zařízení """
+        address = address or self.inventory[dev]
+        res = c_fleetResult(dev=dev, address=address)
+        t0 = time.monotonic()
+        try:
+            script = None
+            if self.shipScript:
+                if self._script is None:
+                    with open(CONFIGURATOR_SRC, "rb") as f:
+                        self._script = f.read()
+                # jednorázový název - více záznamů inventáře se stejnou adresou si skript nepřepíše
+                script = self._remoteScript(f"configurator-{uuid.uuid4().hex}.py")
+                rc = self._exec(dev, address, self._shipCmd(script), self._script, res)
+                if rc != 0:
+                    res.returncode = rc
+                    res.error = f"ship configurator.py to {self.remoteDir} failed ({rc})"
+                    return res
+            rc = self._exec(dev, address, self._remoteCmd(dev, script), self._payload, res)
+            res.returncode = rc
+            res.ok = rc == 0 and bool(res.result.get("ok"))
+            if not res.ok:
+                res.error = res.result.get("error") or f"exit {rc}"
+        except Exception as e:
+            res.error = f"{type(e).__name__}: {e}"
+        finally:
+            res.duration = time.monotonic() - t0
+        log.info(f"[{dev}] {'OK' if res.ok else 'FAILED'} in {res.duration:.1f}s{'' if res.ok else ': ' + str(res.error)}")
+        return res
+
+    def run(self, devs: Optional[List[str]] = None) -> List[c_fleetResult]:
+        """ nakonfiguruje zařízení (výchozí celý inventář), výsledky ve stejném pořadí """
+        devs = list(self.inventory) if devs is None else list(devs)
+        if not devs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.maxWorkers, len(devs)), thread_name_prefix="fleet") as ex:
+            return list(ex.map(self.runOne, devs))
+
+    def rolloutEstimate(self, results: List[c_fleetResult]) -> Dict[str, float]:
+        """ odhad doby skutečného nasazení z výsledků dry run (plán z každého zařízení)
+
+        Zařízení se rozdělí do maxWorkers slotů (nejdelší první), nepočítá se režie ssh a přenosu.
+
+        Returns:
+            Dict[str,float]: devices = počet zařízení s plánem, total = součet odhadů v sec,
+                max = nejdelší zařízení, rollout = odhad doby celé flotily
+        """
+        est = sorted((r.result["plan"]["summary"]["estimate"] for r in results if r.result.get("plan")), reverse=True)
+        slots = [0.0] * min(self.maxWorkers, len(est) or 1)
+        for e in est:
+            i = slots.index(min(slots))
+            slots[i] += e
+        return {"devices": len(est), "total": round(sum(est), 3), "max": round(est[0] if est else 0.0, 3), "rollout": round(max(slots), 3)}
+
+    @staticmethod
+    def report(results: List[c_fleetResult]) -> str:
+        """ textový souhrn výsledků """
+        ok = [r for r in results if r.ok]
+        lines = [f"devices: {len(results)}, ok: {len(ok)}, failed: {len(results) - len(ok)}"]
+        for r in results:
+            x = f"{'OK' if r.ok else 'FAIL':<5} {r.dev:<24} {r.address:<24} {r.duration:6.1f}s"
+            st = r.result.get("idemStats")
+            if st:
+                x += f" run={st.get('run')} skipped={st.get('skipped')}"
+            pl = r.result.get("plan")
+            if pl:
+                sm = pl["summary"]
+                x += f" changes={sm['changes']} unknown={sm['unknown']} est={sm['estimate']:.1f}s"
+            if r.error:
+                x += f" : {r.error}"
+            lines.append(x)
+        return "\n".join(lines)
@@ -2,11 +2,13 @@ from pathlib import Path
 from dataclasses import dataclass
 from .format import bytesTx
 from .helper import runGetObj, runRet
+from .mem_stats import readMemStats
 from .input import select,select_item,confirm,inputCliSize,cliSize
 from .jbjh import JBJH
 from .c_menu import onSelReturn
 from .term import text_color, en_color
-import re
+import re, os, time, struct, fcntl
+from concurrent.futures import ThreadPoolExecutor
 
 
 @dataclass
@@ -65,17 +67,19 @@ def swapIsActive(filename: str) -> bool:
             return True
     return False
 
-def modifyFstabSwapEntry(filename: str, add: bool = True) -> None:
+def modifyFstabSwapEntry(filename: str, add: bool = True, priority: int | None = None) -> None:
     """
     Přidá nebo odstraní záznam o swap souboru v /etc/fstab.
     
     Args:
         filename: cesta k swap souboru (např. "/swapfile")
         add: pokud True, přidá záznam, pokud False, odstraní záznam
+        priority: priorita swapu (`pri=N`), None = výchozí priorita systému
     """
     fstab_path = Path("/etc/fstab")
     fstab_lines = fstab_path.read_text(encoding="utf-8").splitlines()
-    entry = f"{filename} none swap sw 0 0"
+    opts = "sw" if priority is None else f"sw,pri={int(priority)}"
+    entry = f"{filename} none swap {opts} 0 0"
 
     if add:
         if any(filename in line for line in fstab_lines):
@@ -147,25 +151,223 @@ class curMemInfo:
 def getCurMemInfo() -> curMemInfo:
     """
     Získá aktuální informace o paměti a swapu systému.
+    Čte přímo /proc/meminfo, bez spouštění externích příkazů, viz `mem_stats`.
     
     Returns:
         curMemInfo: Objekt obsahující informace o paměti a swapu.
     """
-    o,r,e = runRet("grep -E 'MemTotal|MemAvailable|SwapTotal|SwapFree' /proc/meminfo",False)
-    mem = dict()
-    for line in o.splitlines():
-        k , v = line.split(":")
-        if not (v:=JBJH.is_str(v)) or not (k:=JBJH.is_str(k)):
-            continue
-        mem[k.strip()] = bytesTx(v.strip().replace(" ",""))
-
+    st = readMemStats(cgroup=False, psi=False)
     return curMemInfo(
-        mem_total=mem.get("MemTotal", 0),
-        mem_available=mem.get("MemAvailable", 0),
-        swap_total=mem.get("SwapTotal", 0),
-        swap_free=mem.get("SwapFree", 0)
+        mem_total=bytesTx(st.mem_total),
+        mem_available=bytesTx(st.mem_available),
+        swap_total=bytesTx(st.swap_total),
+        swap_free=bytesTx(st.swap_free)
     )
 
+_FS_IOC_FIEMAP = 0xC020660B
+_FS_IOC_GETFLAGS = 0x80086601
+_FS_IOC_SETFLAGS = 0x40086602
+_FS_NOCOW_FL = 0x00800000
+_FIEMAP_FLAG_SYNC = 0x1
+_FIEMAP_EXTENT_LAST = 0x1
+_FIEMAP_BAD_FOR_SWAP = 0x2 | 0x4 | 0x8 | 0x200 | 0x400 | 0x2000
+"""UNKNOWN | DELALLOC | ENCODED | DATA_INLINE | DATA_TAIL | SHARED - extenty nepoužitelné pro swap"""
+_FIEMAP_HDR = struct.Struct("=QQIIII")
+_FIEMAP_EXT = struct.Struct("=QQQQQIIII")
+
+SWAP_WRITE_BLOCK = 16 * 1024 * 1024
+"""velikost bloku pro zápis nul při fallback alokaci"""
+
+SWAP_FS_METHOD: dict[str, str] = {
+    "ext4": "fallocate",
+    "xfs": "fallocate",
+    "btrfs": "btrfs",
+    "ext3": "write",
+    "ext2": "write",
+    "f2fs": "write",
+}
+"""podporované fs pro swap soubor a způsob alokace, ostatní fs (tmpfs, nfs, overlay, zfs, ...) nejsou podporovány"""
+
+@dataclass
+class swap_create_item:
+    """Požadavek na vytvoření jednoho swap souboru pro `swap_mng.create_swap_imgs`"""
+    file: Path
+    """absolutní cesta k swap souboru"""
+    size: int
+    """velikost v bytech, min 100MiB"""
+    priority: int | None = None
+    """priorita swapu (swapon -p), None = výchozí"""
+
+@dataclass
+class swap_create_result:
+    """Výsledek vytvoření jednoho swap souboru"""
+    file: Path
+    ok: bool = False
+    fsType: str = ""
+    method: str = ""
+    """použitá alokace: 'fallocate', 'write', 'btrfs' (nocow + fallocate)"""
+    error: str = ""
+    duration: float = 0.0
+    """doba přípravy souboru v sekundách"""
+
+def _unescapeMount(s: str) -> str:
+    """odstraní oktalové escape sekvence z /proc/self/mountinfo (např. \\040 = mezera)"""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), s)
+
+def getFsTypeForPath(path: Path) -> str:
+    """Zjistí typ souborového systému pro cestu podle /proc/self/mountinfo (nejdelší shoda mountpointu).
+
+    Args:
+        path (Path): cesta, nemusí existovat, použije se nejbližší existující rodič
+    Returns:
+        str: typ fs (ext4, xfs, btrfs, ...) nebo "" pokud nelze zjistit
+    """
+    p = Path(path)
+    while not p.exists() and p != p.parent:
+        p = p.parent
+    target = str(p.resolve())
+    best, bestType = "", ""
+    try:
+        with open("/proc/self/mountinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split(" - ", 1)
+                if len(parts) != 2:
+                    continue
+                mnt = _unescapeMount(parts[0].split()[4])
+                fsType = parts[1].split()[0]
+                if target == mnt or target.startswith(mnt.rstrip("/") + "/") or mnt == "/":
+                    if len(mnt) >= len(best):
+                        best, bestType = mnt, fsType
+    except OSError:
+        return ""
+    return bestType
+
+def fiemapCheck(fd: int, size: int) -> str | None:
+    """Ověří přes FIEMAP ioctl že soubor nemá díry a extenty jsou použitelné pro swap.
+    Pokud fs FIEMAP nepodporuje, použije se fallback přes SEEK_HOLE.
+
+    Args:
+        fd (int): otevřený file descriptor
+        size (int): očekávaná velikost souboru v bytech
+    Returns:
+        str|None: None pokud je soubor v pořádku, jinak popis problému
+    """
+    batch = 256
+    pos = 0
+    start = 0
+    while True:
+        buf = bytearray(_FIEMAP_HDR.size + batch * _FIEMAP_EXT.size)
+        _FIEMAP_HDR.pack_into(buf, 0, start, size - start, _FIEMAP_FLAG_SYNC, 0, batch, 0)
+        try:
+            fcntl.ioctl(fd, _FS_IOC_FIEMAP, buf, True)
+        except OSError:
+            # fallback, jen kontrola děr
+            try:
+                hole = os.lseek(fd, 0, os.SEEK_HOLE)
+            except OSError as e:
+                return f"FIEMAP ani SEEK_HOLE není podporován: {e}"
+            return None if hole >= size else f"soubor obsahuje díru na offsetu {hole}"
+        mapped = _FIEMAP_HDR.unpack_from(buf, 0)[3]
+        if mapped == 0:
+            break
+        last = False
+        for i in range(mapped):
+            logical, _phys, length, _r1, _r2, flags, _a, _b, _c = _FIEMAP_EXT.unpack_from(
+                buf, _FIEMAP_HDR.size + i * _FIEMAP_EXT.size
+            )
+            if logical > pos:
+                return f"soubor obsahuje díru na offsetu {pos}"
+            if flags & _FIEMAP_BAD_FOR_SWAP:
+                return f"extent na offsetu {logical} má nepoužitelné flagy 0x{flags:x}"
+            pos = max(pos, logical + length)
+            if flags & _FIEMAP_EXTENT_LAST:
+                last = True
+        if last or pos >= size:
+            break
+        start = pos
+    if pos < size:
+        return f"soubor obsahuje díru na offsetu {pos}"
+    return None
+
+def _writeZeros(fd: int, size: int) -> None:
+    """Zapíše nuly do souboru po velkých blocích a provede fsync."""
+    block = memoryview(bytes(min(SWAP_WRITE_BLOCK, size)))
+    os.lseek(fd, 0, os.SEEK_SET)
+    left = size
+    while left > 0:
+        n = os.write(fd, block[:min(left, len(block))])
+        left -= n
+    os.fsync(fd)
+
+def _setNoCow(fd: int) -> None:
+    """Nastaví na prázdný soubor atribut NOCOW (chattr +C), nutné pro swap na btrfs."""
+    flags = bytearray(struct.pack("=l", 0))
+    fcntl.ioctl(fd, _FS_IOC_GETFLAGS, flags, True)
+    val = struct.unpack("=l", flags)[0] | _FS_NOCOW_FL
+    fcntl.ioctl(fd, _FS_IOC_SETFLAGS, bytearray(struct.pack("=l", val)), True)
+
+def _prepareSwapFile(item: swap_create_item) -> swap_create_result:
+    """Vytvoří a ověří jeden swap soubor (alokace, chmod, FIEMAP, mkswap).
+    Určeno pro běh ve vlákně, každá položka pracuje jen se svým souborem.
+    """
+    t0 = time.monotonic()
+    res = swap_create_result(file=item.file)
+    res.fsType = getFsTypeForPath(item.file.parent)
+    method = SWAP_FS_METHOD.get(res.fsType)
+    if method is None:
+        res.error = f"Souborový systém '{res.fsType or '?'}' nepodporuje swap soubory."
+        return res
+
+    fd = -1
+    try:
+        fd = os.open(str(item.file), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        os.fchmod(fd, 0o600)
+        if method == "btrfs":
+            _setNoCow(fd)
+            method = "fallocate"
+            res.method = "btrfs"
+
+        err = None
+        if method == "fallocate":
+            try:
+                os.posix_fallocate(fd, 0, item.size)
+                os.fsync(fd)
+                err = fiemapCheck(fd, item.size)
+            except OSError as e:
+                err = str(e)
+            if err and res.method != "btrfs":
+                # fallocate nevytvořil použitelné extenty -> zapíšeme nuly
+                os.ftruncate(fd, 0)
+                method = "write"
+        if method == "write":
+            _writeZeros(fd, item.size)
+            err = fiemapCheck(fd, item.size)
+        if not res.method:
+            res.method = method
+        if err:
+            raise OSError(err)
+    except Exception as e:
+        res.error = f"Chyba při vytváření swap souboru {item.file}: {e}"
+        if fd >= 0:
+            os.close(fd)
+            fd = -1
+            try:
+                os.unlink(str(item.file))
+            except OSError:
+                pass
+        return res
+    finally:
+        if fd >= 0:
+            os.close(fd)
+
+    o, r, e = runRet(["mkswap", str(item.file)], False)
+    if r != 0:
+        res.error = f"Chyba při inicializaci swap souboru {item.file}: {e or o}"
+        return res
+    res.ok = True
+    res.duration = time.monotonic() - t0
+    return res
+
 class swap_mng:
     
     @staticmethod
@@ -212,7 +414,7 @@ class swap_mng:
         targetSizeB:int|None,
         minMessageWidth:int=80
     ) -> onSelReturn:
-        """Vytvoří swap soubor o min velikosti 100MiB
+        """Vytvoří swap soubor o min velikosti 100MiB, viz `create_swap_imgs`
 
         Args:
             swap (Path): cesta k swap .img souboru, full path
@@ -245,34 +447,84 @@ class swap_mng:
             return ret.errRet("Cílová velikost swap souboru musí být minimálně 100MiB.")
 
         
-        try:
-            # vytvoření sparse file
-            runRet(["sudo", "fallocate", "-l", str(targetSizeB), str(swap)], noOut=True)
-
-            # správná práva
-            runRet(["sudo", "chmod", "600", str(swap)], noOut=True)
-        except Exception as e:
-            return ret.errRet(f"Chyba při vytváření swap souboru: {e}")
+        r = swap_mng.create_swap_imgs([swap_create_item(file=swap, size=targetSizeB)])
+        if r.hasError:
+            return ret.errRet(r.err)
         
-        try:
-            # vytvořit swap strukturu
-            runRet(["sudo", "mkswap", str(swap)], noOut=True)
-        except Exception as e:
-            return ret.errRet(f"Chyba při inicializaci swap souboru: {e}")
+        return ret.okRet("Vytvoření SWAP .img souboru dokončeno.")
 
-        try:
-            # zapnout
-            runRet(["sudo", "swapon", str(swap)], noOut=True)
-        except Exception as e:
-            return ret.errRet(f"Chyba při zapínání swap souboru: {e}")
+    @staticmethod
+    def create_swap_imgs(
+        items: list[swap_create_item],
+        addToFstab: bool = True,
+        maxWorkers: int = 4
+    ) -> onSelReturn:
+        """Vytvoří a aktivuje více swap souborů najednou.
 
-        print(f"[OK] Swap aktivní: {swap}")
-        try:
-            modifyFstabSwapEntry(str(swap), add=True)
-        except Exception as e:
-            return ret.errRet(f"Chyba při úpravě /etc/fstab: {e}")
-        
-        return ret.okRet("Vytvoření SWAP .img souboru dokončeno.")
+        - ověří podporu fs (ext4, xfs, btrfs, ...) ještě před alokací
+        - alokuje soubory paralelně, `posix_fallocate` nebo zápis nul po velkých blocích,
+          na btrfs nastaví NOCOW
+        - před `mkswap` ověří přes FIEMAP že soubor nemá díry, takže chyba se neprojeví až při `swapon`
+        - zapne swapy s prioritou a přidá je do /etc/fstab
+
+        Vyžaduje root, soubory se zapisují přímo bez `sudo`.
+
+        Args:
+            items (list[swap_create_item]): seznam swap souborů k vytvoření
+            addToFstab (bool): přidat záznamy do /etc/fstab
+            maxWorkers (int): max počet souběžně připravovaných souborů
+        Returns:
+            onSelReturn: data obsahují list[swap_create_result] ve stejném pořadí jako items
+        """
+        ret = onSelReturn()
+        if os.geteuid() != 0:
+            return ret.errRet("Vytvoření swap souboru vyžaduje root oprávnění.")
+        if not isinstance(items, list) or not items:
+            return ret.errRet("Nezadány žádné swap soubory.")
+        seen = set()
+        for it in items:
+            if not isinstance(it, swap_create_item) or not isinstance(it.file, Path):
+                return ret.errRet("Neplatný parametr swap soubor.")
+            if not it.file.is_absolute():
+                return ret.errRet(f"SWAP .img soubor musí být absolutní cesta: {str(it.file)}")
+            if it.file.exists():
+                return ret.errRet(f"SWAP .img soubor již existuje: {str(it.file)}")
+            if (JBJH.is_int(it.size) or 0) < 100*1024*1024:
+                return ret.errRet(f"Cílová velikost swap souboru musí být minimálně 100MiB: {str(it.file)}")
+            if str(it.file) in seen:
+                return ret.errRet(f"SWAP .img soubor je zadán vícekrát: {str(it.file)}")
+            seen.add(str(it.file))
+
+        workers = max(1, min(int(maxWorkers), len(items)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_prepareSwapFile, items))
+        ret.data = results
+
+        errs = []
+        for it, res in zip(items, results):
+            if not res.ok:
+                errs.append(res.error)
+                continue
+            cmd = ["swapon"]
+            if it.priority is not None:
+                cmd += ["-p", str(int(it.priority))]
+            o, r, e = runRet(cmd + [str(it.file)], False)
+            if r != 0:
+                res.ok = False
+                res.error = f"Chyba při zapínání swap souboru {it.file}: {e or o}"
+                errs.append(res.error)
+                continue
+            print(f"[OK] Swap aktivní: {it.file} ({res.method}, {res.fsType}, {res.duration:.2f}s)")
+            if addToFstab:
+                try:
+                    modifyFstabSwapEntry(str(it.file), add=True, priority=it.priority)
+                except Exception as e:
+                    res.error = f"Chyba při úpravě /etc/fstab: {e}"
+                    errs.append(res.error)
+
+        if errs:
+            return ret.errRet("\n".join(errs))
+        return ret.okRet(f"Vytvoření SWAP .img souborů dokončeno ({len(results)}).")
 
     @staticmethod
     def modifySizeSwapFile(
@@ -5,7 +5,7 @@ import re
 from typing import List, Optional, Union
 from .format import bytesTx
 from pathlib import Path
-from .helper import runRet,run
+from .helper import runRet,run,subprocessRun
 
 
 class fsInfo_ret:
@@ -536,7 +536,7 @@ def mountImageAsLoopDevice(
     print(f"Připojování image souboru {str(imagePath)} jako loop device...")
     
     # Zkusit zjistit, zda IMG obsahuje GPT nebo MBR
-    out = subprocess.run(
+    out = subprocessRun(
         ["file", "-b", str(imagePath)],
         capture_output=True,
         text=True
@@ -547,7 +547,7 @@ def mountImageAsLoopDevice(
     # Připojit jako loop device
     if is_disk:
         cmd = ["losetup", "--find", "--show", "-P", str(imagePath)]
-        out = subprocess.run(
+        out = subprocessRun(
             cmd,
             capture_output=True,
             text=True
@@ -566,7 +566,7 @@ def mountImageAsLoopDevice(
         # mount přímo jako partition
         print(f"Detekováno jako partition image, připojuji přímo na zadaný mountpoint {str(mountpoint)}.")
         cmd = ["sudo", "mount", "-o", "loop", str(imagePath), str(mountpoint)]
-        out = subprocess.run(
+        out = subprocessRun(
             cmd,
             capture_output=True,
             text=True
@@ -595,7 +595,7 @@ def getLoopImgInfo() -> dict[str,Path]:
     """ Vrátí dict s informacemi o připojených loop image souborech
     dict of Path kde key = loopDevice
     """
-    ls=subprocess.run(
+    ls=subprocessRun(
         ["losetup", "--json", "--list"],
         capture_output=True,
         text=True
@@ -1,13 +1,37 @@
 import subprocess
 import os
+import time
 import getpass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Optional,Callable
-from libs.JBLibs.helper import getLogger
+from libs.JBLibs.helper import getLogger, subprocessRun
 import re
 from pathlib import Path
 
 log = getLogger('git_updater')
 
+@dataclass
+class git_check_result:
+    """Výsledek kontroly jednoho repozitáře, viz git.checkMany"""
+    path: str
+    user: Optional[str] = None
+    hasUpdate: bool = False
+    """True pokud jsou nové commity nebo submoduly vyžadují update"""
+    upstream: Optional[str] = None
+    """upstream ref vůči kterému se kontrolovalo, např. 'origin/main'"""
+    behind: int = 0
+    """počet commitů HEAD..FETCH_HEAD"""
+    submodules: list = field(default_factory=list)
+    """seznam (requires_update, submodule_name)"""
+    error: Optional[str] = None
+    """None pokud kontrola proběhla, jinak popis chyby"""
+    duration: float = 0.0
+    """doba kontroly v sec"""
+    fetched: bool = False
+    """True pokud se provedl git fetch, False pokud stačilo porovnání přes ls-remote"""
+
 class git:
     """Třída pro správu git repozitářů, kontrolu a aktualizaci.
     - Pokud chceme jen zkontrolvat update tak voláme git.check(path,user)
@@ -35,7 +59,8 @@ class git:
             credDirRoot:str|None="/opt/kiosk/",
             credSubDir:str="creds",
             credFilename:str=".g_c",
-            overrideDirUser:str=None
+            overrideDirUser:str=None,
+            remoteRefTTL:float=30.0
         ):
         """Inicializace třídy git pro správu git repozitářů.
         Arguments:
@@ -43,6 +68,7 @@ class git:
                         pokud je None, tak se nebudou hledat
             credSubDir (str): podadresář uvnitř root adresáře kde jsou uložené git credentials pro různé uživatele
             credFilename (str): název souboru s git credentials uvnitř uživatelského adresáře
+            remoteRefTTL (float): jak dlouho v sec platí výsledek `git ls-remote` pro repozitář, 0 = necachovat
         Raises:
             FileNotFoundError: pokud neexistuje adresář s credentials
         """
@@ -62,6 +88,39 @@ class git:
         self.overrideDirUser:str=overrideDirUser
         """Pokud je nastaveno, použije se tento uživatel pro hledání credentials místo uživatele systému - pokud není vstup 'root'. Tzn jakýkoliv
         jiný user než 'root' bude mít stejný adresář pro credentials s tímto názvem"""
+        
+        self._curUser:str=getpass.getuser()
+        self._credCache:dict[str,str]={}
+        """cache cesty k cred souboru podle credUser, sdílí se mezi vlákny checkMany"""
+        self._cacheLock=threading.Lock()
+
+        self.remoteRefTTL:float=float(remoteRefTTL)
+        """platnost cache výsledků ls-remote v sec"""
+        self._remoteRefs:dict[tuple[str,str],tuple[float,str]]={}
+        """cache (path, upstream) -> (monotonic čas, sha vzdálené větve)"""
+
+    def _credPath(self, credUser:str) -> str:
+        """Vrátí cestu k cred souboru uživatele, výsledek se cachuje pro další volání.
+        Raises:
+            FileNotFoundError: pokud neexistuje adresář nebo soubor s credentials
+        """
+        with self._cacheLock:
+            p = self._credCache.get(credUser)
+            if p is not None:
+                return p
+        spc = self._spc
+        home = os.path.join(self.credDir, credUser)
+        if not os.path.isdir(home):
+            raise FileNotFoundError(f"Credential directory '{home}' not found for user '{credUser}'.")
+        if self.dbg: log.info(spc(3) + f"-* HOME        : '{home}'")
+
+        cred_path = os.path.join(home, ".g_c")
+        if not os.path.isfile(cred_path):
+            raise FileNotFoundError(f"Credential file '{cred_path}' not found for user '{credUser}'.")
+        if self.dbg: log.info(spc(3) + f"-* CRED FILE   : '{cred_path}'")
+        with self._cacheLock:
+            self._credCache[credUser] = cred_path
+        return cred_path
 
     def _get_git_url_from_netrc(self,file:str) -> str:
         """
@@ -98,7 +157,7 @@ class git:
         log.info(spc(2) + f"> RUN CMD     : '{' '.join(cmd)}'")
         proc = None
         try:
-            u = getpass.getuser()
+            u = self._curUser
             if user is None:
                 user = u
             log.info(spc(3) + f"-* USER        : '{user}' (aktuální: '{u}')")
@@ -108,19 +167,9 @@ class git:
             log.info(spc(3) + f"-* CRED-USER: {credUser}")
 
             if not self.credDir is None:
-                home = os.path.join(self.credDir, credUser)
-                if not os.path.isdir(home):
-                    raise FileNotFoundError(f"Credential directory '{home}' not found for user '{credUser}'.")
-                if self.dbg: log.info(spc(3) + f"-* HOME        : '{home}'")
-
-                cred_path = os.path.join(home, ".g_c")
-                if not os.path.exists(cred_path):
-                    raise FileNotFoundError(f"Credential file '{cred_path}' not found for user '{user}'.")
-                if self.dbg: log.info(spc(3) + f"-* CRED FILE   : '{cred_path}'")
-
-                if os.path.exists(cred_path) and os.path.isfile(cred_path):
-                    # Pozor: Git očekává jen jednu volbu po -c
-                    cmd = cmd[:1] + ["-c", f"credential.helper=store --file={cred_path}"] + cmd[1:]
+                cred_path = self._credPath(credUser)
+                # Pozor: Git očekává jen jednu volbu po -c
+                cmd = cmd[:1] + ["-c", f"credential.helper=store --file={cred_path}"] + cmd[1:]
             else:
                 log.info(spc(3) + f"-* CRED file not used")
                     
@@ -131,7 +180,7 @@ class git:
                 cmd = ["sudo", "-u", user] + cmd
             if self.dbg: log.info(spc(3) + f"-*** CMD         : '{' '.join(cmd)}'")
 
-            proc = subprocess.run(
+            proc = subprocessRun(
                 cmd,
                 cwd=cwd,
                 shell=False,
@@ -172,7 +221,8 @@ class git:
             
             
         """
-        code, out, err = self._run(["git", "submodule"], path, user)
+        # jedno volání pro všechny úrovně, '+' = checkoutnutý commit neodpovídá indexu
+        code, out, err = self._run(["git", "submodule", "status", "--recursive"], path, user)
         submodules = []
         rq_update=False
         if code == 0 and out:
@@ -208,15 +258,82 @@ class git:
             return out
         return "main"
 
-    def check(self, path: str, user: Optional[str] = None) -> bool:
+    def _remoteSha(self, path: str, user: Optional[str], remote: str, branch: str) -> Optional[str]:
+        """Vrátí sha větve na remote přes `git ls-remote` (bez přenosu objektů).
+        Výsledek se cachuje per repozitář po dobu remoteRefTTL.
+        Returns:
+            str | None: sha nebo None pokud se nepodařilo zjistit
+        """
+        key = (os.path.realpath(path), f"{remote}/{branch}")
+        now = time.monotonic()
+        with self._cacheLock:
+            c = self._remoteRefs.get(key)
+        if c is not None and now - c[0] < self.remoteRefTTL:
+            return c[1]
+        code, out, err = self._run(["git", "ls-remote", remote, f"refs/heads/{branch}"], path, user)
+        if code != 0 or not out:
+            log.warning(f"  ! {path}: ls-remote {remote} {branch} selhal: {err}")
+            return None
+        sha = out.split()[0]
+        if self.remoteRefTTL > 0:
+            with self._cacheLock:
+                self._remoteRefs[key] = (now, sha)
+        return sha
+
+    def _localSha(self, path: str, user: Optional[str], ref: str) -> Optional[str]:
+        """Vrátí sha lokálního refu nebo None."""
+        code, out, err = self._run(["git", "rev-parse", "--verify", "-q", ref], path, user)
+        if code == 0 and out:
+            return out
+        return None
+
+    def _countBehind(self, path: str, user: Optional[str], ref: str) -> tuple[Optional[int], str]:
+        """Vrátí (počet commitů HEAD..ref, chyba)."""
+        code, out, err = self._run(["git", "rev-list", f"HEAD..{ref}", "--count"], path, user)
+        if code == 0 and out.isdigit():
+            return int(out), ""
+        return None, err
+
+    def invalidateRemoteRefs(self, path: Optional[str] = None) -> None:
+        """Zneplatní cache ls-remote pro repozitář, None = všechny."""
+        with self._cacheLock:
+            if path is None:
+                self._remoteRefs.clear()
+            else:
+                rp = os.path.realpath(path)
+                for k in [k for k in self._remoteRefs if k[0] == rp]:
+                    del self._remoteRefs[k]
+
+    def check(self, path: str, user: Optional[str] = None, fast: bool = True) -> bool:
         """Vrátí True pokud existují nové commity k fetchnutí.
         Pokud cesta neexistuje, není git repozitář nebo nemá remote, vrací False.
         Arguments:
             path (str): cesta k git repozitáři
             user (str | None): uživatel systému pod kterým spustit příkaz, pokud None tak se veme aktuální uživatel
+            fast (bool): nejdřív porovnat `git ls-remote` s lokálním tracking refem, viz checkDetail
         Returns:
             bool: True pokud jsou nové commity, jinak False
         """
+        return self.checkDetail(path, user, fast).hasUpdate
+
+    def checkDetail(self, path: str, user: Optional[str] = None, fast: bool = True) -> git_check_result:
+        """Jako check() ale vrací podrobný výsledek.
+
+        Při fast=True se sha upstream větve zjistí přes `git ls-remote` (cachuje se po dobu
+        remoteRefTTL) a porovná s lokálním tracking refem `refs/remotes/<remote>/<branch>`.
+        Pokud se shodují, fetch se neprovádí a rozdíl se počítá vůči tracking refu.
+        Jinak (nebo pokud ls-remote selže) se provede fetch jako dřív.
+        Arguments:
+            path (str): cesta k git repozitáři
+            user (str | None): uživatel systému pod kterým spustit příkaz, pokud None tak se veme aktuální uživatel
+            fast (bool): použít porovnání přes ls-remote
+        Returns:
+            git_check_result: výsledek kontroly, při chybě fetch/rev-list je vyplněn error
+        Raises:
+            FileNotFoundError: pokud cesta neexistuje nebo není git repozitář
+        """
+        t0 = time.monotonic()
+        res = git_check_result(path=path, user=user)
         if not os.path.isdir(path):
             raise FileNotFoundError(f"Cesta {path} neexistuje nebo není adresář.")
 
@@ -236,6 +353,7 @@ class git:
         if not upstream:
             branch = self._get_branch(path, user)
             upstream = f"origin/{branch}"
+        res.upstream = upstream
 
         # Fetch konkrétní upstream remote (odděl remote a větev)
         if "/" in upstream:
@@ -245,30 +363,143 @@ class git:
             remote, remote_branch = "origin", "main"
 
         log.info(f"  - {path}: kontrola vůči {upstream} ...")
-        fcode, _, ferr = self._run(["git", "fetch", remote, remote_branch], path, user)
-        if fcode != 0:
-            log.error(f"  ! fetch selhal: {ferr}")
-            return False
+        cmpRef = "FETCH_HEAD"
+        if fast:
+            rsha = self._remoteSha(path, user, remote, remote_branch)
+            if rsha is not None and rsha == self._localSha(path, user, f"refs/remotes/{remote}/{remote_branch}"):
+                log.info(f"  = {path}: {upstream} beze změny na remote ({rsha[:12]}), fetch se přeskakuje.")
+                cmpRef = f"refs/remotes/{remote}/{remote_branch}"
+
+        if cmpRef == "FETCH_HEAD":
+            fcode, _, ferr = self._run(["git", "fetch", remote, remote_branch], path, user)
+            if fcode != 0:
+                log.error(f"  ! fetch selhal: {ferr}")
+                res.error = f"fetch: {ferr}"
+                res.duration = time.monotonic() - t0
+                return res
+            res.fetched = True
 
         # Zkontroluj submoduly
         log.info(f"  -  -- {path}: kontrola submodulů ... --")
         subm=self._getSubmodules(path, user)
+        res.submodules = subm[0]
         log.info(f"  - ****** {path}: submoduly: {subm[0]}  ******")
         if subm[1]:
             log.info(f"  - {path}: některé submoduly vyžadují update.")
-            return True
+            res.hasUpdate = True
+            res.duration = time.monotonic() - t0
+            return res
 
         # Porovnej HEAD s čerstvě fetchnutým FETCH_HEAD.
         # Pozn.: při `git fetch <remote> <branch>` nemusí být vždy spolehlivě
         # aktualizován lokální remote-tracking ref (`origin/<branch>`),
         # takže porovnání proti upstreamu může vracet false-negative.
-        code, out, err = self._run(["git", "rev-list", "HEAD..FETCH_HEAD", "--count"], path, user)
-        if code == 0 and out.isdigit():
-            log.info(f"  = rozdíl vůči FETCH_HEAD ({upstream}) je {out} commitů.")
-            return int(out) > 0
+        behind, err = self._countBehind(path, user, cmpRef)
+        if behind is not None:
+            log.info(f"  = rozdíl vůči {cmpRef} ({upstream}) je {behind} commitů.")
+            res.behind = behind
+            res.hasUpdate = behind > 0
         else:
-            log.error(f"  ! {path}: selhalo zjištění rozdílu vůči FETCH_HEAD ({upstream}). {err}")
-            return False
+            log.error(f"  ! {path}: selhalo zjištění rozdílu vůči {cmpRef} ({upstream}). {err}")
+            res.error = f"rev-list: {err}"
+        res.duration = time.monotonic() - t0
+        return res
+
+    @staticmethod
+    def _items(paths: list, user: Optional[str]) -> list[tuple[str, Optional[str]]]:
+        """Převede vstup checkMany/updateMany na seznam (path, user)."""
+        r = []
+        for p in paths:
+            if isinstance(p, (tuple, list)):
+                r.append((str(p[0]), p[1] if len(p) > 1 else user))
+            else:
+                r.append((str(p), user))
+        return r
+
+    def checkMany(
+            self,
+            paths: list,
+            user: Optional[str] = None,
+            maxWorkers: int = 8
+        ) -> list[git_check_result]:
+        """Zkontroluje více repozitářů paralelně.
+        Každý repozitář běží ve vlastním vlákně (git je externí proces, GIL nevadí),
+        počet současně běžících kontrol je omezen maxWorkers. Cesta ke cred souboru
+        se pro každého uživatele zjistí jen jednou.
+        Arguments:
+            paths (list): seznam cest nebo dvojic (path, user)
+            user (str | None): výchozí uživatel pro cesty bez uživatele
+            maxWorkers (int): max počet současně kontrolovaných repozitářů
+        Returns:
+            list[git_check_result]: výsledky ve stejném pořadí jako paths,
+                chyba (např. neexistující cesta) je v položce error
+        Example:
+            >>> g = git()
+            >>> for r in g.checkMany(["/opt/app1", ("/opt/app2", "kiosk")]):
+            ...     print(r.path, r.hasUpdate, r.error)
+        """
+        items = self._items(paths, user)
+
+        def one(it: tuple[str, Optional[str]]) -> git_check_result:
+            t0 = time.monotonic()
+            try:
+                return self.checkDetail(it[0], it[1])
+            except Exception as e:
+                return git_check_result(path=it[0], user=it[1], error=str(e), duration=time.monotonic() - t0)
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(int(maxWorkers), len(items)))) as ex:
+            return list(ex.map(one, items))
+
+    def updateMany(
+            self,
+            paths: list,
+            user: Optional[str] = None,
+            maxWorkers: int = 4,
+            onFinish:Optional[Callable[[str,str],None]]=None
+        ) -> dict[str, Optional[str]]:
+        """Provede update() více repozitářů paralelně.
+        Arguments:
+            paths (list): seznam cest nebo dvojic (path, user)
+            user (str | None): výchozí uživatel pro cesty bez uživatele
+            maxWorkers (int): max počet současně aktualizovaných repozitářů
+            onFinish (Callable[[str,str],None] | None): viz update(), volá se z vlákna poolu
+        Returns:
+            dict[str, str | None]: cesta -> None pokud OK, jinak chybový text
+        """
+        items = self._items(paths, user)
+
+        def one(it: tuple[str, Optional[str]]) -> Optional[str]:
+            try:
+                return self.update(it[0], it[1], onFinish)
+            except Exception as e:
+                return str(e)
+
+        if not items:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(int(maxWorkers), len(items)))) as ex:
+            return dict(zip([p for p, _ in items], ex.map(one, items)))
+
+    @staticmethod
+    def report(results: list[git_check_result]) -> str:
+        """Textový přehled výsledků checkMany."""
+        lines = []
+        upd = [r for r in results if r.hasUpdate]
+        err = [r for r in results if r.error]
+        lines.append(f"repos: {len(results)}, updates: {len(upd)}, errors: {len(err)}")
+        for r in results:
+            st = "ERROR" if r.error else ("UPDATE" if r.hasUpdate else "ok")
+            x = f"{st:<6} {r.path} ({r.upstream or '-'}) {r.duration:.1f}s{'' if r.fetched else ' (ls-remote)'}"
+            if r.behind:
+                x += f" behind={r.behind}"
+            sub = [n for u, n in r.submodules if u]
+            if sub:
+                x += f" submodules={','.join(sub)}"
+            if r.error:
+                x += f" : {r.error}"
+            lines.append(x)
+        return "\n".join(lines)
 
     def update(
             self,
@@ -298,6 +529,7 @@ class git:
         log.info(f" ******* Aktualizuji {path} ({remote}/{remote_branch}) ... *******")
 
         code, out, err = self._run(["git", "pull", remote, remote_branch], path, user)
+        self.invalidateRemoteRefs(path)
         if code == 0:
             log.info(f"{path}: aktualizace úspěšná.")
             
@@ -1,6 +1,7 @@
 # cspell:ignore levelname,HLPR,STPENA,STPDIS,geteuid
 from .lng.default import *
-import os, platform,sys,logging,subprocess,inspect,hashlib,pwd,tempfile,time
+import os, platform,sys,logging,subprocess,inspect,hashlib,pwd,tempfile,time,threading,json,atexit
+from collections import deque
 from importlib import util
 from typing import Union,Callable,Union,Tuple
 import configparser,re,psutil
@@ -98,7 +99,7 @@ def initLogging(
             os.makedirs(logDir, exist_ok=True)
             # nastavíme pro všechny
             os.chmod(logDir, 0o755)
-            print(f"Created log dir '{cfg.LOG_DIR}'.", file=sys.stderr)
+            print(f"Created log dir '{logDir}'.", file=sys.stderr)
         except Exception as e:
             print(f"Could not create log dir '{logDir}': {e}", file=sys.stderr)
             exit(1)
@@ -896,16 +897,22 @@ def __runGet(
         SystemError: Jen pokud příkaz selže, na errorCode se nebere ohled.
     """
     o,r,e = runRet(cmd, False, False, input_bytes=input_bytes)
-    x=o
+    x = __fullOutput(cmd, o, r, e, raiseOnError)
+    if returnAsTuple:
+        return (r,o,e,x)
+    return x
+
+def __fullOutput(cmd: Union[str, List[str]], o: str, r: int, e: str, raiseOnError: bool) -> str:
+    """Sestaví fulloutput pro __runGet/runGetObjAsync, viz RunGetObjResult.fulloutput
+    Raises:
+        SystemError: pokud raiseOnError a r != 0
+    """
     if r != 0:
         x = f"ERROR: {r}\n{e}\n{o}"
     else:
         x = f"OK:\n{o}\n" + (e if e else "")
     if raiseOnError and r != 0:
         raise SystemError(f"Command failed: {cmd}\nReturn code: {r}\nOut: {o}, Error output: {e}")
-        
-    if returnAsTuple:
-        return (r,o,e,x)
     return x
     
 def runGetStr(
@@ -987,6 +994,417 @@ def runGetObj(
         fulloutput=x[3]
     )
 
+RUN_CACHE_WHITELIST: dict[str, Union[Tuple[str, ...], None]] = {
+    "systemctl": ("show", "list-units", "list-unit-files", "is-active", "is-enabled", "is-failed", "status", "cat"),
+    "lsblk": None,
+    "blkid": None,
+    "findmnt": None,
+    "swapon": ("--show", "-s", "--summary"),
+    "losetup": ("--list", "-l", "--json", "-J"),
+    "id": None,
+    "getent": None,
+    "groups": None,
+    "hostnamectl": ("status",),
+    "df": None,
+    "uname": None,
+}
+"""Výchozí whitelist read-only příkazů pro cache v `runRet`.
+Klíč je název programu, hodnota je tuple povolených prvních argumentů (porovnává se `startswith`),
+None = libovolné argumenty, prázdné argumenty jsou povoleny vždy.
+"""
+
+class c_runStat:
+    """Statistika jednoho příkazu spouštěného přes runRet, viz `runStatsGet`"""
+    __slots__ = ("cmd", "count", "hits", "wall", "maxWall")
+
+    def __init__(self, cmd: str):
+        self.cmd: str = cmd
+        """zkrácený příkaz: program + první argument"""
+        self.count: int = 0
+        """počet skutečně spuštěných procesů"""
+        self.hits: int = 0
+        """počet volání obsloužených z cache"""
+        self.wall: float = 0.0
+        """celkový čas běhu procesů v sekundách"""
+        self.maxWall: float = 0.0
+        """nejdelší jeden běh v sekundách"""
+
+    def __repr__(self):
+        return f"<c_runStat {self.cmd!r} n={self.count} hits={self.hits} wall={self.wall:.3f}s>"
+
+_runLock = threading.Lock()
+_runCacheTtl: float = 0.0
+"""0 = cache vypnuta"""
+_runCacheWhitelist: dict[str, Union[Tuple[str, ...], None]] = RUN_CACHE_WHITELIST
+_runCacheMax: int = 512
+_runCache: dict[tuple, Tuple[float, Tuple[str, int, str]]] = {}
+_runStatsOn: bool = False
+_runStats: dict[str, c_runStat] = {}
+
+def runCacheEnable(
+    ttl: float = 1.0,
+    whitelist: dict[str, Union[Tuple[str, ...], None]] | None = None,
+    maxEntries: int = 512
+) -> None:
+    """Zapne TTL cache výsledků pro read-only příkazy spouštěné přes runRet/runGetObj/runGetStr.
+
+    Cachuje se jen příkaz zadaný jako list (ne shell string), bez `input_bytes` a s `noOut=False`,
+    jehož program a první argument odpovídá whitelistu. Klíčem je celý argv.
+    Spuštění jakéhokoli necachovatelného příkazu (např. `systemctl start`, `useradd`, `mkfs`) smaže celou
+    cache - změna jedním programem se projeví i ve výstupu jiných (`useradd` -> `id`, `mount` -> `lsblk`).
+
+    Args:
+        ttl (float): doba platnosti záznamu v sekundách
+        whitelist (dict|None): vlastní whitelist, None = `RUN_CACHE_WHITELIST`
+        maxEntries (int): max počet záznamů, nejstarší se zahazují
+    """
+    global _runCacheTtl, _runCacheWhitelist, _runCacheMax
+    with _runLock:
+        _runCacheTtl = max(0.0, float(ttl))
+        _runCacheWhitelist = RUN_CACHE_WHITELIST if whitelist is None else whitelist
+        _runCacheMax = max(1, int(maxEntries))
+        _runCache.clear()
+
+def runCacheDisable() -> None:
+    """Vypne cache příkazů a smaže ji."""
+    global _runCacheTtl
+    with _runLock:
+        _runCacheTtl = 0.0
+        _runCache.clear()
+
+def runCacheClear(program: str | None = None) -> None:
+    """Smaže cache příkazů.
+
+    Args:
+        program (str|None): smaže jen záznamy daného programu, None = vše
+    """
+    with _runLock:
+        _runCacheInvalidate(program)
+
+def _runCacheInvalidate(program: str | None) -> None:
+    """smaže záznamy programu, volat pod _runLock"""
+    if program is None:
+        _runCache.clear()
+        return
+    for k in [k for k in _runCache if k[0] == program]:
+        del _runCache[k]
+
+def _argvStr(cmd: list) -> List[str]:
+    """argv jako seznam řetězců, subprocess přijímá i Path a bytes"""
+    r = []
+    for x in cmd:
+        x = os.fspath(x) if isinstance(x, os.PathLike) else x
+        r.append(os.fsdecode(x) if isinstance(x, bytes) else str(x))
+    return r
+
+def _runCacheKey(cmd: Union[str, List[str]]) -> Union[tuple, None]:
+    """Vrátí klíč cache pro argv nebo None pokud příkaz není cachovatelný"""
+    if not isinstance(cmd, list) or not cmd:
+        return None
+    cmd = _argvStr(cmd)
+    prg = os.path.basename(cmd[0])
+    if prg not in _runCacheWhitelist:
+        return None
+    allowed = _runCacheWhitelist[prg]
+    if allowed is not None and len(cmd) > 1 and not cmd[1].startswith(allowed):
+        return None
+    return (prg,) + tuple(cmd[1:])
+
+def _runStatName(cmd: Union[str, List[str]]) -> str:
+    """zkrácený název příkazu pro statistiky: program + první argument"""
+    parts = cmd.split(None, 2)[:2] if isinstance(cmd, str) else _argvStr(cmd[:2])
+    if not parts:
+        return ""
+    return " ".join([os.path.basename(parts[0])] + list(parts[1:]))
+
+def _runStatAdd(cmd: Union[str, List[str]], wall: float, hit: bool) -> None:
+    """přičte jeden běh do statistik, volat pod _runLock"""
+    name = _runStatName(cmd)
+    st = _runStats.get(name)
+    if st is None:
+        st = _runStats[name] = c_runStat(name)
+    if hit:
+        st.hits += 1
+        return
+    st.count += 1
+    st.wall += wall
+    if wall > st.maxWall:
+        st.maxWall = wall
+
+def runStatsEnable(enable: bool = True) -> None:
+    """Zapne/vypne měření počtu a času procesů spouštěných přes runRet."""
+    global _runStatsOn
+    _runStatsOn = bool(enable)
+
+def runStatsReset() -> None:
+    """Vynuluje statistiky příkazů."""
+    with _runLock:
+        _runStats.clear()
+
+def runStatsGet() -> List[c_runStat]:
+    """Vrátí statistiky příkazů seřazené podle celkového času sestupně."""
+    with _runLock:
+        return sorted(_runStats.values(), key=lambda x: x.wall, reverse=True)
+
+def runStatsSummary(top: int = 20) -> str:
+    """Vrátí textový přehled nejdražších příkazů.
+
+    Args:
+        top (int): max počet řádků
+    Returns:
+        str: tabulka `count hits wall max cmd` + součtový řádek
+    """
+    stats = runStatsGet()
+    cnt = sum(x.count for x in stats)
+    hits = sum(x.hits for x in stats)
+    wall = sum(x.wall for x in stats)
+    r = [f"{'COUNT':>7} {'HITS':>7} {'WALL[s]':>9} {'MAX[ms]':>9}  CMD"]
+    for x in stats[:top]:
+        r.append(f"{x.count:>7} {x.hits:>7} {x.wall:>9.3f} {x.maxWall*1000:>9.1f}  {x.cmd}")
+    r.append(f"{cnt:>7} {hits:>7} {wall:>9.3f} {'':>9}  TOTAL ({len(stats)} cmds)")
+    return "\n".join(r)
+
+class c_profRecord:
+    """Záznam jednoho spuštění externího příkazu, viz `profEnable`"""
+    __slots__ = ("argv", "start", "wall", "rc", "outBytes", "source", "cached", "tid")
+
+    def __init__(self, argv: Union[str, Tuple[str, ...]], start: float, wall: float, rc: int | None,
+                 outBytes: int, source: str, cached: bool, tid: int):
+        self.argv = argv
+        """argv jako tuple, nebo string u shell příkazů"""
+        self.start = start
+        """time.time() začátku"""
+        self.wall = wall
+        """doba běhu v sekundách"""
+        self.rc = rc
+        """návratový kód, None při výjimce (timeout, nenalezený program)"""
+        self.outBytes = outBytes
+        """velikost stdout+stderr (znaky), 0 pokud nebyl zachytáván"""
+        self.source = source
+        """volající 'modul:funkce' mimo helper"""
+        self.cached = cached
+        """výsledek z cache runRet"""
+        self.tid = tid
+
+    def __repr__(self):
+        return f"<c_profRecord {self.source} {self.argv!r} rc={self.rc} {self.wall*1000:.1f}ms>"
+
+_profRing: deque | None = None
+"""kruhový buffer záznamů, None = profilování vypnuto"""
+_profAtExit: dict[str, str | None] = {"chrome": None, "folded": None, "summary": None}
+_profAtExitReg: bool = False
+
+def _profCaller() -> str:
+    """najde prvního volajícího mimo tento modul"""
+    f = sys._getframe(2)
+    while f is not None and f.f_globals.get("__name__") == __name__:
+        f = f.f_back
+    if f is None:
+        return "?"
+    return f"{f.f_globals.get('__name__', '?')}:{f.f_code.co_name}"
+
+def _profAdd(cmd: Union[str, List[str]], start: float, wall: float, rc: int | None, outBytes: int, cached: bool) -> None:
+    ring = _profRing
+    if ring is None:
+        return
+    argv = cmd if isinstance(cmd, str) else tuple(str(x) for x in cmd)
+    ring.append(c_profRecord(argv, start, wall, rc, outBytes, _profCaller(), cached, threading.get_ident()))
+
+def profEnable(
+    ringSize: int = 4096,
+    chromeTraceAtExit: str | None = None,
+    foldedAtExit: str | None = None,
+    summaryAtExit: str | None = None
+) -> None:
+    """Zapne zaznamenávání externích příkazů (runRet, runRetAsync, runGetObj, runGetStr, subprocessRun)
+    do kruhového bufferu v paměti: argv, čas, doba běhu, návratový kód, velikost výstupu a volající.
+
+    Args:
+        ringSize (int): max počet uchovaných záznamů, nejstarší se zahazují
+        chromeTraceAtExit (str|None): cesta kam se při ukončení programu uloží Chrome trace JSON
+            (načíst v chrome://tracing nebo https://ui.perfetto.dev)
+        foldedAtExit (str|None): cesta pro 'folded stacks' formát (flamegraph.pl, speedscope)
+        summaryAtExit (str|None): cesta pro textový souhrn, '-' = stderr
+    """
+    global _profRing, _profAtExitReg
+    old = list(_profRing) if _profRing is not None else []
+    _profRing = deque(old, maxlen=max(1, int(ringSize)))
+    _profAtExit["chrome"] = chromeTraceAtExit
+    _profAtExit["folded"] = foldedAtExit
+    _profAtExit["summary"] = summaryAtExit
+    if not _profAtExitReg and (chromeTraceAtExit or foldedAtExit or summaryAtExit):
+        atexit.register(_profDumpAtExit)
+        _profAtExitReg = True
+
+def profDisable() -> None:
+    """Vypne profilování a zahodí záznamy."""
+    global _profRing
+    _profRing = None
+
+def profRecords() -> List[c_profRecord]:
+    """Vrátí kopii aktuálních záznamů (nejstarší první)."""
+    ring = _profRing
+    return list(ring) if ring is not None else []
+
+def _profKey(r: c_profRecord) -> Tuple[str, str]:
+    """(volající, 'program podpříkaz') pro agregaci, přeskočí sudo a přepínače"""
+    argv = r.argv.split() if isinstance(r.argv, str) else list(r.argv)
+    if argv and os.path.basename(argv[0]) == "sudo":
+        i = 1
+        while i < len(argv) and argv[i].startswith("-"):
+            i += 2 if argv[i] in ("-u", "-g") else 1
+        argv = argv[i:]
+    if not argv:
+        return r.source, "?"
+    sub = ""
+    i = 1
+    while i < len(argv):
+        if argv[i] in ("-c", "-C"):
+            i += 2
+            continue
+        if not argv[i].startswith("-"):
+            sub = argv[i]
+            break
+        i += 1
+    return r.source, (os.path.basename(argv[0]) + (" " + sub if sub else ""))
+
+def profFolded() -> str:
+    """Vrátí záznamy ve formátu 'folded stacks' (`zdroj;modul:funkce;program podpříkaz mikrosekundy`),
+    vstup pro flamegraph.pl nebo speedscope."""
+    agg: dict[str, int] = {}
+    for r in profRecords():
+        src, prg = _profKey(r)
+        mod = src.split(":", 1)[0]
+        k = f"{mod};{src};{prg}".replace(" ", "_")
+        agg[k] = agg.get(k, 0) + int(r.wall * 1_000_000)
+    return "\n".join(f"{k} {v}" for k, v in sorted(agg.items()))
+
+def profSummary(top: int = 30) -> str:
+    """Textový souhrn: čas v externích příkazech vs celkový čas záznamu, nejdražší volající a příkazy.
+
+    Args:
+        top (int): max počet řádků tabulky
+    """
+    recs = profRecords()
+    if not recs:
+        return "no subprocess records"
+    agg: dict[Tuple[str, str], List[float]] = {}
+    for r in recs:
+        a = agg.setdefault(_profKey(r), [0, 0, 0.0, 0])
+        a[0] += 1
+        a[1] += 1 if r.cached else 0
+        a[2] += r.wall
+        a[3] += r.outBytes
+    span = max(r.start + r.wall for r in recs) - min(r.start for r in recs)
+    total = sum(r.wall for r in recs)
+    lines = [
+        f"subprocess records: {len(recs)}, time in subprocesses: {total:.3f}s, span: {span:.3f}s",
+        f"{'COUNT':>6} {'CACHED':>6} {'WALL[s]':>9} {'OUT[B]':>10}  SOURCE -> CMD",
+    ]
+    for (src, prg), (n, c, w, o) in sorted(agg.items(), key=lambda x: x[1][2], reverse=True)[:top]:
+        lines.append(f"{n:>6} {c:>6} {w:>9.3f} {o:>10}  {src} -> {prg}")
+    return "\n".join(lines)
+
+def profChromeTrace() -> dict:
+    """Vrátí záznamy jako Chrome trace (JSON objekt s `traceEvents`, události typu 'X')."""
+    pid = os.getpid()
+    ev = []
+    for r in profRecords():
+        src, prg = _profKey(r)
+        ev.append({
+            "name": prg,
+            "cat": "cached" if r.cached else "subprocess",
+            "ph": "X",
+            "ts": int(r.start * 1_000_000),
+            "dur": max(1, int(r.wall * 1_000_000)),
+            "pid": pid,
+            "tid": r.tid,
+            "args": {
+                "argv": r.argv if isinstance(r.argv, str) else list(r.argv),
+                "rc": r.rc,
+                "outBytes": r.outBytes,
+                "source": src,
+            },
+        })
+    return {"traceEvents": ev, "displayTimeUnit": "ms"}
+
+def profDump(path: str, fmt: str = "chrome") -> None:
+    """Uloží záznamy do souboru.
+
+    Args:
+        path (str): cílový soubor, '-' = stderr
+        fmt (str): 'chrome' | 'folded' | 'summary'
+    Raises:
+        ValueError: neznámý formát
+    """
+    if fmt == "chrome":
+        data = json.dumps(profChromeTrace())
+    elif fmt == "folded":
+        data = profFolded()
+    elif fmt == "summary":
+        data = profSummary()
+    else:
+        raise ValueError(f"Unknown profile format '{fmt}'")
+    if path == "-":
+        print(data, file=sys.stderr)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data + "\n")
+
+def _profDumpAtExit() -> None:
+    for fmt, path in _profAtExit.items():
+        if not path:
+            continue
+        try:
+            profDump(path, fmt)
+        except Exception as e:
+            print(f"profDump '{path}' failed: {e}", file=sys.stderr)
+
+def subprocessRun(*popenargs, **kwargs) -> subprocess.CompletedProcess:
+    """Náhrada `subprocess.run` se stejnými parametry, navíc se volání započítá do
+    statistik (runStatsEnable), profilování (profEnable) a zneplatní cache runRet.
+    Používejte místo přímého `subprocess.run` v modulech knihovny.
+
+    Raises:
+        stejné výjimky jako subprocess.run
+    """
+    cmd = popenargs[0] if popenargs else kwargs.get("args")
+    if _runCacheTtl > 0:
+        with _runLock:
+            if _runCacheKey(cmd) is None:
+                _runCacheInvalidate(None)
+    if _profRing is None and not _runStatsOn:
+        return subprocess.run(*popenargs, **kwargs)
+
+    t0 = time.perf_counter()
+    rc, out, err = None, None, None
+    try:
+        proc = subprocess.run(*popenargs, **kwargs)
+        rc, out, err = proc.returncode, proc.stdout, proc.stderr
+        return proc
+    except subprocess.CalledProcessError as e:
+        rc, out, err = e.returncode, e.stdout, e.stderr
+        raise
+    finally:
+        c = cmd if isinstance(cmd, (str, list)) else [str(x) for x in (cmd or [])]
+        _runPost(c, None, time.perf_counter() - t0, (out, rc, err))
+
+def subprocessRecord(cmd: Union[str, List[str]], wall: float, returncode: Union[int, None], outBytes: int = 0) -> None:
+    """Započítá do statistik (runStatsEnable) a profilování (profEnable) příkaz spuštěný mimo
+    subprocessRun/runRet, např. `subprocess.Popen` s průběžným čtením výstupu. Volat po skončení procesu.
+
+    Args:
+        cmd (str|list): příkaz
+        wall (float): doba běhu v sec
+        returncode (int|None): návratový kód
+        outBytes (int): velikost přečteného výstupu
+    """
+    if _profRing is not None:
+        _profAdd(cmd, time.time() - wall, wall, returncode, outBytes, False)
+    if _runStatsOn:
+        with _runLock:
+            _runStatAdd(cmd, wall, False)
+
 def runRet(
     cmd: Union[str, List[str]],
     stdOutOnly: bool = True,
@@ -1010,10 +1428,17 @@ def runRet(
         Tuple[str, int, str]: tuple (stdout, returncode, stderr), pokud je stdOutOnly False.
     Raises:
         SystemError: Pokud příkaz selže.
+    See:
+        runCacheEnable(), runStatsEnable() - volitelná cache read-only příkazů a měření
     """
     
     use_text = input_bytes is None  # text=True jen pokud neposíláme binary input
 
+    key, hit = _runPre(cmd, noOut, use_text)
+    if hit is not None:
+        return _runResult(cmd, stdOutOnly, *hit)
+
+    t0 = time.perf_counter()
     # Pokud je cmd string → použij shell interpretaci
     if isinstance(cmd, str):
         proc = subprocess.run(
@@ -1037,6 +1462,7 @@ def runRet(
             stdout=None if noOut else subprocess.PIPE,
             stderr=None if noOut else subprocess.PIPE,
         )
+    wall = time.perf_counter() - t0
 
     # Convert output to text if we were in binary mode
     stdout = proc.stdout
@@ -1048,12 +1474,176 @@ def runRet(
         if stderr is not None:
             stderr = stderr.decode(errors="replace")
 
+    _runPost(cmd, key, wall, (stdout, proc.returncode, stderr))
+    return _runResult(cmd, stdOutOnly, stdout, proc.returncode, stderr)
+
+def _runPre(cmd: Union[str, List[str]], noOut: bool, use_text: bool) -> Tuple[Union[tuple, None], Union[Tuple[str, int, str], None]]:
+    """Společná příprava runRet/runRetAsync: vyhledání v cache a zneplatnění cache.
+    Returns:
+        tuple: (klíč cache nebo None, výsledek z cache (stdout, returncode, stderr) nebo None)
+    """
+    if _runCacheTtl <= 0:
+        return None, None
+    key = _runCacheKey(cmd)
+    with _runLock:
+        if noOut or not use_text:
+            # výsledek se necachuje, ale měnící příkaz musí zneplatnit cache i tak
+            if key is None:
+                _runCacheInvalidate(None)
+            return None, None
+        if key is not None:
+            hit = _runCache.get(key)
+            if hit is not None and time.monotonic() - hit[0] <= _runCacheTtl:
+                if _runStatsOn:
+                    _runStatAdd(cmd, 0.0, True)
+                if _profRing is not None:
+                    _profAdd(cmd, time.time(), 0.0, hit[1][1], len(hit[1][0] or ""), True)
+                return key, hit[1]
+            return key, None
+        # necachovatelný příkaz může měnit stav čtený i jinými programy -> celá cache
+        _runCacheInvalidate(None)
+    return None, None
+
+def _runPost(cmd: Union[str, List[str]], key: Union[tuple, None], wall: float, result: Tuple[str, int, str]) -> None:
+    """Společné dokončení runRet/runRetAsync/subprocessRun: profilování, statistiky a uložení do cache."""
+    if _profRing is not None:
+        _profAdd(cmd, time.time() - wall, wall, result[1], len(result[0] or "") + len(result[2] or ""), False)
+    if not _runStatsOn and key is None:
+        return
+    with _runLock:
+        if _runStatsOn:
+            _runStatAdd(cmd, wall, False)
+        if key is not None:
+            if len(_runCache) >= _runCacheMax:
+                del _runCache[next(iter(_runCache))]
+            _runCache[key] = (time.monotonic(), result)
+
+def _runResult(cmd: Union[str, List[str]], stdOutOnly: bool, stdout: str, returncode: int, stderr: str) -> Union[str, Tuple[str, int, str]]:
+    """Návratová hodnota runRet/runRetAsync podle stdOutOnly
+    Raises:
+        SystemError: pokud stdOutOnly a returncode != 0
+    """
     if stdOutOnly:
-        if proc.returncode != 0:
+        if returncode != 0:
             raise SystemError(f"Command failed: {cmd}\n{stderr}")
         return stdout
+    return stdout, returncode, stderr
 
-    return stdout, proc.returncode, stderr
+async def runRetAsync(
+    cmd: Union[str, List[str]],
+    stdOutOnly: bool = True,
+    noOut: bool = False,
+    input_bytes: bytes | None = None,
+) -> Union[str, Tuple[str, int, str]]:
+    """
+    Asyncio varianta runRet se stejnými parametry a návratovými hodnotami.
+    Sdílí s runRet cache i statistiky, viz runCacheEnable(), runStatsEnable().
+
+    Example:
+        >>> out = await runRetAsync(["systemctl", "is-active", "nginx"], False)
+
+    Args:
+        cmd (Union[str, List[str]]): Příkaz jako list stringů nebo string (shell interpretace).
+        stdOutOnly (bool): True = vrátí stdout, False = tuple (stdout, returncode, stderr).
+        noOut (bool): True = výstup jde do konzole, nic se nevrací.
+        input_bytes (bytes | None): Nepovinný vstup pro příkaz jako bytes.
+    Returns:
+        str: stdout příkazu, pokud je stdOutOnly True.
+        Tuple[str, int, str]: tuple (stdout, returncode, stderr), pokud je stdOutOnly False.
+    Raises:
+        SystemError: Pokud příkaz selže a stdOutOnly je True.
+    """
+    import asyncio
+    use_text = input_bytes is None
+    key, hit = _runPre(cmd, noOut, use_text)
+    if hit is not None:
+        return _runResult(cmd, stdOutOnly, *hit)
+
+    pipe = None if noOut else asyncio.subprocess.PIPE
+    stdin = asyncio.subprocess.PIPE if input_bytes is not None else None
+    t0 = time.perf_counter()
+    if isinstance(cmd, str):
+        proc = await asyncio.create_subprocess_shell(cmd, stdin=stdin, stdout=pipe, stderr=pipe)
+    else:
+        if not isinstance(cmd, list) or not cmd or not all(isinstance(x, str) for x in cmd):
+            raise ValueError("cmd must be a list of strings or a single string")
+        proc = await asyncio.create_subprocess_exec(*cmd, stdin=stdin, stdout=pipe, stderr=pipe)
+    out, err = await proc.communicate(input_bytes)
+    wall = time.perf_counter() - t0
+
+    def dec(b: bytes | None) -> str | None:
+        if b is None:
+            return None
+        x = b.decode(errors="replace")
+        if use_text:  # stejně jako text=True v subprocess.run (universal newlines)
+            x = x.replace("\r\n", "\n").replace("\r", "\n")
+        return x
+    stdout, stderr = dec(out), dec(err)
+
+    _runPost(cmd, key, wall, (stdout, proc.returncode, stderr))
+    return _runResult(cmd, stdOutOnly, stdout, proc.returncode, stderr)
+
+async def runGetObjAsync(
+    cmd: Union[str, List[str]],
+    input_bytes: bytes | None = None,
+    raiseOnError: bool = False
+) -> RunGetObjResult:
+    """
+    Asyncio varianta runGetObj se stejnými parametry a návratovou hodnotou.
+
+    Args:
+        cmd (Union[str, List[str]]): Příkaz k vykonání jako seznam stringů nebo jeden string.
+        input_bytes (bytes | None): Nepovinný vstup pro příkaz jako bytes.
+        raiseOnError (bool): Pokud je True, vyhodí SystemError při chybovém návratovém kódu.
+    Returns:
+        RunGetObjResult
+    """
+    o, r, e = await runRetAsync(cmd, False, False, input_bytes=input_bytes)
+    x = __fullOutput(cmd, o, r, e, raiseOnError)
+    return RunGetObjResult(returncode=r, stdout=o, stderr=e, fulloutput=x)
+
+async def gatherLimit(aws, limit: int = 8, return_exceptions: bool = False) -> list:
+    """
+    Jako asyncio.gather ale současně běží max `limit` awaitables.
+
+    Example:
+        >>> res = await gatherLimit([runGetObjAsync(["id", u]) for u in users], limit=10)
+
+    Args:
+        aws (Iterable[Awaitable]): awaitables (např. korutiny runRetAsync/runGetObjAsync)
+        limit (int): max počet současně běžících
+        return_exceptions (bool): viz asyncio.gather
+    Returns:
+        list: výsledky ve stejném pořadí jako vstup
+    """
+    import asyncio
+    sem = asyncio.Semaphore(max(1, int(limit)))
+
+    async def one(a):
+        async with sem:
+            return await a
+
+    return await asyncio.gather(*(one(a) for a in aws), return_exceptions=return_exceptions)
+
+def runManyGetObj(
+    cmds: List[Union[str, List[str]]],
+    limit: int = 8,
+    raiseOnError: bool = False
+) -> List[RunGetObjResult]:
+    """
+    Synchronní obálka: spustí více read-only příkazů souběžně (max `limit` najednou)
+    a vrátí výsledky ve stejném pořadí. Nelze volat z běžící asyncio smyčky,
+    tam použijte `gatherLimit` s `runGetObjAsync`.
+
+    Args:
+        cmds (List[Union[str, List[str]]]): seznam příkazů
+        limit (int): max počet současně běžících procesů
+        raiseOnError (bool): viz runGetObj
+    Returns:
+        List[RunGetObjResult]: výsledky ve stejném pořadí jako cmds
+    """
+    import asyncio
+    return asyncio.run(gatherLimit([runGetObjAsync(c, raiseOnError=raiseOnError) for c in cmds], limit))
 
 def sanitizeFileName(name: str | None, maxlen: int = 25) -> str | None:
     """ Odstraní ze jména nepovolené znaky, mezery a nahradí je podtržítky.
@@ -66,6 +66,10 @@ TXT_SSMD_ERR18 = "Neplatný vstup"
 TXT_SSMD_ERR19 = "!!! Neplatné heslo\nHeslo musí obsahovat alespoň 8 znaků, včetně písmen, číslic a speciálních znaků"
 TXT_SSMD_ERR20 = "Hesla se neshodují. Zkuste to znovu."
 TXT_SSMD_ERR21 = "Neplatný port. Musí být mezi 10000-65000"
+TXT_SSMD_ERR22 = "Obsah souboru jednotky se liší od jiné jednotky v dávce"
+TXT_SSMD_ERR23 = "Nepodařilo se povolit nebo spustit jednotku"
+TXT_SSMD_ERR24 = "Dávka nebyla nainstalována, jiný soubor jednotky nešlo zapsat"
+TXT_SSMD_ERR25 = "Neplatný výraz OnCalendar '{tx}': {err}"
 
 TXT_STATUS_ENA = "POVOLENO"
 TXT_STATUS_DIS = "VYPNUTO"
@@ -74,6 +78,8 @@ TXT_STATUS_STP = "ZASTAVENO"
 TXT_STATUS_NEX = "NEEXISTUJE"
 
 TXT_C_UNIT_noSystemd = "Na tomto systému není 'Systemd' k dispozici."
+TXT_C_UNIT_noDbus = "D-Bus backend není k dispozici (chybí python modul 'jeepney')."
+TXT_C_UNIT_badBackend = "Neznámý backend, použijte 'systemctl', 'dbus' nebo instanci c_systemdDbus."
 
 TXT_SELECT_TITLE = "Vyberte z možností"
 
@@ -82,6 +82,10 @@ TXT_SSMD_ERR18 = "Invalid input"
 TXT_SSMD_ERR19 = "!!! Invalid password\nPassword must contain at least {minLen} characters and at most {maxLen} characters. Allowed characters are letters, digits, and special characters !@#$%^&*()-_=+"
 TXT_SSMD_ERR20 = "Passwords do not match. Try again."
 TXT_SSMD_ERR21 = "Invalid port. Must be between 10000-65000"
+TXT_SSMD_ERR22 = "Unit file content differs from another unit in the batch"
+TXT_SSMD_ERR23 = "Failed to enable or start unit"
+TXT_SSMD_ERR24 = "Batch not installed, another unit file could not be written"
+TXT_SSMD_ERR25 = "Invalid OnCalendar expression '{tx}': {err}"
 
 TXT_STATUS_ENA = "ENABLED"
 TXT_STATUS_DIS = "DISABLED"
@@ -90,6 +94,8 @@ TXT_STATUS_STP = "STOPPED"
 TXT_STATUS_NEX = "NOT EXIST"
 
 TXT_C_UNIT_noSystemd = "Systemd is not available on this system."
+TXT_C_UNIT_noDbus = "D-Bus backend is not available (python module 'jeepney' is missing)."
+TXT_C_UNIT_badBackend = "Unknown backend, use 'systemctl', 'dbus' or c_systemdDbus instance."
 
 TXT_SELECT_TITLE = "Select an option"
 
@@ -1,4 +1,5 @@
 import subprocess,re
+from .helper import subprocessRun
 from typing import Union
 
 class c_machine_info:
@@ -61,7 +62,7 @@ class c_machine_info:
     def load_info(self):
         """Načte informace o systému z hostnamectl."""
         try:
-            result = subprocess.run(["hostnamectl"], stdout=subprocess.PIPE, text=True)
+            result = subprocessRun(["hostnamectl"], stdout=subprocess.PIPE, text=True)
             if result.returncode == 0:
                 lines = result.stdout.splitlines()
                 for line in lines:
@@ -87,7 +88,7 @@ class c_machine_info:
                     self.os_lts="LTS" in self.operating_system
                 
                 # full hostname
-                result = subprocess.run(["hostname", "-f"], stdout=subprocess.PIPE, text=True)
+                result = subprocessRun(["hostname", "-f"], stdout=subprocess.PIPE, text=True)
                 if result.returncode == 0:
                     self.hostname_full=result.stdout.strip()                
             else:
@@ -0,0 +1,314 @@
+"""Statistiky paměti bez spouštění externích procesů.
+
+Čte v jednom průchodu `/proc/meminfo`, `/proc/pressure/memory` (PSI) a paměťové
+soubory cgroup (v2 `memory.*`, případně v1 `memory.*_in_bytes`) do kompaktní
+struktury se `__slots__`.
+
+Pro opakované čtení (monitorovací smyčka např. 10 Hz) použijte `c_memStatsReader`,
+který drží otevřené file descriptory a čte přes `os.pread` od offsetu 0,
+takže se při každém vzorku neotevírají soubory znovu.
+
+Example:
+    >>> with c_memStatsReader() as rd:
+    ...     st = rd.read()
+    ...     while True:
+    ...         rd.read(st)          # přepíše hodnoty ve stejném objektu
+    ...         print(st.mem_available, st.psi_some_avg10)
+    ...         sleep_ms(100)
+"""
+import os, time
+from typing import Optional
+
+MEMINFO_PATH = "/proc/meminfo"
+PSI_MEMORY_PATH = "/proc/pressure/memory"
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+_READ_SIZE = 8192
+"""max velikost čtení jednoho souboru, /proc/meminfo má cca 1.5kB"""
+
+_MEMINFO_MAP: dict[bytes, str] = {
+    b"MemTotal": "mem_total",
+    b"MemFree": "mem_free",
+    b"MemAvailable": "mem_available",
+    b"Buffers": "buffers",
+    b"Cached": "cached",
+    b"SwapCached": "swap_cached",
+    b"Active": "active",
+    b"Inactive": "inactive",
+    b"SwapTotal": "swap_total",
+    b"SwapFree": "swap_free",
+    b"Dirty": "dirty",
+    b"Writeback": "writeback",
+    b"Shmem": "shmem",
+    b"SReclaimable": "sreclaimable",
+}
+"""mapování klíče z /proc/meminfo na atribut c_memStats, ostatní klíče se přeskakují"""
+
+class c_memStats:
+    """Snapshot paměti systému, všechny velikosti jsou v bytech (int).
+
+    Hodnoty PSI a cgroup jsou `None` pokud je jádro nebo prostředí neposkytuje.
+    """
+    __slots__ = (
+        "ts",
+        "mem_total", "mem_free", "mem_available", "buffers", "cached", "swap_cached",
+        "active", "inactive", "swap_total", "swap_free", "dirty", "writeback",
+        "shmem", "sreclaimable",
+        "psi_some_avg10", "psi_some_avg60", "psi_some_avg300", "psi_some_total",
+        "psi_full_avg10", "psi_full_avg60", "psi_full_avg300", "psi_full_total",
+        "cg_path", "cg_current", "cg_max", "cg_high", "cg_swap_current", "cg_swap_max",
+    )
+
+    def __init__(self) -> None:
+        self.ts: float = 0.0
+        """time.monotonic() okamžiku čtení"""
+
+        self.mem_total: int = 0
+        self.mem_free: int = 0
+        self.mem_available: int = 0
+        self.buffers: int = 0
+        self.cached: int = 0
+        self.swap_cached: int = 0
+        self.active: int = 0
+        self.inactive: int = 0
+        self.swap_total: int = 0
+        self.swap_free: int = 0
+        self.dirty: int = 0
+        self.writeback: int = 0
+        self.shmem: int = 0
+        self.sreclaimable: int = 0
+
+        self.psi_some_avg10: Optional[float] = None
+        self.psi_some_avg60: Optional[float] = None
+        self.psi_some_avg300: Optional[float] = None
+        self.psi_some_total: Optional[int] = None
+        """celkový čas stall v us"""
+        self.psi_full_avg10: Optional[float] = None
+        self.psi_full_avg60: Optional[float] = None
+        self.psi_full_avg300: Optional[float] = None
+        self.psi_full_total: Optional[int] = None
+        """celkový čas stall v us"""
+
+        self.cg_path: Optional[str] = None
+        """cesta k adresáři cgroup ze kterého se četlo"""
+        self.cg_current: Optional[int] = None
+        self.cg_max: Optional[int] = None
+        """limit cgroup, None = bez limitu ('max')"""
+        self.cg_high: Optional[int] = None
+        """throttle limit cgroup v2, None = bez limitu"""
+        self.cg_swap_current: Optional[int] = None
+        self.cg_swap_max: Optional[int] = None
+
+    @property
+    def mem_used(self) -> int:
+        """Využitá RAM = total - available."""
+        return self.mem_total - self.mem_available
+
+    @property
+    def swap_used(self) -> int:
+        """Využitý swap = total - free."""
+        return self.swap_total - self.swap_free
+
+    @property
+    def mem_usage_percent(self) -> float:
+        return (self.mem_used / self.mem_total * 100.0) if self.mem_total else 0.0
+
+    @property
+    def swap_usage_percent(self) -> float:
+        return (self.swap_used / self.swap_total * 100.0) if self.swap_total else 0.0
+
+    def asDict(self) -> dict:
+        """Vrátí hodnoty jako dict, např. pro export do JSON."""
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return (
+            f"<c_memStats mem={self.mem_used}/{self.mem_total} avail={self.mem_available}"
+            f" swap={self.swap_used}/{self.swap_total} psi10={self.psi_some_avg10} cg={self.cg_current}>"
+        )
+
+def _parseMeminfo(raw: bytes, st: c_memStats) -> None:
+    """Naparsuje obsah /proc/meminfo do st, hodnoty v kB převede na byty."""
+    mp = _MEMINFO_MAP
+    for line in raw.split(b"\n"):
+        k, _, v = line.partition(b":")
+        attr = mp.get(k)
+        if attr is None:
+            continue
+        parts = v.split()
+        if not parts:
+            continue
+        n = int(parts[0])
+        if len(parts) > 1 and parts[1] == b"kB":
+            n *= 1024
+        setattr(st, attr, n)
+
+def _parsePsi(raw: bytes, st: c_memStats) -> None:
+    """Naparsuje /proc/pressure/memory ve formátu
+    `some avg10=0.00 avg60=0.00 avg300=0.00 total=0`
+    """
+    for line in raw.split(b"\n"):
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+        kind = parts[0]
+        if kind == b"some":
+            pfx = "psi_some_"
+        elif kind == b"full":
+            pfx = "psi_full_"
+        else:
+            continue
+        for p in parts[1:]:
+            k, _, v = p.partition(b"=")
+            if k == b"total":
+                setattr(st, pfx + "total", int(v))
+            elif k in (b"avg10", b"avg60", b"avg300"):
+                setattr(st, pfx + k.decode(), float(v))
+
+def _parseCgInt(raw: bytes) -> Optional[int]:
+    """'max' nebo prázdné -> None, jinak int; v1 neomezený limit (0x7FFFF...) -> None"""
+    raw = raw.strip()
+    if not raw or raw == b"max":
+        return None
+    n = int(raw)
+    if n >= 0x7FFFFFFFFFFFF000:
+        return None
+    return n
+
+def getOwnCgroupPath(pid: int | str = "self") -> Optional[str]:
+    """Zjistí adresář paměťové cgroup procesu.
+
+    Preferuje cgroup v2 (řádek `0::/...`), pokud v2 neobsahuje `memory.current`
+    tak zkusí v1 controller `memory`.
+
+    Args:
+        pid (int|str): PID procesu nebo 'self'
+    Returns:
+        str|None: absolutní cesta k adresáři cgroup nebo None pokud nelze zjistit
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup", "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    v1: Optional[str] = None
+    for line in lines:
+        hid, _, rest = line.partition(":")
+        ctrls, _, path = rest.partition(":")
+        if hid == "0" and ctrls == "":
+            p = os.path.join(CGROUP_ROOT, path.lstrip("/"))
+            if os.path.exists(os.path.join(p, "memory.current")):
+                return p
+        elif "memory" in ctrls.split(","):
+            v1 = os.path.join(CGROUP_ROOT, "memory", path.lstrip("/"))
+    if v1 and os.path.exists(os.path.join(v1, "memory.usage_in_bytes")):
+        return v1
+    return None
+
+class c_memStatsReader:
+    """Čtečka paměťových statistik s trvale otevřenými soubory.
+
+    Soubory se otevřou jednou v konstruktoru, každé `read()` pak dělá jen `os.pread`
+    pro každý soubor a parsování, žádný fork ani open/close.
+    """
+
+    def __init__(self, cgroup: Optional[str] | bool = True, psi: bool = True):
+        """
+        Args:
+            cgroup (str|bool|None): cesta k adresáři cgroup, True = cgroup vlastního procesu,
+                False/None = cgroup se nečte
+            psi (bool): zda číst /proc/pressure/memory
+        """
+        self._fdMem: int = os.open(MEMINFO_PATH, os.O_RDONLY)
+        self._fdPsi: Optional[int] = None
+        self._cg: dict[str, int] = {}
+        """atribut c_memStats -> fd"""
+        self.cgPath: Optional[str] = None
+
+        if psi:
+            try:
+                self._fdPsi = os.open(PSI_MEMORY_PATH, os.O_RDONLY)
+            except OSError:
+                self._fdPsi = None  # jádro bez PSI
+
+        if cgroup is True:
+            cgroup = getOwnCgroupPath()
+        if cgroup:
+            self.cgPath = str(cgroup)
+            if os.path.exists(os.path.join(self.cgPath, "memory.current")):
+                files = {
+                    "cg_current": "memory.current",
+                    "cg_max": "memory.max",
+                    "cg_high": "memory.high",
+                    "cg_swap_current": "memory.swap.current",
+                    "cg_swap_max": "memory.swap.max",
+                }
+            else:
+                files = {
+                    "cg_current": "memory.usage_in_bytes",
+                    "cg_max": "memory.limit_in_bytes",
+                }
+            for attr, fn in files.items():
+                try:
+                    self._cg[attr] = os.open(os.path.join(self.cgPath, fn), os.O_RDONLY)
+                except OSError:
+                    pass
+
+    def read(self, into: Optional[c_memStats] = None) -> c_memStats:
+        """Načte aktuální hodnoty.
+
+        Args:
+            into (c_memStats|None): existující objekt k přepsání, None = vytvoří nový
+        Returns:
+            c_memStats: naplněný objekt
+        """
+        st = into if into is not None else c_memStats()
+        st.ts = time.monotonic()
+        _parseMeminfo(os.pread(self._fdMem, _READ_SIZE, 0), st)
+        if self._fdPsi is not None:
+            _parsePsi(os.pread(self._fdPsi, _READ_SIZE, 0), st)
+        st.cg_path = self.cgPath
+        for attr, fd in self._cg.items():
+            try:
+                setattr(st, attr, _parseCgInt(os.pread(fd, 64, 0)))
+            except (OSError, ValueError):
+                setattr(st, attr, None)
+        return st
+
+    def close(self) -> None:
+        """Zavře všechny otevřené soubory."""
+        fds = [self._fdMem, self._fdPsi] + list(self._cg.values())
+        for fd in fds:
+            if fd is None or fd < 0:
+                continue
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fdMem = -1
+        self._fdPsi = None
+        self._cg = {}
+
+    def __enter__(self) -> "c_memStatsReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def readMemStats(cgroup: Optional[str] | bool = True, psi: bool = True) -> c_memStats:
+    """Jednorázové načtení statistik paměti, pro smyčky použijte `c_memStatsReader`.
+
+    Args:
+        cgroup (str|bool|None): viz `c_memStatsReader`
+        psi (bool): zda číst PSI
+    Returns:
+        c_memStats: aktuální hodnoty
+    """
+    with c_memStatsReader(cgroup=cgroup, psi=psi) as rd:
+        return rd.read()
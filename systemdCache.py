@@ -0,0 +1,283 @@
+"""Cache stavu systemd jednotek.
+
+Menu a přehledy, které při každém překreslení volají `c_unit.status()`, mohou číst
+stav z paměti. Cache se aktualizuje:
+
+- přes D-Bus signály `PropertiesChanged` od systemd (pokud je k dispozici `jeepney`)
+- nebo jako fallback periodickým dotazem `c_unit.bulk_status` (jedno volání `systemctl show`)
+
+Po aktivaci přes `c_unit.setStateCache(cache)` obsluhují `status()`, `running()`,
+`enabled()` a `fullStatus()` dotazy z cache. Akce `start/stop/restart/enable/disable`
+provedené přes `c_unit` záznam jednotky zneplatní, takže další dotaz načte čerstvý stav.
+
+Example:
+    >>> cache = c_unitStateCache(interval=2.0)
+    >>> cache.subscribe(lambda name, st: print(name, st.ActiveState))
+    >>> cache.start()
+    >>> c_unit.setStateCache(cache)
+    >>> svc = c_service("cron")
+    >>> svc.fullStatus()     # první dotaz načte stav, další jdou z paměti
+"""
+
+import threading, time
+from typing import List, Union, Dict, Callable, Set
+
+from .helper import getLogger
+from .systemdService import c_unit, c_unit_status
+
+log = getLogger(__name__)
+
+CACHE_COMPARE_KEYS = ("LoadState", "ActiveState", "SubState", "UnitFileState", "MainPID")
+"""vlastnosti podle kterých se v režimu poll určuje změna stavu pro odběratele"""
+
+class c_unitStateCache:
+    """ cache stavu jednotek, bezpečná pro více vláken
+
+    Objekty statusu vrácené z get() jsou sdílené, berte je jako read-only (c_unit.status() vrací kopii).
+    """
+
+    interval: float
+    """interval dotazování v sec pro režim poll"""
+
+    mode: str
+    """'dbus' nebo 'poll', nastaví se ve start()"""
+
+    def __init__(self, units: List[str] = None, interval: float = 2.0, useDbus: bool = True, bus: str = "SYSTEM"):
+        """
+        Parameters:
+            units (List[str]): jednotky ke sledování (plné názvy s příponou), další se přidají při prvním dotazu
+            interval (float): interval dotazování v sec pro režim poll
+            useDbus (bool): zkusit odběr signálů přes D-Bus, při nedostupnosti se použije poll
+            bus (str): sběrnice pro D-Bus, viz c_systemdDbus
+        """
+        self.interval = float(interval)
+        self.mode = ""
+        self._useDbus = useDbus
+        self._bus = bus
+        self._dbus = None
+        """c_systemdDbus pro načítání vlastností v režimu dbus"""
+        self._lock = threading.RLock()
+        self._units: Set[str] = set(units or [])
+        self._data: Dict[str, c_unit_status] = {}
+        self._paths: Dict[str, str] = {}
+        """cesta objektu -> jednotka pro signály, vlastní mapa - c_systemdDbus.reload() svoji maže"""
+        self._gen: int = 0
+        """generace, zvýší se při každém invalidate()"""
+        self._invGen: Dict[str, int] = {}
+        """jednotka -> generace posledního invalidate() jednotky"""
+        self._invAll: int = 0
+        """generace posledního invalidate() všech jednotek"""
+        self._subs: List[Callable[[str, c_unit_status], None]] = []
+        self._stop = threading.Event()
+        self._thread: Union[threading.Thread, None] = None
+
+    # --- dotazy ---
+
+    def get(self, unitName: str) -> Union[c_unit_status, None]:
+        """ vrátí stav jednotky z cache, pokud není načtený tak ho načte a jednotku začne sledovat """
+        with self._lock:
+            st = self._data.get(unitName)
+            if st is not None:
+                return st
+            self._units.add(unitName)
+            gen = self._gen
+        st = self._fetch([unitName]).get(unitName)
+        if st is not None:
+            with self._lock:
+                if self._fresh(unitName, gen):
+                    self._data[unitName] = st
+        self._mapPaths([unitName])
+        return st
+
+    def watch(self, unitNames: Union[str, List[str]]) -> None:
+        """ přidá jednotky ke sledování """
+        if isinstance(unitNames, str):
+            unitNames = [unitNames]
+        with self._lock:
+            self._units.update(unitNames)
+        self._mapPaths(unitNames)
+
+    def invalidate(self, unitName: str = None) -> None:
+        """ zneplatní záznam jednotky, None = všechny
+
+        Výsledek dotazu, který začal před zneplatněním, se už do cache nezapíše (viz _fresh).
+        """
+        with self._lock:
+            self._gen += 1
+            if unitName is None:
+                self._data.clear()
+                self._invGen.clear()
+                self._invAll = self._gen
+            else:
+                self._data.pop(unitName, None)
+                self._invGen[unitName] = self._gen
+
+    def _fresh(self, unitName: str, gen: int) -> bool:
+        """ zda stav načtený dotazem začatým v generaci gen není starší než invalidate() jednotky, volat pod _lock """
+        return max(self._invAll, self._invGen.get(unitName, 0)) <= gen
+
+    def subscribe(self, callback: Callable[[str, c_unit_status], None]) -> None:
+        """ přidá odběratele změn, volá se z vlákna cache jako callback(unitName, status) """
+        with self._lock:
+            self._subs.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, c_unit_status], None]) -> None:
+        with self._lock:
+            if callback in self._subs:
+                self._subs.remove(callback)
+
+    # --- vlákno ---
+
+    def start(self) -> 'c_unitStateCache':
+        """ spustí vlákno aktualizace, vrací self """
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        conn = None
+        if self._useDbus:
+            try:
+                from .systemdDbus import haveDbus, getSystemdDbus
+                if haveDbus():
+                    conn = self._dbusOpenSignals()
+                    self._dbus = getSystemdDbus(self._bus)
+            except Exception as e:
+                log.warning(f"systemd cache: D-Bus not available, fallback to poll: {e}")
+                conn = None
+                self._dbus = None
+        if conn is not None:
+            self.mode = "dbus"
+            with self._lock:
+                names = sorted(self._units)
+            self._mapPaths(names)
+            self._thread = threading.Thread(target=self._runDbus, args=(conn,), name="systemdCache", daemon=True)
+        else:
+            self.mode = "poll"
+            self._thread = threading.Thread(target=self._runPoll, name="systemdCache", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """ zastaví vlákno aktualizace """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.interval, 1.0) + 1.0)
+        self._thread = None
+
+    def _mapPaths(self, names: List[str]) -> None:
+        """ v režimu dbus doplní cesty objektů jednotek pro překlad signálů """
+        dbus = self._dbus
+        if dbus is None:
+            return
+        with self._lock:
+            known = set(self._paths.values())
+        for n in names:
+            if n in known:
+                continue
+            try:
+                p = dbus.unitPath(n)
+            except Exception as e:
+                log.error(f"systemd cache LoadUnit {n}: {e}")
+                continue
+            with self._lock:
+                self._paths[p] = n
+
+    def _fetch(self, names: List[str]) -> Dict[str, c_unit_status]:
+        if self._dbus is not None:
+            return self._dbus.bulk_status(names)
+        return c_unit.bulk_status(names)
+
+    def _notify(self, changed: Dict[str, c_unit_status]) -> None:
+        with self._lock:
+            subs = list(self._subs)
+        for name, st in changed.items():
+            for cb in subs:
+                try:
+                    cb(name, st)
+                except Exception as e:
+                    log.error(f"systemd cache subscriber: {e}")
+
+    def _runPoll(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                names = sorted(self._units)
+                gen = self._gen
+            if names:
+                try:
+                    new = c_unit.bulk_status(names)
+                except Exception as e:
+                    log.error(f"systemd cache poll: {e}")
+                    new = {}
+                changed = {}
+                with self._lock:
+                    for n, st in new.items():
+                        if not self._fresh(n, gen):
+                            # jednotka byla mezitím zneplatněna (start/stop přes c_unit), výsledek je zastaralý
+                            continue
+                        old = self._data.get(n)
+                        if old is None or any(getattr(old, k, None) != getattr(st, k, None) for k in CACHE_COMPARE_KEYS):
+                            changed[n] = st
+                        self._data[n] = st
+                self._notify(changed)
+            self._stop.wait(self.interval)
+
+    def _dbusOpenSignals(self):
+        """ otevře samostatné spojení pro signály, zapne Subscribe u systemd a match na PropertiesChanged """
+        from jeepney import MatchRule, DBusAddress, new_method_call
+        from jeepney.bus_messages import message_bus
+        from jeepney.io.blocking import open_dbus_connection
+        from .systemdDbus import SYSTEMD_BUS_NAME, SYSTEMD_PATH, IFACE_MANAGER, IFACE_PROPERTIES
+        conn = open_dbus_connection(bus=self._bus)
+        self._rule = MatchRule(
+            type="signal",
+            interface=IFACE_PROPERTIES,
+            member="PropertiesChanged",
+            path_namespace=SYSTEMD_PATH + "/unit",
+        )
+        conn.send_and_get_reply(message_bus.AddMatch(self._rule), timeout=5)
+        # systemd posílá signály jen pokud je alespoň jeden klient přihlášený přes Subscribe
+        mgr = DBusAddress(SYSTEMD_PATH, bus_name=SYSTEMD_BUS_NAME, interface=IFACE_MANAGER)
+        conn.send_and_get_reply(new_method_call(mgr, "Subscribe"), timeout=5)
+        return conn
+
+    def _runDbus(self, conn) -> None:
+        from jeepney import HeaderFields
+        try:
+            with conn.filter(self._rule, bufsize=1024) as q:
+                while not self._stop.is_set():
+                    try:
+                        msg = conn.recv_until_filtered(q, timeout=1.0)
+                    except TimeoutError:
+                        continue
+                    with self._lock:
+                        name = self._paths.get(msg.header.fields.get(HeaderFields.path))
+                        if name is None or name not in self._units:
+                            continue
+                    # jedna změna stavu vyvolá více signálů, vybereme frontu a každou jednotku načteme jednou
+                    names = {name}
+                    while q:
+                        m = q.popleft()
+                        with self._lock:
+                            n = self._paths.get(m.header.fields.get(HeaderFields.path))
+                            if n is not None and n in self._units:
+                                names.add(n)
+                    with self._lock:
+                        gen = self._gen
+                    new = self._dbus.bulk_status(sorted(names))
+                    with self._lock:
+                        new = {n: st for n, st in new.items() if self._fresh(n, gen)}
+                        self._data.update(new)
+                    self._notify(new)
+        except Exception as e:
+            log.error(f"systemd cache D-Bus: {e}")
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if not self._stop.is_set():
+            # spojení spadlo, aby cache nezůstala zastaralá přejdeme na poll
+            log.warning("systemd cache: D-Bus signals lost, fallback to poll")
+            self.mode = "poll"
+            self._dbus = None
+            self.invalidate()
+            self._runPoll()
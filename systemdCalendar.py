@@ -0,0 +1,583 @@
+# cspell:ignore minutely,semiannually,annually,zoneinfo,elapse,elapses
+
+"""Lokální vyhodnocení systemd `OnCalendar` výrazů.
+
+Parsuje kalendářní výrazy ve formátu systemd (`man systemd.time`):
+
+    [DenVTýdnu] [Rok-Měsíc-Den] [Hodina:Minuta[:Sekunda]] [Časová zóna]
+
+- zkratky `minutely`, `hourly`, `daily`, `weekly`, `monthly`, `yearly`/`annually`, `quarterly`, `semiannually`
+- složky: `*`, číslo, seznam `a,b`, rozsah `a..b`, opakování `a/krok` (`a+krok` musí být v rozsahu složky), `a..b/krok`;
+  `*/krok` systemd nepřijme
+- den od konce měsíce `~`: `*-02~01` = poslední den února, `Mon *-05~07/1` = poslední pondělí v květnu
+- dny v týdnu `Mon..Fri`, `Mon-Fri`, `Sat,Sun` (i celé názvy)
+- okamžik `@<unix čas>`
+- časová zóna na konci výrazu: `UTC` nebo název IANA (`Europe/Prague`)
+
+Umožňuje výraz ověřit ještě před zápisem časovače, spočítat N příštích spuštění
+a vyhledat shluky časovačů, které se spouští ve stejnou sekundu (thundering herd).
+
+Example:
+    >>> spec = c_calendarSpec("Mon..Fri *-*-* 08:00:00")
+    >>> spec.nextElapses(3)
+    >>> print(calendarReport({"a.timer": "daily", "b.timer": "*-*-* 00:00:00", "c.timer": "hourly"}))
+
+Report časovačů v systému:
+    python -m libs.JBLibs.systemdCalendar [hodiny]
+"""
+
+import os, calendar
+from bisect import bisect_left
+from datetime import datetime, timedelta, tzinfo
+from typing import List, Union, Dict, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+YEAR_MIN = 1970
+YEAR_MAX = 2199
+"""rozsah let jako v systemd"""
+
+CALENDAR_SHORTCUTS: Dict[str, str] = {
+    "minutely": "*-*-* *:*:00",
+    "hourly": "*-*-* *:00:00",
+    "daily": "*-*-* 00:00:00",
+    "monthly": "*-*-01 00:00:00",
+    "weekly": "Mon *-*-* 00:00:00",
+    "yearly": "*-01-01 00:00:00",
+    "annually": "*-01-01 00:00:00",
+    "quarterly": "*-01,04,07,10-01 00:00:00",
+    "semiannually": "*-01,07-01 00:00:00",
+}
+
+_WEEKDAYS: Dict[str, int] = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tuesday": 1,
+    "wed": 2, "wednesday": 2,
+    "thu": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+
+def _parseNum(tx: str, lo: int, hi: int, year: bool = False) -> int:
+    tx = tx.strip()
+    if not tx:
+        raise ValueError("empty value")
+    if "." in tx:
+        # sekundy mohou mít desetinnou část, počítá se na celé sekundy
+        n = int(float(tx))
+    else:
+        if not tx.isdigit():
+            raise ValueError(f"invalid number '{tx}'")
+        n = int(tx)
+        if year and len(tx) == 2:
+            n += 2000 if n < 70 else 1900
+    if n < lo or n > hi:
+        raise ValueError(f"value '{tx}' out of range {lo}..{hi}")
+    return n
+
+def _parseComp(tx: str, lo: int, hi: int, year: bool = False, fromEnd: bool = False) -> Optional[List[int]]:
+    """ naparsuje jednu složku výrazu, vrací seřazený seznam hodnot nebo None pro `*`
+
+    Parameters:
+        fromEnd (bool): dny od konce měsíce (za `~`), `a/krok` pak znamená a, a-krok, ... směrem ke konci měsíce
+    """
+    tx = tx.strip()
+    if tx == "*":
+        return None
+    vals = set()
+    for item in tx.split(","):
+        if not item:
+            raise ValueError(f"invalid component '{tx}'")
+        step = 0
+        if "/" in item:
+            item, _, st = item.partition("/")
+            step = _parseNum(st, 1, hi - lo + 1 if hi > lo else 1)
+        if item == "*" and step:
+            # systemd `*/krok` nepřijme
+            raise ValueError(f"invalid component '{tx}'")
+        if fromEnd and step and ".." not in item:
+            a = _parseNum(item, lo, hi)
+            if step >= a:
+                raise ValueError(f"invalid component '{tx}'")
+            vals.update(range(a, 0, -step))
+            continue
+        if item == "*":
+            a, b = lo, hi
+        elif ".." in item:
+            x, _, y = item.partition("..")
+            a, b = _parseNum(x, lo, hi, year), _parseNum(y, lo, hi, year)
+            if a > b:
+                raise ValueError(f"invalid range '{item}'")
+        else:
+            a = _parseNum(item, lo, hi, year)
+            if step and a + step > hi:
+                # jako systemd - `a/krok` musí dát aspoň dvě hodnoty (např. `29/5` pro den)
+                raise ValueError(f"invalid component '{tx}'")
+            b = hi if step else a
+        vals.update(range(a, b + 1, step or 1))
+    return sorted(vals)
+
+def _parseWeekdays(tx: str) -> List[int]:
+    """ dny v týdnu, rozsah `Mon..Fri` nebo `Mon-Fri`, rozsah přes konec týdne (`Wed..Mon`) systemd nepřijme """
+    vals = set()
+    for item in tx.lower().split(","):
+        sep = ".." if ".." in item else "-" if "-" in item else None
+        if sep:
+            x, _, y = item.partition(sep)
+            if x not in _WEEKDAYS or y not in _WEEKDAYS:
+                raise ValueError(f"invalid weekday range '{item}'")
+            a, b = _WEEKDAYS[x], _WEEKDAYS[y]
+            if a > b:
+                raise ValueError(f"invalid weekday range '{item}'")
+            vals.update(range(a, b + 1))
+        else:
+            if item not in _WEEKDAYS:
+                raise ValueError(f"invalid weekday '{item}'")
+            vals.add(_WEEKDAYS[item])
+    return sorted(vals)
+
+def _nextIn(vals: Optional[List[int]], v: int, hi: int) -> Optional[int]:
+    """ nejmenší povolená hodnota >= v """
+    if vals is None:
+        return v if v <= hi else None
+    i = bisect_left(vals, v)
+    return vals[i] if i < len(vals) else None
+
+def _getTz(name: str) -> Optional[tzinfo]:
+    if name.upper() == "UTC":
+        from datetime import timezone
+        return timezone.utc
+    if ZoneInfo is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return None
+
+class c_calendarSpec:
+    """ naparsovaný `OnCalendar` výraz
+
+    Raises:
+        ValueError: neplatný výraz
+    """
+
+    __slots__ = ("spec", "weekdays", "years", "months", "days", "daysFromEnd", "hours", "minutes", "seconds", "tz", "tzName")
+
+    def __init__(self, spec: str):
+        """
+        Parameters:
+            spec (str): výraz OnCalendar, např. 'Mon..Fri *-*-* 08:00', 'daily', '*:0/15'
+        """
+        if not isinstance(spec, str) or not spec.strip():
+            raise ValueError("empty calendar spec")
+        self.spec = spec.strip()
+        self.weekdays: Optional[List[int]] = None
+        self.years: Optional[List[int]] = None
+        self.months: Optional[List[int]] = None
+        self.days: Optional[List[int]] = None
+        self.daysFromEnd: Optional[List[int]] = None
+        """hodnoty za `~`, 1 = poslední den v měsíci"""
+        self.hours: Optional[List[int]] = [0]
+        self.minutes: Optional[List[int]] = [0]
+        self.seconds: Optional[List[int]] = [0]
+        self.tz: Optional[tzinfo] = None
+        self.tzName: Optional[str] = None
+        self._parse()
+
+    def _parse(self) -> None:
+        tokens = self.spec.split()
+        # časová zóna může být na konci i za zkratkou ('daily UTC')
+        if len(tokens) > 1:
+            last = tokens[-1]
+            low = last.lower()
+            if ":" not in last and low not in _WEEKDAYS and low not in CALENDAR_SHORTCUTS:
+                tz = _getTz(last)
+                if tz is not None:
+                    self.tz = tz
+                    self.tzName = last
+                    tokens = tokens[:-1]
+                elif not any(c.isdigit() or c in "-*~,." for c in last):
+                    raise ValueError(f"unknown timezone '{last}'")
+        if tokens and tokens[0].startswith("@"):
+            self._parseEpoch(tokens)
+            return
+        if len(tokens) == 1 and tokens[0].lower() in CALENDAR_SHORTCUTS:
+            tokens = CALENDAR_SHORTCUTS[tokens[0].lower()].split()
+        if not tokens or len(tokens) > 3:
+            raise ValueError(f"invalid calendar spec '{self.spec}'")
+
+        dateTx = None
+        timeTx = None
+        for i, t in enumerate(tokens):
+            if ":" in t:
+                if timeTx is not None:
+                    raise ValueError(f"duplicate time in '{self.spec}'")
+                timeTx = t
+            elif t[0].isalpha() and i == 0:
+                self.weekdays = _parseWeekdays(t)
+            elif dateTx is None and timeTx is None:
+                dateTx = t
+            else:
+                raise ValueError(f"invalid part '{t}' in '{self.spec}'")
+
+        if dateTx is not None:
+            self._parseDate(dateTx)
+        if timeTx is not None:
+            self._parseTime(timeTx)
+
+    def _parseEpoch(self, tokens: List[str]) -> None:
+        """ `@<unix čas>` - jeden okamžik, složky se nastaví podle zóny výrazu (výchozí UTC) """
+        if len(tokens) != 1 or not tokens[0][1:].isdigit():
+            raise ValueError(f"invalid calendar spec '{self.spec}'")
+        if self.tz is None:
+            self.tz = _getTz("UTC")
+            self.tzName = "UTC"
+        try:
+            t = datetime.fromtimestamp(int(tokens[0][1:]), self.tz)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"invalid timestamp '{tokens[0]}'")
+        if t.year > YEAR_MAX:
+            raise ValueError(f"invalid timestamp '{tokens[0]}'")
+        self.years, self.months, self.days = [t.year], [t.month], [t.day]
+        self.hours, self.minutes, self.seconds = [t.hour], [t.minute], [t.second]
+
+    def _parseDate(self, tx: str) -> None:
+        tilde = "~" in tx
+        if tilde:
+            left, _, dayTx = tx.partition("~")
+            parts = left.split("-")
+            parts.append(dayTx)
+        else:
+            parts = tx.split("-")
+        if len(parts) == 2:
+            parts.insert(0, "*")
+        if len(parts) != 3:
+            raise ValueError(f"invalid date '{tx}'")
+        self.years = _parseComp(parts[0], YEAR_MIN, YEAR_MAX, year=True)
+        self.months = _parseComp(parts[1], 1, 12)
+        if tilde:
+            self.daysFromEnd = _parseComp(parts[2], 1, 31, fromEnd=True) or list(range(1, 32))
+        else:
+            self.days = _parseComp(parts[2], 1, 31)
+
+    def _parseTime(self, tx: str) -> None:
+        parts = tx.split(":")
+        if len(parts) == 2:
+            parts.append("00")
+        if len(parts) != 3:
+            raise ValueError(f"invalid time '{tx}'")
+        self.hours = _parseComp(parts[0], 0, 23)
+        self.minutes = _parseComp(parts[1], 0, 59)
+        self.seconds = _parseComp(parts[2], 0, 59)
+
+    def _dayOk(self, y: int, mo: int, d: int, ml: int) -> bool:
+        if self.days is not None and d not in self.days:
+            return False
+        if self.daysFromEnd is not None and (ml - d + 1) not in self.daysFromEnd:
+            return False
+        if self.weekdays is not None and calendar.weekday(y, mo, d) not in self.weekdays:
+            return False
+        return True
+
+    def nextElapse(self, after: datetime = None) -> Optional[datetime]:
+        """ vrátí první čas spuštění po `after`
+
+        Parameters:
+            after (datetime): výchozí čas, None = teď; naivní datetime se bere jako místní čas
+
+        Returns:
+            datetime|None: naivní místní čas, nebo čas v zóně výrazu pokud je zóna zadaná;
+                None pokud výraz už nikdy nenastane
+        """
+        if after is None:
+            after = datetime.now(self.tz) if self.tz else datetime.now()
+        if self.tz is not None:
+            after = after.astimezone(self.tz).replace(tzinfo=None)
+        elif after.tzinfo is not None:
+            after = after.astimezone().replace(tzinfo=None)
+        t = after.replace(microsecond=0) + timedelta(seconds=1)
+        y, mo, d, h, mi, s = t.year, t.month, t.day, t.hour, t.minute, t.second
+
+        while True:
+            # přenosy mezi složkami
+            if s > 59:
+                s = 0; mi += 1
+            if mi > 59:
+                mi = 0; h += 1
+            if h > 23:
+                h = 0; d += 1
+            if mo > 12:
+                mo = 1; y += 1
+            if y > YEAR_MAX:
+                return None
+
+            ny = _nextIn(self.years, y, YEAR_MAX)
+            if ny is None:
+                return None
+            if ny != y:
+                y, mo, d, h, mi, s = ny, 1, 1, 0, 0, 0
+                continue
+
+            nm = _nextIn(self.months, mo, 12)
+            if nm is None:
+                y, mo, d, h, mi, s = y + 1, 1, 1, 0, 0, 0
+                continue
+            if nm != mo:
+                mo, d, h, mi, s = nm, 1, 0, 0, 0
+                continue
+
+            ml = calendar.monthrange(y, mo)[1]
+            if d > ml:
+                mo, d, h, mi, s = mo + 1, 1, 0, 0, 0
+                continue
+            if not self._dayOk(y, mo, d, ml):
+                d, h, mi, s = d + 1, 0, 0, 0
+                continue
+
+            nh = _nextIn(self.hours, h, 23)
+            if nh is None:
+                d, h, mi, s = d + 1, 0, 0, 0
+                continue
+            if nh != h:
+                h, mi, s = nh, 0, 0
+                continue
+
+            nmi = _nextIn(self.minutes, mi, 59)
+            if nmi is None:
+                h, mi, s = h + 1, 0, 0
+                continue
+            if nmi != mi:
+                mi, s = nmi, 0
+                continue
+
+            ns = _nextIn(self.seconds, s, 59)
+            if ns is None:
+                mi, s = mi + 1, 0
+                continue
+
+            r = datetime(y, mo, d, h, mi, ns)
+            return r.replace(tzinfo=self.tz) if self.tz is not None else r
+
+    def nextElapses(self, count: int, after: datetime = None) -> List[datetime]:
+        """ vrátí až `count` příštích časů spuštění, viz nextElapse """
+        r: List[datetime] = []
+        t = after
+        for _ in range(max(0, int(count))):
+            t = self.nextElapse(t)
+            if t is None:
+                break
+            r.append(t)
+        return r
+
+    def elapsesUntil(self, start: datetime, end: datetime, limit: int = 100000) -> List[datetime]:
+        """ vrátí časy spuštění v intervalu (start, end>, max `limit` položek """
+        endTs = _ts(end)
+        r: List[datetime] = []
+        t = start
+        while len(r) < limit:
+            t = self.nextElapse(t)
+            if t is None or _ts(t) > endTs:
+                break
+            r.append(t)
+        return r
+
+    def normalized(self) -> str:
+        """ vrátí výraz v normalizovaném tvaru podobně jako `systemd-analyze calendar` """
+        def comp(v: Optional[List[int]], width: int) -> str:
+            if v is None:
+                return "*"
+            return ",".join(str(x).zfill(width) for x in v)
+        wd = ""
+        if self.weekdays is not None:
+            names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+            wd = ",".join(names[x] for x in self.weekdays) + " "
+        if self.daysFromEnd is not None:
+            date = f"{comp(self.years, 4)}-{comp(self.months, 2)}~{comp(self.daysFromEnd, 2)}"
+        else:
+            date = f"{comp(self.years, 4)}-{comp(self.months, 2)}-{comp(self.days, 2)}"
+        r = f"{wd}{date} {comp(self.hours, 2)}:{comp(self.minutes, 2)}:{comp(self.seconds, 2)}"
+        if self.tzName:
+            r += " " + self.tzName
+        return r
+
+    def __repr__(self):
+        return f"<c_calendarSpec '{self.spec}' -> '{self.normalized()}'>"
+
+def _ts(t: datetime) -> int:
+    """ unix čas, naivní datetime je místní čas """
+    return int(t.timestamp())
+
+def validateCalendar(spec: str, systemdFallback: bool = True) -> Union[str, None]:
+    """ ověří výraz OnCalendar
+
+    Lokální parser nepokrývá celou syntaxi systemd, pokud výraz odmítne a je k dispozici
+    `systemd-analyze`, rozhodne `systemd-analyze calendar`.
+
+    Parameters:
+        spec (str): výraz OnCalendar
+        systemdFallback (bool): při chybě lokálního parseru ověřit výraz přes systemd-analyze
+
+    Returns:
+        Union[str, None]: None pokud je výraz platný, jinak popis chyby
+    """
+    try:
+        c_calendarSpec(spec)
+        return None
+    except ValueError as e:
+        err = str(e)
+    if systemdFallback and isinstance(spec, str) and spec.strip():
+        import shutil
+        if shutil.which("systemd-analyze"):
+            from .helper import subprocessRun
+            r = subprocessRun(["systemd-analyze", "calendar", spec], capture_output=True, text=True)
+            if r.returncode == 0:
+                return None
+    return err
+
+class c_calendarCluster:
+    """ skupina časovačů spouštěných ve stejnou sekundu """
+    __slots__ = ("ts", "time", "units")
+
+    def __init__(self, ts: int, units: List[str]):
+        self.ts = ts
+        """unix čas"""
+        self.time = datetime.fromtimestamp(ts)
+        """místní čas"""
+        self.units = units
+
+    def __repr__(self):
+        return f"<c_calendarCluster {self.time} {len(self.units)} units>"
+
+def calendarClusters(
+    timers: Dict[str, Union[str, c_calendarSpec]],
+    start: datetime = None,
+    horizon: float = 86400,
+    minCount: int = 2,
+    maxPerTimer: int = 100000
+) -> List[c_calendarCluster]:
+    """ najde sekundy, ve kterých se spouští více časovačů najednou
+
+    RandomizedDelaySec ani AccuracySec se nezohledňují, výsledek odpovídá nejhoršímu případu.
+
+    Parameters:
+        timers (Dict[str, Union[str, c_calendarSpec]]): název časovače -> výraz OnCalendar
+        start (datetime): začátek sledovaného intervalu, None = teď
+        horizon (float): délka intervalu v sec
+        minCount (int): min počet časovačů ve stejné sekundě
+        maxPerTimer (int): max počet spuštění jednoho časovače v intervalu (např. pro `*:*:*`)
+
+    Returns:
+        List[c_calendarCluster]: shluky seřazené podle počtu časovačů sestupně a pak podle času
+
+    Raises:
+        ValueError: neplatný výraz některého časovače
+    """
+    if start is None:
+        start = datetime.now()
+    end = datetime.fromtimestamp(_ts(start) + horizon)
+    buckets: Dict[int, List[str]] = {}
+    for name, spec in timers.items():
+        if not isinstance(spec, c_calendarSpec):
+            spec = c_calendarSpec(spec)
+        seen = set()
+        for t in spec.elapsesUntil(start, end, maxPerTimer):
+            ts = _ts(t)
+            if ts in seen:
+                continue
+            seen.add(ts)
+            buckets.setdefault(ts, []).append(name)
+    r = [c_calendarCluster(ts, sorted(u)) for ts, u in buckets.items() if len(u) >= minCount]
+    r.sort(key=lambda c: (-len(c.units), c.ts))
+    return r
+
+def calendarReport(
+    timers: Dict[str, Union[str, c_calendarSpec]],
+    start: datetime = None,
+    horizon: float = 86400,
+    minCount: int = 2,
+    top: int = 20,
+    nextCount: int = 3
+) -> str:
+    """ textový report: příští spuštění každého časovače a největší shluky
+
+    Parameters:
+        timers (Dict[str, Union[str, c_calendarSpec]]): název časovače -> výraz OnCalendar
+        start (datetime): začátek, None = teď
+        horizon (float): délka intervalu pro hledání shluků v sec
+        minCount (int): min velikost shluku
+        top (int): počet zobrazených shluků
+        nextCount (int): počet příštích spuštění na časovač
+
+    Returns:
+        str: report
+    """
+    if start is None:
+        start = datetime.now()
+    specs: Dict[str, c_calendarSpec] = {}
+    lines: List[str] = []
+    for name, spec in sorted(timers.items()):
+        try:
+            specs[name] = spec if isinstance(spec, c_calendarSpec) else c_calendarSpec(spec)
+        except ValueError as e:
+            lines.append(f"{name}: INVALID '{spec}': {e}")
+    w = max([len(n) for n in specs] + [4])
+    for name, spec in specs.items():
+        nx = ", ".join(t.strftime("%Y-%m-%d %H:%M:%S") for t in spec.nextElapses(nextCount, start))
+        lines.append(f"{name.ljust(w)}  {spec.normalized()}  ->  {nx or '-'}")
+    cl = calendarClusters(specs, start, horizon, minCount)
+    lines.append("")
+    lines.append(f"Clusters (>= {minCount} timers in the same second, next {horizon / 3600:g} h): {len(cl)}")
+    for c in cl[:top]:
+        lines.append(f"  {c.time.strftime('%Y-%m-%d %H:%M:%S')}  {len(c.units):>4}  {', '.join(c.units)}")
+    if len(cl) > top:
+        lines.append(f"  ... {len(cl) - top} more")
+    return "\n".join(lines)
+
+TIMER_DIRS = ["/etc/systemd/system", "/run/systemd/system", "/lib/systemd/system", "/usr/lib/systemd/system"]
+
+def loadTimerSpecs(dirs: List[str] = None) -> Dict[str, str]:
+    """ načte výrazy OnCalendar z `.timer` souborů
+
+    Časovač s více řádky OnCalendar je vrácen jako 'name.timer#1', 'name.timer#2', ...
+    Soubor ve dřívějším adresáři přepisuje stejnojmenný soubor v pozdějším (jako v systemd).
+
+    Parameters:
+        dirs (List[str]): adresáře, None = TIMER_DIRS
+
+    Returns:
+        Dict[str, str]: název -> výraz
+    """
+    if dirs is None:
+        dirs = TIMER_DIRS
+    seen = set()
+    r: Dict[str, str] = {}
+    for d in dirs:
+        try:
+            names = sorted(os.listdir(d))
+        except OSError:
+            continue
+        for fn in names:
+            if not fn.endswith(".timer") or fn in seen:
+                continue
+            seen.add(fn)
+            try:
+                with open(os.path.join(d, fn), "r") as f:
+                    specs = [l.split("=", 1)[1].strip() for l in f if l.strip().startswith("OnCalendar=")]
+            except OSError:
+                continue
+            specs = [s for s in specs if s]
+            if len(specs) == 1:
+                r[fn] = specs[0]
+            else:
+                for i, s in enumerate(specs, 1):
+                    r[f"{fn}#{i}"] = s
+    return r
+
+if __name__ == "__main__":
+    import sys
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    print(calendarReport(loadTimerSpecs(), horizon=hours * 3600))
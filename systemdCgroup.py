@@ -0,0 +1,256 @@
+"""Vzorkování využití prostředků služeb přímo z cgroup v2 souborů.
+
+Místo opakovaného `systemctl show` čte pro každou jednotku soubory v jejím adresáři
+cgroup (`memory.current`, `cpu.stat`, `io.stat`). Soubory zůstávají otevřené a čtou se
+přes `os.pread` od offsetu 0 (stejně jako `mem_stats.c_memStatsReader`), cesta ke cgroup
+se zjistí jedním hromadným dotazem `c_unit.bulk_status(..., properties=["ControlGroup"])`.
+
+Z rozdílů mezi vzorky se počítá CPU % (100 % = jedno jádro), rychlost čtení/zápisu
+v B/s a IOPS. Hodnoty se ukládají do kruhového bufferu nad `array('d')`.
+
+Example:
+    >>> smp = c_cgroupSampler(["cron.service", "ssh.service"], interval=1.0, capacity=300)
+    >>> smp.start()
+    >>> ...
+    >>> print(smp.last("cron.service"))
+    >>> open("usage.json", "w").write(smp.toJSON())
+"""
+
+import os, time, json, threading
+from array import array
+from typing import List, Union, Dict, Optional
+
+from .helper import getLogger
+from .mem_stats import CGROUP_ROOT
+
+log = getLogger(__name__)
+
+_READ_SIZE = 4096
+
+CGROUP_SERIES_FIELDS = ("ts", "cpu", "mem", "rbps", "wbps", "riops", "wiops")
+"""ts = unix čas, cpu = %, mem = B, rbps/wbps = B/s, riops/wiops = operace/s"""
+
+class c_cgroupSeries:
+    """ kruhový buffer vzorků jedné jednotky, každé pole je `array('d')` pevné délky """
+
+    __slots__ = ("capacity", "count", "_pos") + CGROUP_SERIES_FIELDS
+
+    def __init__(self, capacity: int = 300):
+        self.capacity = max(1, int(capacity))
+        self.count = 0
+        """počet platných vzorků (max capacity)"""
+        self._pos = 0
+        """index pro další zápis"""
+        for f in CGROUP_SERIES_FIELDS:
+            setattr(self, f, array('d', bytes(8 * self.capacity)))
+
+    def append(self, ts: float, cpu: float, mem: float, rbps: float, wbps: float, riops: float, wiops: float) -> None:
+        i = self._pos
+        self.ts[i] = ts
+        self.cpu[i] = cpu
+        self.mem[i] = mem
+        self.rbps[i] = rbps
+        self.wbps[i] = wbps
+        self.riops[i] = riops
+        self.wiops[i] = wiops
+        self._pos = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self, field: str) -> List[float]:
+        """ vrátí hodnoty pole od nejstaršího vzorku """
+        a = getattr(self, field)
+        if self.count < self.capacity:
+            return a[:self.count].tolist()
+        return a[self._pos:].tolist() + a[:self._pos].tolist()
+
+    def last(self) -> Optional[Dict[str, float]]:
+        """ poslední vzorek jako dict nebo None """
+        if not self.count:
+            return None
+        i = (self._pos - 1) % self.capacity
+        return {f: getattr(self, f)[i] for f in CGROUP_SERIES_FIELDS}
+
+    def asDict(self) -> Dict[str, List[float]]:
+        return {f: self.values(f) for f in CGROUP_SERIES_FIELDS}
+
+class _unitFiles:
+    """ otevřené soubory cgroup jedné jednotky a poslední čítače """
+    __slots__ = ("path", "fdMem", "fdCpu", "fdIo", "prevTs", "prevCpu", "prevIo")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fdMem = os.open(os.path.join(path, "memory.current"), os.O_RDONLY)
+        self.fdCpu = os.open(os.path.join(path, "cpu.stat"), os.O_RDONLY)
+        try:
+            self.fdIo = os.open(os.path.join(path, "io.stat"), os.O_RDONLY)
+        except OSError:
+            self.fdIo = -1  # io controller nemusí být pro cgroup zapnutý
+        self.prevTs = 0.0
+        self.prevCpu = 0
+        self.prevIo = (0, 0, 0, 0)
+
+    def close(self) -> None:
+        for fd in (self.fdMem, self.fdCpu, self.fdIo):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.fdMem = self.fdCpu = self.fdIo = -1
+
+def _parseCpuUsec(raw: bytes) -> int:
+    for line in raw.split(b"\n"):
+        if line.startswith(b"usage_usec "):
+            return int(line[11:])
+    return 0
+
+def _parseIo(raw: bytes) -> tuple:
+    """ součet přes všechna zařízení: (rbytes, wbytes, rios, wios) """
+    rb = wb = ri = wi = 0
+    for line in raw.split(b"\n"):
+        for p in line.split()[1:]:
+            k, _, v = p.partition(b"=")
+            if k == b"rbytes":
+                rb += int(v)
+            elif k == b"wbytes":
+                wb += int(v)
+            elif k == b"rios":
+                ri += int(v)
+            elif k == b"wios":
+                wi += int(v)
+    return rb, wb, ri, wi
+
+class c_cgroupSampler:
+    """ periodické vzorkování cgroup souborů pro více jednotek """
+
+    def __init__(self, units: List[str], interval: float = 1.0, capacity: int = 300, resolveMaxDelay: float = 60.0):
+        """
+        Parameters:
+            units (List[str]): plné názvy jednotek
+            interval (float): interval vzorkování v sec
+            capacity (int): počet uchovaných vzorků na jednotku
+            resolveMaxDelay (float): max odstup v sec mezi pokusy zjistit cgroup neběžící jednotky,
+                odstup se od `interval` při každém neúspěchu zdvojnásobí
+        """
+        self.interval = float(interval)
+        self.resolveMaxDelay = float(resolveMaxDelay)
+        self.capacity = int(capacity)
+        self.units: List[str] = list(units)
+        self.series: Dict[str, c_cgroupSeries] = {u: c_cgroupSeries(self.capacity) for u in self.units}
+        self._files: Dict[str, _unitFiles] = {}
+        self._retry: Dict[str, tuple] = {}
+        """jednotka -> (monotonic čas dalšího pokusu, odstup) pro jednotky bez cgroup"""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Union[threading.Thread, None] = None
+
+    def _resolve(self, units: List[str]) -> None:
+        """ zjistí cesty cgroup jedním voláním systemctl a otevře soubory
+
+        Jednotky bez cgroup (neběží) se zkouší znovu s rostoucím odstupem, aby se systemctl
+        nespouštěl při každém vzorku.
+        """
+        from .systemdService import c_unit
+        now = time.monotonic()
+        units = [u for u in units if self._retry.get(u, (0.0,))[0] <= now]
+        if not units:
+            return
+        st = c_unit.bulk_status(units, properties=["ControlGroup"])
+        for u in units:
+            cg = getattr(st.get(u), "ControlGroup", "") if u in st else ""
+            if cg:
+                try:
+                    self._files[u] = _unitFiles(os.path.join(CGROUP_ROOT, cg.lstrip("/")))
+                    self._retry.pop(u, None)
+                    continue
+                except OSError:
+                    pass
+            # jednotka neběží
+            delay = self._retry[u][1] * 2 if u in self._retry else self.interval
+            delay = min(max(delay, self.interval), self.resolveMaxDelay)
+            self._retry[u] = (now + delay, delay)
+
+    def sample(self) -> None:
+        """ načte jeden vzorek pro všechny jednotky """
+        missing = [u for u in self.units if u not in self._files]
+        if missing:
+            self._resolve(missing)
+        now = time.time()
+        for u, f in list(self._files.items()):
+            try:
+                mem = int(os.pread(f.fdMem, 64, 0))
+                cpu = _parseCpuUsec(os.pread(f.fdCpu, _READ_SIZE, 0))
+                io = _parseIo(os.pread(f.fdIo, _READ_SIZE, 0)) if f.fdIo >= 0 else (0, 0, 0, 0)
+            except (OSError, ValueError):
+                # cgroup zanikla (stop/restart jednotky), při dalším vzorku se zjistí znovu
+                f.close()
+                del self._files[u]
+                continue
+            if f.prevTs:
+                dt = now - f.prevTs
+                if dt > 0:
+                    pio = f.prevIo
+                    with self._lock:
+                        self.series[u].append(
+                            now,
+                            (cpu - f.prevCpu) / (dt * 10000.0),
+                            float(mem),
+                            (io[0] - pio[0]) / dt,
+                            (io[1] - pio[1]) / dt,
+                            (io[2] - pio[2]) / dt,
+                            (io[3] - pio[3]) / dt,
+                        )
+            f.prevTs = now
+            f.prevCpu = cpu
+            f.prevIo = io
+
+    def start(self) -> 'c_cgroupSampler':
+        """ spustí vzorkování ve vlákně, vrací self """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cgroupSampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """ zastaví vlákno a zavře soubory """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+        self._thread = None
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        self._retry = {}
+
+    def _run(self) -> None:
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                log.error(f"cgroup sampler: {e}")
+            next_t += self.interval
+            self._stop.wait(max(0.0, next_t - time.monotonic()))
+
+    def last(self, unit: str) -> Optional[Dict[str, float]]:
+        """ poslední vzorek jednotky """
+        with self._lock:
+            s = self.series.get(unit)
+            return s.last() if s is not None else None
+
+    def asDict(self) -> Dict[str, Dict[str, List[float]]]:
+        """ všechny série jako dict jednotka -> pole -> hodnoty """
+        with self._lock:
+            return {u: s.asDict() for u, s in self.series.items()}
+
+    def toJSON(self) -> str:
+        """ export všech sérií do JSON """
+        return json.dumps({"interval": self.interval, "fields": CGROUP_SERIES_FIELDS, "units": self.asDict()})
+
+    def __enter__(self) -> 'c_cgroupSampler':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,401 @@
+# cspell:ignore jeepney,sasbttttuii,sasasttttuii,ssssssouso
+
+"""D-Bus backend pro systemdService.
+
+Komunikuje přímo s `org.freedesktop.systemd1` přes D-Bus (knihovna `jeepney`),
+takže dotazy na stav ani akce (start/stop/enable/...) nespouští proces `systemctl`.
+
+- jedno spojení na sběrnici je sdílené (viz `getSystemdDbus`), volání jsou chráněna zámkem
+- všechny vlastnosti jednotky se načtou jedním voláním `Properties.GetAll("")`
+- cesty objektů jednotek se cachují podle názvu jednotky
+- backend se vybírá pro každou instanci `c_unit` pomocí `c_unit.setBackend`
+
+Pro testy lze místo systémové sběrnice zadat adresu jiné sběrnice
+(např. `unix:path=/tmp/test_bus`), na které běží náhradní služba se stejným rozhraním.
+
+Example:
+    >>> from libs.JBLibs.systemdService import c_service
+    >>> svc = c_service("cron")
+    >>> svc.setBackend("dbus")
+    >>> print(svc.fullStatus())
+
+Spuštění benchmarku:
+    python -m libs.JBLibs.systemdDbus cron.service 200
+"""
+
+import threading, time
+from typing import List, Union, Dict, Tuple, Any
+from datetime import datetime
+
+from .lng.default import *
+from .helper import loadLng, getLogger
+loadLng()
+
+from .systemdService import (
+    c_unit_status, c_service_status, c_timer_status, c_unitsRetRow, c_unitsFilesRetRow,
+    convert_value, compileStatusParser, c_unit
+)
+from .format import strTime
+
+try:
+    from jeepney import DBusAddress, new_method_call, DBusErrorResponse
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:
+    DBusAddress = None
+    new_method_call = None
+    DBusErrorResponse = Exception
+    open_dbus_connection = None
+
+log = getLogger(__name__)
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_PATH = "/org/freedesktop/systemd1"
+IFACE_MANAGER = "org.freedesktop.systemd1.Manager"
+IFACE_UNIT = "org.freedesktop.systemd1.Unit"
+IFACE_JOB = "org.freedesktop.systemd1.Job"
+IFACE_PROPERTIES = "org.freedesktop.DBus.Properties"
+
+UINT64_MAX = 18446744073709551615
+"""systemd tak označuje nenastavenou hodnotu, `systemctl show` vypíše '[not set]'"""
+
+JOB_TIMEOUT = 90.0
+"""výchozí max čekání na dokončení jobu v sec"""
+
+def haveDbus() -> bool:
+    """ zjistí zda je k dispozici python modul jeepney """
+    return open_dbus_connection is not None
+
+def _unwrapVariant(v: Any) -> Any:
+    """ jeepney vrací variant jako (signatura, hodnota) """
+    if isinstance(v, tuple) and len(v) == 2 and isinstance(v[0], str):
+        return v[1]
+    return v
+
+def _fmtExec(v: list) -> str:
+    """ převede ExecStart / ExecStartEx (a(sasbttttuii) / a(sasasttttuii)) na text jako systemctl show """
+    r = []
+    for x in v:
+        if not isinstance(x, (tuple, list)) or len(x) < 3:
+            continue
+        path, argv, flag = x[0], x[1], x[2]
+        if isinstance(flag, bool):
+            f = f"ignore_errors={'yes' if flag else 'no'}"
+        else:
+            f = f"flags={' '.join(flag)}"
+        r.append(f"{{ path={path} ; argv[]={' '.join(argv)} ; {f} }}")
+    return " ".join(r)
+
+def _toShowValue(key: str, v: Any) -> Any:
+    """ upraví nativní D-Bus hodnotu na tvar, který zpracuje convert_value stejně jako text z `systemctl show` """
+    v = _unwrapVariant(v)
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, int):
+        if v == UINT64_MAX:
+            return None
+        return v
+    if isinstance(v, list):
+        if key in ("ExecStart", "ExecStartEx"):
+            return _fmtExec(v)
+        if all(isinstance(x, str) for x in v):
+            return " ".join(v)
+        return str(v)
+    return v
+
+def dbusPropsToStatus(props: Dict[str, Any], status: c_unit_status) -> bool:
+    """ naplní status z výsledku GetAll
+
+    Hodnoty se převádí podle anotací třídy statusu stejně jako při parsování `systemctl show`,
+    časové údaje (usec) jdou přímo do `strTime`, časové značky se převedou na `datetime`.
+
+    Parameters:
+        props (Dict[str, Any]): vlastnosti z GetAll
+        status (c_unit_status): objekt pro uložení informací
+
+    Returns:
+        bool: True pokud byl nastaven alespoň jeden atribut
+    """
+    set: bool = False
+    for key, (attr_type, _) in compileStatusParser(status.__class__).items():
+        if key not in props:
+            continue
+        v = _toShowValue(key, props[key])
+        try:
+            if attr_type is datetime or (hasattr(attr_type, '__args__') and datetime in attr_type.__args__):
+                v = datetime.fromtimestamp(v / 1000000) if v else None
+                setattr(status, key, v)
+            elif isinstance(v, bool):
+                setattr(status, key, v)
+            else:
+                setattr(status, key, convert_value(v, attr_type))
+            set = True
+        except (ValueError, TypeError, OverflowError):
+            setattr(status, key, v)
+            set = True
+    if not set:
+        return False
+    x = getattr(status, 'ActiveEnterTimestamp', None)
+    if isinstance(x, datetime):
+        status.Uptime = strTime(str(int(datetime.now().timestamp() - x.timestamp())) + "s")
+    return True
+
+class c_systemdDbus:
+    """ spojení na systemd přes D-Bus
+
+    Instance drží jedno spojení na sběrnici, pro sdílení použijte `getSystemdDbus`.
+    """
+
+    bus: str
+    """'SYSTEM', 'SESSION' nebo adresa sběrnice"""
+
+    timeout: float
+    """timeout jednoho volání v sec"""
+
+    def __init__(self, bus: str = "SYSTEM", timeout: float = 25.0):
+        """
+        Parameters:
+            bus (str): 'SYSTEM', 'SESSION' nebo adresa sběrnice např. 'unix:path=/run/test_bus'
+            timeout (float): timeout jednoho volání v sec
+
+        Raises:
+            RuntimeError: pokud není k dispozici modul jeepney
+        """
+        if not haveDbus():
+            raise RuntimeError(TXT_C_UNIT_noDbus)
+        self.bus = bus
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._conn = None
+        self._paths: Dict[str, str] = {}
+        """název jednotky -> cesta objektu"""
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = open_dbus_connection(bus=self.bus)
+        return self._conn
+
+    def close(self) -> None:
+        """ zavře spojení """
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+            self._conn = None
+            self._paths = {}
+
+    def call(self, path: str, interface: str, method: str, signature: str = None, body: tuple = ()) -> tuple:
+        """ zavolá metodu a vrátí tělo odpovědi
+
+        Raises:
+            DBusErrorResponse: chyba vrácená službou
+            OSError: chyba spojení, spojení se zahodí a při dalším volání se otevře znovu
+        """
+        addr = DBusAddress(path, bus_name=SYSTEMD_BUS_NAME, interface=interface)
+        msg = new_method_call(addr, method, signature, body)
+        with self._lock:
+            try:
+                reply = self._connection().send_and_get_reply(msg, timeout=self.timeout)
+            except OSError:
+                self._conn = None
+                raise
+        if reply.header.message_type.name == "error":
+            raise DBusErrorResponse(reply)
+        return reply.body
+
+    def _manager(self, method: str, signature: str = None, body: tuple = ()) -> tuple:
+        return self.call(SYSTEMD_PATH, IFACE_MANAGER, method, signature, body)
+
+    def unitPath(self, unitName: str) -> str:
+        """ vrátí cestu objektu jednotky, LoadUnit vrátí cestu i pro neexistující jednotku (LoadState=not-found) """
+        p = self._paths.get(unitName)
+        if p is None:
+            p = self._manager("LoadUnit", "s", (unitName,))[0]
+            self._paths[unitName] = p
+        return p
+
+    def pathToUnit(self, path: str) -> Union[str, None]:
+        """ vrátí název jednotky podle cesty objektu, jen pro jednotky již načtené přes unitPath """
+        for n, p in list(self._paths.items()):
+            if p == path:
+                return n
+        return None
+
+    def getAll(self, unitName: str) -> Dict[str, Any]:
+        """ vrátí všechny vlastnosti jednotky (všechna rozhraní) jedním voláním GetAll("") """
+        path = self.unitPath(unitName)
+        try:
+            props = self.call(path, IFACE_PROPERTIES, "GetAll", "s", ("",))[0]
+        except DBusErrorResponse:
+            # objekt mohl být uvolněn (GC jednotek), zkusíme znovu načíst cestu
+            self._paths.pop(unitName, None)
+            path = self.unitPath(unitName)
+            props = self.call(path, IFACE_PROPERTIES, "GetAll", "s", ("",))[0]
+        return props
+
+    def status(self, unitName: str, status: c_unit_status = None) -> Union[c_unit_status, None]:
+        """ obdoba c_unit.status, vrátí None pokud se nepodaří načíst žádná vlastnost """
+        if status is None:
+            status = c_unit._statusClassFor(unitName)()
+        try:
+            props = self.getAll(unitName)
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus GetAll {unitName}: {e}")
+            return None
+        if not dbusPropsToStatus(props, status):
+            return None
+        return status
+
+    def bulk_status(self, units: List[str]) -> Dict[str, c_unit_status]:
+        """ obdoba c_unit.bulk_status, jedno GetAll na jednotku přes stejné spojení """
+        ret: Dict[str, c_unit_status] = {}
+        for n in units:
+            st = self.status(n)
+            if st is not None:
+                ret[n] = st
+        return ret
+
+    def units(self, names: List[str]) -> List[c_unitsRetRow]:
+        """ obdoba c_unit.s_units přes ListUnitsByNames """
+        try:
+            rows = self._manager("ListUnitsByNames", "as", (list(names),))[0]
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus ListUnitsByNames: {e}")
+            return []
+        x = []
+        for r in rows:
+            if r[2] == "not-found":
+                continue
+            u = c_unitsRetRow()
+            u.unit, u.description, u.load, u.active, u.sub = r[0], r[1], r[2], r[3], r[4]
+            x.append(u)
+        return x
+
+    def unitFiles(self, patterns: List[str]) -> List[c_unitsFilesRetRow]:
+        """ obdoba c_unit.s_units_files přes ListUnitFilesByPatterns, vendor preset se nevyplňuje """
+        try:
+            rows = self._manager("ListUnitFilesByPatterns", "asas", ([], list(patterns)))[0]
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus ListUnitFilesByPatterns: {e}")
+            return []
+        x = []
+        for path, state in rows:
+            u = c_unitsFilesRetRow()
+            u.unit_file = path.rsplit("/", 1)[-1]
+            u.enabled_str = state
+            u.enabled = state == "enabled"
+            x.append(u)
+        return x
+
+    def waitJob(self, jobPath: str, timeout: float = JOB_TIMEOUT) -> bool:
+        """ čeká až job zmizí ze sběrnice (dokončen), vrací False při timeoutu """
+        end = time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            try:
+                self.call(jobPath, IFACE_PROPERTIES, "Get", "ss", (IFACE_JOB, "State"))
+            except DBusErrorResponse:
+                return True
+            if time.monotonic() >= end:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def _job(self, method: str, unitName: str, mode: str = "replace", wait: bool = True) -> bool:
+        try:
+            job = self._manager(method, "ss", (unitName, mode))[0]
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus {method} {unitName}: {e}")
+            return False
+        if wait:
+            return self.waitJob(job)
+        return True
+
+    def start(self, unitName: str, wait: bool = True) -> bool:
+        return self._job("StartUnit", unitName, wait=wait)
+
+    def stop(self, unitName: str, wait: bool = True) -> bool:
+        return self._job("StopUnit", unitName, wait=wait)
+
+    def restart(self, unitName: str, wait: bool = True) -> bool:
+        return self._job("RestartUnit", unitName, wait=wait)
+
+    def enable(self, unitNames: Union[str, List[str]]) -> bool:
+        """ EnableUnitFiles + Reload (jako `systemctl enable`) """
+        if isinstance(unitNames, str):
+            unitNames = [unitNames]
+        try:
+            self._manager("EnableUnitFiles", "asbb", (list(unitNames), False, False))
+            self.reload()
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus EnableUnitFiles {unitNames}: {e}")
+            return False
+        return True
+
+    def disable(self, unitNames: Union[str, List[str]]) -> bool:
+        """ DisableUnitFiles + Reload (jako `systemctl disable`) """
+        if isinstance(unitNames, str):
+            unitNames = [unitNames]
+        try:
+            self._manager("DisableUnitFiles", "asb", (list(unitNames), False))
+            self.reload()
+        except DBusErrorResponse as e:
+            log.error(f"D-Bus DisableUnitFiles {unitNames}: {e}")
+            return False
+        return True
+
+    def reload(self) -> None:
+        """ obdoba `systemctl daemon-reload`, metoda se vrátí až po dokončení reloadu """
+        self._manager("Reload")
+        self._paths = {}
+
+_shared: Dict[str, c_systemdDbus] = {}
+_sharedLock = threading.Lock()
+
+def getSystemdDbus(bus: str = "SYSTEM") -> c_systemdDbus:
+    """ vrátí sdílenou instanci c_systemdDbus pro danou sběrnici (jedno spojení pro celý proces) """
+    with _sharedLock:
+        x = _shared.get(bus)
+        if x is None:
+            x = c_systemdDbus(bus)
+            _shared[bus] = x
+        return x
+
+def benchStatus(unitName: str, count: int = 100, bus: str = "SYSTEM") -> Dict[str, float]:
+    """ porovná latenci status() přes systemctl a přes D-Bus
+
+    Parameters:
+        unitName (str): název jednotky včetně přípony
+        count (int): počet opakování
+        bus (str): sběrnice pro D-Bus backend
+
+    Returns:
+        Dict[str, float]: průměrná latence v ms pro 'systemctl' a 'dbus' a poměr 'speedup'
+    """
+    from .systemdService import subprocessRun
+    st = c_unit._statusClassFor(unitName)
+    t = time.perf_counter()
+    for _ in range(count):
+        r = subprocessRun(["systemctl", "show", "--plain", "--no-pager", unitName], capture_output=True, text=True)
+        c_unit._parseShow(r.stdout.splitlines(), st())
+    fork = (time.perf_counter() - t) / count * 1000
+
+    db = getSystemdDbus(bus)
+    db.status(unitName)  # otevření spojení a LoadUnit mimo měření
+    t = time.perf_counter()
+    for _ in range(count):
+        db.status(unitName, st())
+    dbus = (time.perf_counter() - t) / count * 1000
+    return {
+        "systemctl": fork,
+        "dbus": dbus,
+        "speedup": fork / dbus if dbus else 0.0,
+    }
+
+if __name__ == "__main__":
+    import sys
+    unit = sys.argv[1] if len(sys.argv) > 1 else "dbus.service"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    r = benchStatus(unit, n)
+    print(f"{unit} x{n}: systemctl {r['systemctl']:.3f} ms, dbus {r['dbus']:.3f} ms, speedup {r['speedup']:.1f}x")
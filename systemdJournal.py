@@ -0,0 +1,190 @@
+"""Čtení systemd journalu jednotky bez bufferování celého výstupu.
+
+`journalStream` spustí `journalctl -o json` a ze stdout čte po řádcích, každý řádek
+je jeden záznam, který se hned naparsuje do `c_journalEntry` a vrátí z generátoru.
+Při ukončení generátoru (break, close, GC) se journalctl ukončí.
+
+`c_journalRing` drží posledních N záznamů pro každou jednotku.
+
+Example:
+    >>> ring = c_journalRing(200)
+    >>> for e in c_service("cron").journal(follow=True, lines=50, ring=ring):
+    ...     print(e.time, e.priority, e.message)
+"""
+
+import json, subprocess, time
+from collections import deque
+from datetime import datetime
+from typing import List, Union, Dict, Iterator, Deque
+
+from .helper import subprocessRecord
+
+JOURNAL_FIELDS = "MESSAGE,PRIORITY,_PID,SYSLOG_IDENTIFIER,_SYSTEMD_UNIT,_HOSTNAME"
+"""pole vyžádaná přes --output-fields, __CURSOR a časové značky posílá journalctl vždy"""
+
+class c_journalEntry:
+    """ jeden záznam journalu """
+    __slots__ = ("ts", "priority", "message", "pid", "unit", "identifier", "hostname", "cursor")
+
+    def __init__(self):
+        self.ts: int = 0
+        """__REALTIME_TIMESTAMP v usec"""
+        self.priority: int = 6
+        """0=emerg .. 7=debug, výchozí 6=info"""
+        self.message: str = ""
+        self.pid: int = 0
+        self.unit: str = ""
+        self.identifier: str = ""
+        self.hostname: str = ""
+        self.cursor: str = ""
+
+    @property
+    def time(self) -> datetime:
+        """ místní čas záznamu """
+        return datetime.fromtimestamp(self.ts / 1000000)
+
+    def __repr__(self):
+        return f"<c_journalEntry {self.time} p{self.priority} {self.unit} {self.message[:40]!r}>"
+
+def _field(v) -> str:
+    """ journalctl posílá binární hodnoty jako pole čísel, více hodnot jako pole řetězců """
+    if isinstance(v, list):
+        if v and isinstance(v[0], int):
+            return bytes(v).decode("utf-8", "replace")
+        return "\n".join(_field(x) for x in v)
+    return "" if v is None else str(v)
+
+def parseJournalLine(line: Union[str, bytes]) -> Union[c_journalEntry, None]:
+    """ naparsuje jeden řádek výstupu `journalctl -o json`
+
+    Returns:
+        c_journalEntry|None: záznam nebo None pro prázdný / neplatný řádek
+    """
+    if not line or not line.strip():
+        return None
+    try:
+        d = json.loads(line)
+    except ValueError:
+        return None
+    e = c_journalEntry()
+    try:
+        e.ts = int(d.get("__REALTIME_TIMESTAMP", 0))
+    except (TypeError, ValueError):
+        pass
+    p = d.get("PRIORITY")
+    if p is not None:
+        try:
+            e.priority = int(p)
+        except (TypeError, ValueError):
+            pass
+    e.message = _field(d.get("MESSAGE"))
+    pid = d.get("_PID")
+    if pid:
+        try:
+            e.pid = int(pid)
+        except (TypeError, ValueError):
+            pass
+    e.unit = _field(d.get("_SYSTEMD_UNIT"))
+    e.identifier = _field(d.get("SYSLOG_IDENTIFIER"))
+    e.hostname = _field(d.get("_HOSTNAME"))
+    e.cursor = _field(d.get("__CURSOR"))
+    return e
+
+class c_journalRing:
+    """ posledních N záznamů pro každou jednotku """
+
+    def __init__(self, maxLen: int = 500):
+        """
+        Parameters:
+            maxLen (int): max počet záznamů na jednotku
+        """
+        self.maxLen = max(1, int(maxLen))
+        self._rings: Dict[str, Deque[c_journalEntry]] = {}
+
+    def add(self, entry: c_journalEntry, unitName: str = None) -> None:
+        """ přidá záznam, jednotka se bere z parametru nebo ze záznamu """
+        u = unitName or entry.unit
+        r = self._rings.get(u)
+        if r is None:
+            r = deque(maxlen=self.maxLen)
+            self._rings[u] = r
+        r.append(entry)
+
+    def get(self, unitName: str) -> List[c_journalEntry]:
+        """ vrátí záznamy jednotky od nejstaršího """
+        r = self._rings.get(unitName)
+        return list(r) if r is not None else []
+
+    def units(self) -> List[str]:
+        return list(self._rings.keys())
+
+    def clear(self, unitName: str = None) -> None:
+        """ smaže záznamy jednotky, None = všech """
+        if unitName is None:
+            self._rings.clear()
+        else:
+            self._rings.pop(unitName, None)
+
+    def __len__(self) -> int:
+        return sum(len(r) for r in self._rings.values())
+
+def journalStream(
+    unitName: str,
+    follow: bool = True,
+    since: Union[str, datetime, None] = None,
+    lines: Union[int, None] = None,
+    priority: Union[int, str, None] = None,
+    ring: c_journalRing = None
+) -> Iterator[c_journalEntry]:
+    """ generátor záznamů journalu jednotky
+
+    Parameters:
+        unitName (str): plný název jednotky
+        follow (bool): čekat na nové záznamy (--follow), jinak skončí po vypsání existujících
+        since (str|datetime): od kdy, např. '-1h', 'today', datetime
+        lines (int): počet posledních záznamů (-n)
+        priority (int|str): max priorita (-p), např. 3 nebo 'err'
+        ring (c_journalRing): pokud je zadaný, každý záznam se do něj uloží
+
+    Yields:
+        c_journalEntry: záznamy v pořadí jak je posílá journalctl
+    """
+    cmd = ["journalctl", "--no-pager", "-o", "json", f"--output-fields={JOURNAL_FIELDS}", "-u", unitName]
+    if follow:
+        cmd.append("--follow")
+    if since is not None:
+        if isinstance(since, datetime):
+            since = since.strftime("%Y-%m-%d %H:%M:%S")
+        cmd += ["--since", str(since)]
+    if lines is not None:
+        cmd += ["-n", str(int(lines))]
+    if priority is not None:
+        cmd += ["-p", str(priority)]
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    nBytes = 0
+    try:
+        readline = proc.stdout.readline
+        while True:
+            line = readline()
+            if not line:
+                break
+            nBytes += len(line)
+            e = parseJournalLine(line)
+            if e is None:
+                continue
+            if ring is not None:
+                ring.add(e, unitName)
+            yield e
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        proc.stdout.close()
+        # Popen kvůli průběžnému čtení, do statistik helperu se započítá až po skončení
+        subprocessRecord(cmd, time.perf_counter() - t0, proc.returncode, nBytes)
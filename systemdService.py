@@ -1,16 +1,18 @@
 # cspell:ignore dateutil,infu,timeru
 
 from .lng.default import * 
-from .helper import loadLng,haveSystemd
+from .helper import loadLng,haveSystemd,subprocessRun
 loadLng()
 
-import subprocess,os
-from typing import List, Union, Dict
+import subprocess,os,time,copy
+from typing import List, Union, Dict, Iterator
 from datetime import datetime
 from dateutil.parser import parse as parser_parse
 from .format import strTime,strTimeUSec,bytesVal,bytesTx
 from .term import en_color,text_color
 from .jbjh import JBJH
+from .systemdCalendar import validateCalendar
+from .systemdJournal import journalStream, c_journalEntry, c_journalRing
 
 class c_unitsRetRow:
     """ slouží pro zobrazení výsledků z show"""
@@ -73,158 +75,180 @@ class io_bytes(bytesVal):
 class c_unit_status:
     """ slouží pro zobrazení výsledků z show - není zaměřeno na službu
     jen pomocná pro c_unit, jinak je přepsáno přímo v c_service_status nebo c_timer_status
+    
+    autoload, anotace nutné - parsují se jen deklarované vlastnosti, viz compileStatusParser
     """
+    __slots__ = (
+        "Names", "LoadState", "ActiveState", "SubState",
+        "CanStart", "CanStop", "CanReload", "CanIsolate", "CanFreeze",
+        "UnitFileState", "UnitFilePreset", "Uptime",
+    )
     
-    Names:str = "unknown"
+    Names:str
     
-    LoadState: str = "unknown"
-    ActiveState: str = "unknown"
-    SubState: str = "unknown"
+    LoadState: str
+    ActiveState: str
+    SubState: str
         
-    CanStart:bool = False
-    CanStop:bool = False
-    CanReload:bool = False
-    CanIsolate:bool=False
-    CanFreeze:bool = False
+    CanStart:bool
+    CanStop:bool
+    CanReload:bool
+    CanIsolate:bool
+    CanFreeze:bool
         
-    UnitFileState:bool = False
+    UnitFileState:bool
     """Označuje skutečný stav jednotky, tedy zda je aktuálně enabled, disabled, static, nebo masked."""
     
-    UnitFilePreset:bool = False
+    UnitFilePreset:bool
     """Určuje výchozí doporučené nastavení pro povolení nebo zakázání jednotky, jak je definováno ve preset souboru."""
     
-    Uptime:strTime=strTime(0)
+    Uptime:strTime
     
     def __init__(self) -> None:
-        self.Names = self.Names
-        self.LoadState = self.LoadState
-        self.ActiveState = self.ActiveState
-        self.SubState = self.SubState
-        self.CanStart = self.CanStart
-        self.CanStop = self.CanStop
-        self.CanReload = self.CanReload
-        self.CanIsolate = self.CanIsolate
-        self.CanFreeze = self.CanFreeze
-        self.UnitFileState = self.UnitFileState
-        self.UnitFilePreset = self.UnitFilePreset
-        self.Uptime = self.Uptime
+        self.Names = "unknown"
+        self.LoadState = "unknown"
+        self.ActiveState = "unknown"
+        self.SubState = "unknown"
+        self.CanStart = False
+        self.CanStop = False
+        self.CanReload = False
+        self.CanIsolate = False
+        self.CanFreeze = False
+        self.UnitFileState = False
+        self.UnitFilePreset = False
+        self.Uptime = strTime(0)
 
    
 class c_service_status(c_unit_status):
     """Status systemd služby (service unit).
     autoload, anotace nutné
     """
+    __slots__ = (
+        "Id", "MainPID", "ExecMainPID",
+        "RestartUSec", "TimeoutStartUSec", "TimeoutStopUSec", "TimeoutAbortUSec",
+        "UID", "User", "GID", "Group",
+        "ActiveEnterTimestamp",
+        "ExecStart", "ExecStartEx",
+        "MemoryCurrent", "MemoryAvailable", "CPUUsageNSec", "TasksCurrent",
+        "IOReadBytes", "IOReadOperations", "IOWriteBytes", "IOWriteOperations",
+        "WorkingDirectory", "RootDirectory", "Nice", "FragmentPath", "StartLimitIntervalUSec",
+        "ControlGroup",
+    )
 
-    Id: str = ""
-    MainPID: int = 0
-    ExecMainPID : int = 0
-    RestartUSec: strTime = 0
-    TimeoutStartUSec: strTime = 0
-    TimeoutStopUSec: strTime = 0
-    TimeoutAbortUSec: strTime = 0
-    UID: int = 0
-    User: str = ""
-    GID: int = 0
-    Group: str = ""
+    Id: str
+    MainPID: int
+    ExecMainPID : int
+    RestartUSec: strTime
+    TimeoutStartUSec: strTime
+    TimeoutStopUSec: strTime
+    TimeoutAbortUSec: strTime
+    UID: int
+    User: str
+    GID: int
+    Group: str
     
-    ActiveEnterTimestamp:Union[datetime,None]=None
-    Uptime:strTime=0
+    ActiveEnterTimestamp:Union[datetime,None]
+    Uptime:strTime
     
-    ExecStart: str = ""
-    ExecStartEx: str = ""
+    ExecStart: str
+    ExecStartEx: str
     
-    MemoryCurrent: bytesVal = 0
-    MemoryAvailable: bytesVal = 0 # 0=infinity
-    CPUUsageNSec: strTimeUSec = 0
+    MemoryCurrent: bytesVal
+    MemoryAvailable: bytesVal # 0=infinity
+    CPUUsageNSec: strTimeUSec
     """ Využití CPU v mikrosekundách od spuštění služby, v infu je číslo v nanosekundách, ale toto je převedeno na mikrosekundy
     pro potřeby tohoto objektu
     """
     
-    TasksCurrent: int = 0
+    TasksCurrent: int
     
-    IOReadBytes: io_bytes = 0
-    IOReadOperations: io_bytes = 0
-    IOWriteBytes: io_bytes = 0
-    IOWriteOperations: io_bytes = 0
+    IOReadBytes: io_bytes
+    IOReadOperations: io_bytes
+    IOWriteBytes: io_bytes
+    IOWriteOperations: io_bytes
     
-    WorkingDirectory: str = ""
-    RootDirectory: str = ""
+    WorkingDirectory: str
+    RootDirectory: str
     
-    Nice: int = 0
+    Nice: int
     """ priority, 0=normální, -20=nejvyšší, 19=nejnižší"""
     
-    FragmentPath: str = ""
+    FragmentPath: str
     
-    StartLimitIntervalUSec: int = 0
+    StartLimitIntervalUSec: int
     """ v sec """
+    
+    ControlGroup: str
+    """ cesta cgroup relativně k /sys/fs/cgroup, prázdné pokud jednotka neběží, viz systemdCgroup """
 
     def __init__(self):
         super().__init__()
 
-        self.Id: str = ""
+        self.Id = ""
 
-        self.MainPID: int = 0
-        self.ExecMainPID: int = 0
+        self.MainPID = 0
+        self.ExecMainPID = 0
 
-        self.RestartUSec: strTime = 0
-        self.TimeoutStartUSec: strTime = 0
-        self.TimeoutStopUSec: strTime =  0
-        self.TimeoutAbortUSec: strTime = 0
+        self.RestartUSec = 0
+        self.TimeoutStartUSec = 0
+        self.TimeoutStopUSec =  0
+        self.TimeoutAbortUSec = 0
 
-        self.UID: int = 0
-        self.User: str = ""
-        self.GID: int = 0
-        self.Group: str = ""
+        self.UID = 0
+        self.User = ""
+        self.GID = 0
+        self.Group = ""
 
-        self.ActiveEnterTimestamp: datetime | None = None
-        self.Uptime: strTime = 0
+        self.ActiveEnterTimestamp = None
+        self.Uptime = 0
 
-        self.ExecStart: str = ""
-        self.ExecStartEx: str = ""
+        self.ExecStart = ""
+        self.ExecStartEx = ""
 
-        self.MemoryCurrent: bytesVal = 0
-        self.MemoryAvailable: bytesVal = 0  # 0 = unlimited
+        self.MemoryCurrent = 0
+        self.MemoryAvailable = 0  # 0 = unlimited
 
-        self.CPUUsageNSec: strTimeUSec = 0
-        """ Využití CPU v mikrosekundách od spuštění služby, v infu je číslo v nanosekundách, ale toto je převedeno na mikrosekundy
-        pro potřeby tohoto objektu
-        """
+        self.CPUUsageNSec = 0
         
-        self.TasksCurrent: int = 0
+        self.TasksCurrent = 0
 
-        self.IOReadBytes: io_bytes = 0
-        self.IOReadOperations: io_bytes = 0
-        self.IOWriteBytes: io_bytes = 0
-        self.IOWriteOperations: io_bytes = 0
+        self.IOReadBytes = 0
+        self.IOReadOperations = 0
+        self.IOWriteBytes = 0
+        self.IOWriteOperations = 0
 
-        self.WorkingDirectory: str = ""
-        self.RootDirectory: str = ""
+        self.WorkingDirectory = ""
+        self.RootDirectory = ""
 
-        self.Nice: int = 0
-        """ priority, 0=normální, -20=nejvyšší, 19=nejnižší"""
+        self.Nice = 0
 
-        self.FragmentPath: str = ""
+        self.FragmentPath = ""
 
-        self.StartLimitIntervalUSec: int = 0
-        """Interval pro restart limitaci (v usec)."""
+        self.StartLimitIntervalUSec = 0
+
+        self.ControlGroup = ""
     
     
 class c_timer_status(c_unit_status):    
-    NextElapseUSecRealtime: datetime = 0
-    LastTriggerUSec: datetime = 0
+    __slots__ = (
+        "NextElapseUSecRealtime", "LastTriggerUSec", "AccuracyUSec", "RandomizedDelayUSec", "Triggers",
+    )
+
+    NextElapseUSecRealtime: datetime
+    LastTriggerUSec: datetime
     
-    AccuracyUSec: strTime = 0
-    RandomizedDelayUSec: strTime = 0
+    AccuracyUSec: strTime
+    RandomizedDelayUSec: strTime
     
-    Triggers: str = ""
+    Triggers: str
     
     def __init__(self):
         super().__init__()
-        self.NextElapseUSecRealtime = self.NextElapseUSecRealtime
-        self.LastTriggerUSec = self.LastTriggerUSec
-        self.AccuracyUSec = self.AccuracyUSec
-        self.RandomizedDelayUSec = self.RandomizedDelayUSec
-        self.Triggers = self.Triggers
+        self.NextElapseUSecRealtime = 0
+        self.LastTriggerUSec = 0
+        self.AccuracyUSec = 0
+        self.RandomizedDelayUSec = 0
+        self.Triggers = ""
   
 
 def convert_value(value: str, target_type, doNotConvertNone:bool=False):
@@ -354,6 +378,91 @@ class c_header:
         r+="#\n"
         return r
 
+def _compileConverter(target_type):
+    """ vytvoří převodník hodnoty z `systemctl show` pro daný typ, chování odpovídá convert_value """
+    if hasattr(target_type, '__origin__') and target_type.__origin__ is Union:
+        for typ in target_type.__args__:
+            if typ is not type(None):
+                target_type = typ
+                break
+
+    if target_type == bool:
+        def conv(value):
+            return value is not None and value.lower() in ('true', '1', 'yes', 'on', 'enabled')
+        return conv
+
+    if target_type == datetime:
+        def conv(value):
+            try:
+                return parser_parse(value) if isinstance(value, str) else None
+            except (ValueError, TypeError, OverflowError):
+                return None
+        return conv
+
+    if target_type == str:
+        # jako convert_value: '[not set]' (None) -> "None"
+        return str
+
+    if target_type == int:
+        default = 0
+    elif target_type == bytesVal:
+        default = None  # bytesVal() se vytvoří až při chybě, není immutable
+    else:
+        default = None
+
+    def conv(value):
+        try:
+            return target_type(value)
+        except (ValueError, TypeError):
+            if target_type == bytesVal:
+                return bytesVal()
+            return default
+    return conv
+
+def compileStatusParser(cls: type) -> Dict[str, tuple]:
+    """ vrátí tabulku `vlastnost -> (typ, převodník)` pro třídu statusu
+    
+    Tabulka se sestaví jednou z anotací (včetně předků, potomek přepisuje předka)
+    a uloží se na třídu, další volání ji jen vrátí. Vypočtené `Uptime` v tabulce není.
+    
+    Parameters:
+        cls (type): c_unit_status nebo potomek
+        
+    Returns:
+        Dict[str, tuple]: tabulka pro parsování
+    """
+    p = cls.__dict__.get('_parser')
+    if p is None:
+        anotace = {}
+        for base in reversed(cls.__mro__):
+            anotace.update(base.__dict__.get('__annotations__', {}))
+        anotace.pop('Uptime', None)
+        p = {k: (t, _compileConverter(t)) for k, t in anotace.items()}
+        cls._parser = p
+        cls._showProps = ",".join(p.keys())
+    return p
+
+def benchStatusParse(count: int = 2000, lines: List[str] = None, cls: type = None) -> float:
+    """ změří průměrnou dobu c_unit._parseShow na jeden status
+    
+    Parameters:
+        count (int): počet opakování
+        lines (List[str]): řádky výstupu `systemctl show`, None = výstup `systemctl show` pro dbus.service
+        cls (type): třída statusu, None = c_service_status
+        
+    Returns:
+        float: doba jednoho parsování v us
+    """
+    if cls is None:
+        cls = c_service_status
+    if lines is None:
+        r = subprocessRun(["systemctl", "show", "--plain", "--no-pager", "dbus.service"], capture_output=True, text=True)
+        lines = r.stdout.splitlines()
+    t = time.perf_counter()
+    for _ in range(count):
+        c_unit._parseShow(lines, cls())
+    return (time.perf_counter() - t) / count * 1000000
+
 class c_unit:
     noneInstance: bool
     name: str
@@ -374,6 +483,13 @@ class c_unit:
     _serviceName:str|None
     """kopie parametru z konstruktoru"""
 
+    defaultBackend = None
+    """výchozí backend pro nové instance, None = systemctl, jinak instance c_systemdDbus, viz setBackend"""
+    backend = None
+    """backend instance, None = systemctl, jinak instance c_systemdDbus"""
+    stateCache = None
+    """cache stavu jednotek (c_unitStateCache), None = stav se vždy načítá, viz setStateCache"""
+
     def __init__(self, service_name: str, templateName:str=None, isTimer: bool = False):
         """
         Inicializuje novou instanci pro správu `systemd` služby.
@@ -390,6 +506,7 @@ class c_unit:
         self._postfix = ""
         self._templateName = None
         self._serviceName = None
+        self.backend = c_unit.defaultBackend
         
         if not haveSystemd():
             raise ValueError(TXT_C_UNIT_noSystemd)
@@ -440,6 +557,58 @@ class c_unit:
             
         self.ok = self.existsFile() is not None
 
+    @staticmethod
+    def _resolveBackend(backend):
+        """ převede parametr backendu na None (systemctl) nebo instanci c_systemdDbus """
+        if backend is None or backend == "systemctl":
+            return None
+        from .systemdDbus import c_systemdDbus, getSystemdDbus
+        if backend == "dbus":
+            return getSystemdDbus()
+        if isinstance(backend, c_systemdDbus):
+            return backend
+        raise ValueError(TXT_C_UNIT_badBackend)
+
+    def setBackend(self, backend="systemctl") -> 'c_unit':
+        """ nastaví backend pro dotazy a akce této instance
+        
+        Parameters:
+            backend (str|c_systemdDbus): 'systemctl' (nebo None) = volání systemctl,
+                'dbus' = sdílené D-Bus spojení na systémovou sběrnici,
+                instance c_systemdDbus = vlastní spojení např. na testovací sběrnici
+            
+        Returns:
+            c_unit: self
+            
+        Raises:
+            ValueError: neznámý backend
+            RuntimeError: není k dispozici modul jeepney
+        """
+        self.backend = c_unit._resolveBackend(backend)
+        if not self.noneInstance:
+            self.ok = self.existsFile() is not None
+        return self
+
+    @staticmethod
+    def setDefaultBackend(backend="systemctl") -> None:
+        """ nastaví výchozí backend pro nově vytvořené instance, parametr viz setBackend """
+        c_unit.defaultBackend = c_unit._resolveBackend(backend)
+
+    @staticmethod
+    def setStateCache(cache=None) -> None:
+        """ nastaví cache stavu pro všechny instance, `status()`, `running()`, `enabled()` a `fullStatus()`
+        pak čtou stav z paměti
+        
+        Parameters:
+            cache (c_unitStateCache): cache stavu, None = vypnout
+        """
+        c_unit.stateCache = cache
+
+    def _invalidateState(self) -> None:
+        """ zneplatní stav v cache po akci nad jednotkou """
+        if self.stateCache is not None:
+            self.stateCache.invalidate(self.fullName)
+
     def status(self, status:c_unit_status=None) -> Union[c_unit_status,None]:
         """ vrátí informace o službě pomoci systemctl show
         
@@ -450,48 +619,175 @@ class c_unit:
         if not self.ok:
             return c_service_status()
             
+        if self.stateCache is not None:
+            # objekt v cache je sdílený, volající dostane kopii nebo se naplní jeho objekt
+            st = self.stateCache.get(self.fullName)
+            if st is not None:
+                if status is None:
+                    return copy.copy(st)
+                return c_unit._copyStatus(st, status)
+
         if status is None:
             status = c_unit_status()    
-            
-        set:bool =False
-        actEnterTime:bool=False
-        # zavoláme systemctl show
-        result = subprocess.run(["systemctl", "show", "--plain", "--no-pager", self.fullName], capture_output=True, text=True)
+
+        if self.backend is not None:
+            return self.backend.status(self.fullName, status)
+
+        # zavoláme systemctl show, jen pro vlastnosti deklarované ve třídě statusu
+        compileStatusParser(status.__class__)
+        result = subprocessRun(
+            ["systemctl", "show", "--plain", "--no-pager", "-p", status.__class__._showProps, self.fullName],
+            capture_output=True, text=True
+        )
         if result.returncode == 0:
-            anotace={}
-            for base in status.__class__.__mro__:
-                if hasattr(base, '__annotations__'):
-                    anotace.update(base.__annotations__)
-            # anotace= c_service_status.__annotations__
-            for line in result.stdout.splitlines():
-                key, _, value = line.partition("=")
-                if key == 'ActiveEnterTimestamp':
-                    actEnterTime=True
-                if value=='[not set]':
-                    value=None
-                if not key in ['Uptime']:
-                    if hasattr(status, key):
-                        attr_type = anotace[key]
-                        try:
-                            setattr(status,key, convert_value(value,attr_type))
-                            set=True
-                        except ValueError:
-                            setattr(status, key, value)
-                            set=True
-            
-            if not set:
+            if not c_unit._parseShow(result.stdout.splitlines(), status):
                 return None
-            try:
-                # dopočty
-                if actEnterTime:
-                    x= status.ActiveEnterTimestamp
-                    if x:
-                        x=int(datetime.now().timestamp() - status.ActiveEnterTimestamp.timestamp())
-                        status.Uptime = strTime(str(x)+"s")
-            except Exception as e:
-                pass
         return status
 
+    @staticmethod
+    def _copyStatus(src: c_unit_status, dst: c_unit_status) -> c_unit_status:
+        """ zkopíruje nastavené atributy src do dst (jen ty které třída dst deklaruje), vrací dst """
+        for cls in type(dst).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if hasattr(src, name):
+                    setattr(dst, name, getattr(src, name))
+        return dst
+
+    @staticmethod
+    def _parseShow(lines: List[str], status: c_unit_status) -> bool:
+        """ naplní status z řádků `Key=Value` výstupu systemctl show
+
+        Parameters:
+            lines (List[str]): řádky jednoho bloku výstupu
+            status (c_unit_status): objekt pro uložení informací
+
+        Returns:
+            bool: True pokud byl nastaven alespoň jeden atribut
+        """
+        set:bool =False
+        actEnterTime:bool=False
+        table = compileStatusParser(status.__class__)
+        for line in lines:
+            key, _, value = line.partition("=")
+            x = table.get(key)
+            if x is None:
+                # vlastnost, kterou třída nedeklaruje
+                continue
+            if key == 'ActiveEnterTimestamp':
+                actEnterTime=True
+            if value=='[not set]':
+                value=None
+            try:
+                setattr(status, key, x[1](value))
+            except ValueError:
+                setattr(status, key, value)
+            set=True
+        
+        if not set:
+            return False
+        try:
+            # dopočty
+            if actEnterTime:
+                x= status.ActiveEnterTimestamp
+                if x:
+                    x=int(datetime.now().timestamp() - status.ActiveEnterTimestamp.timestamp())
+                    status.Uptime = strTime(str(x)+"s")
+        except Exception as e:
+            pass
+        return True
+
+    @staticmethod
+    def _statusClassFor(unitName: str) -> type:
+        """ vrátí třídu statusu podle přípony jednotky """
+        if unitName.endswith(".timer"):
+            return c_timer_status
+        if unitName.endswith(".service"):
+            return c_service_status
+        return c_unit_status
+
+    @staticmethod
+    def bulk_status(
+        units: List[Union['c_unit', str]],
+        properties: List[str] = None,
+        chunk: int = 200
+    ) -> Dict[str, c_unit_status]:
+        """ vrátí status pro více jednotek jedním voláním `systemctl show -p ... unit1 unit2 ...`
+
+        Výstup systemctl obsahuje pro každou jednotku blok oddělený prázdným řádkem
+        ve stejném pořadí jako jsou jednotky zadány.
+
+        Example:
+            >>> st = c_unit.bulk_status([svc1, svc2, "cron.service", "backup.timer"])
+            >>> svc1.fullStatus(status=st[svc1.fullName])
+
+        Parameters:
+            units (List[Union[c_unit, str]]): jednotky jako instance c_unit (použije se fullName) nebo názvy,
+                název bez přípony se bere jako '.service'
+            properties (List[str]): seznam vlastností pro `-p`, pokud None tak se načtou všechny
+                vlastnosti deklarované v příslušné třídě statusu
+            chunk (int): max počet jednotek v jednom volání systemctl
+
+        Returns:
+            Dict[str, c_unit_status]: status podle názvu jednotky, c_service_status pro '.service',
+                c_timer_status pro '.timer', jinak c_unit_status
+        """
+        names: List[str] = []
+        for u in units:
+            if isinstance(u, c_unit):
+                if u.noneInstance:
+                    continue
+                n = u.fullName
+            else:
+                n = str(u).strip()
+                if not n:
+                    continue
+                if "." not in n:
+                    n += ".service"
+            if n not in names:
+                names.append(n)
+        ret: Dict[str, c_unit_status] = {}
+        if not names:
+            return ret
+
+        if properties is None:
+            props = set()
+            for cls in {c_unit._statusClassFor(n) for n in names}:
+                props.update(compileStatusParser(cls).keys())
+        else:
+            props = set(properties)
+        props.add('Id')
+        if 'Uptime' in props:
+            props.discard('Uptime')
+            props.add('ActiveEnterTimestamp')
+        p = ",".join(sorted(props))
+
+        chunk = max(1, int(chunk))
+        for i in range(0, len(names), chunk):
+            part = names[i:i+chunk]
+            result = subprocessRun(
+                ["systemctl", "show", "--plain", "--no-pager", "-p", p] + part,
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                continue
+            blocks = [b for b in result.stdout.split("\n\n") if b.strip()]
+            byId: Dict[str, List[str]] = {}
+            for b in blocks:
+                lines = b.splitlines()
+                for line in lines:
+                    if line.startswith("Id="):
+                        byId[line[3:]] = lines
+                        break
+            useOrder = len(blocks) == len(part)
+            for idx, n in enumerate(part):
+                lines = blocks[idx].splitlines() if useOrder else byId.get(n)
+                if lines is None:
+                    continue
+                st = c_unit._statusClassFor(n)()
+                if c_unit._parseShow(lines, st):
+                    ret[n] = st
+        return ret
+
     @property
     def unit(self) -> Union[c_unitsRetRow,None]:
         """
@@ -500,7 +796,10 @@ class c_unit:
         Returns:
             List[c_unitsRetRow]: Seznam řádků jednotek služby.
         """
-        x=c_unit.s_units(self.fullName)
+        if self.backend is not None:
+            x=self.backend.units([self.fullName])
+        else:
+            x=c_unit.s_units(self.fullName)
         return x[0] if len(x)==1 else None        
         
     @staticmethod
@@ -518,7 +817,7 @@ class c_unit:
         n=str(serviceName).strip()
         if n=="":
             return []
-        result = subprocess.run(["systemctl", "list-units","--plain", "--all", n], capture_output=True, text=True)        
+        result = subprocessRun(["systemctl", "list-units","--plain", "--all", n], capture_output=True, text=True)        
         x=[]
         header = False
         for line in result.stdout.splitlines():
@@ -577,7 +876,10 @@ class c_unit:
         Returns:
             List[c_unitsFilesRetRow]: Seznam řádků jednotek souborů služby.
         """
-        x=c_unit.s_units_files(self.name)
+        if self.backend is not None:
+            x=self.backend.unitFiles([self.name])
+        else:
+            x=c_unit.s_units_files(self.name)
         return x[0] if len(x)==1 else None
     
     @staticmethod
@@ -595,7 +897,7 @@ class c_unit:
         n=str(serviceName).strip()
         if n=="":
             return []
-        result = subprocess.run(["systemctl", "list-unit-files","--plain", "--all", n], capture_output=True, text=True)        
+        result = subprocessRun(["systemctl", "list-unit-files","--plain", "--all", n], capture_output=True, text=True)        
         x=[]
         header = False
         for line in result.stdout.splitlines():
@@ -672,6 +974,7 @@ class c_unit:
         Parameters:
             asInt (bool): pokud je True, vrátí číslo, jinak textový popis
             coloring (bool): pokud je True, vrátí barevný textový popis
+            status (c_unit_status): výsledek status() nebo bulk_status(), pokud None tak se zavolá status()
             
         Returns:
             Union[str,int]: popis stavu služby
@@ -692,7 +995,10 @@ class c_unit:
         if not isinstance(status, c_unit_status):
             raise ValueError(TXT_C_UNIT_badCStatus)            
             
-        if not self.exists():
+        # LoadState ze statusu (např. z bulk_status) ušetří hledání unit souboru
+        if not self._templateName and status.LoadState == "not-found":
+            return TXT_STATUS_NEX if not asInt else 99
+        if not (not self._templateName and status.LoadState == "loaded") and not self.exists():
             return TXT_STATUS_NEX if not asInt else 99
         if self.running(status):
             t=TXT_STATUS_RUN
@@ -749,7 +1055,11 @@ class c_unit:
             return False
         if self.running():
             return True        
-        subprocess.run(["systemctl", "start", self.fullName])
+        if self.backend is not None:
+            self.backend.start(self.fullName)
+        else:
+            subprocessRun(["systemctl", "start", self.fullName])
+        self._invalidateState()
         return self.running()
 
     def stop(self) -> bool:
@@ -758,17 +1068,25 @@ class c_unit:
             return False
         if not self.running():
             return True        
-        result = subprocess.run(["systemctl", "stop", self.fullName])
-        return self.running()
+        if self.backend is not None:
+            self.backend.stop(self.fullName)
+        else:
+            subprocessRun(["systemctl", "stop", self.fullName])
+        self._invalidateState()
+        return not self.running()
 
     def restart(self) -> bool:
         """ restartuje službu """
         if not self.ok:
             return False
         if self.running():        
-            result = subprocess.run(["systemctl", "restart", self.fullName])
+            if self.backend is not None:
+                self.backend.restart(self.fullName)
+            else:
+                subprocessRun(["systemctl", "restart", self.fullName])
         else:
             return self.start()
+        self._invalidateState()
         return self.running()
 
     def enable(self,andRun:bool=False) -> bool:
@@ -777,7 +1095,11 @@ class c_unit:
             return False
         
         if not self.enabled():        
-            subprocess.run(["systemctl", "enable", self.fullName])
+            if self.backend is not None:
+                self.backend.enable(self.fullName)
+            else:
+                subprocessRun(["systemctl", "enable", self.fullName])
+            self._invalidateState()
             
         if self.enabled():
             if andRun:
@@ -797,7 +1119,11 @@ class c_unit:
             if not self.stop():
                 return False
         
-        subprocess.run(["systemctl", "disable", self.fullName])
+        if self.backend is not None:
+            self.backend.disable(self.fullName)
+        else:
+            subprocessRun(["systemctl", "disable", self.fullName])
+        self._invalidateState()
         return not self.enabled()
     
     def createFromFile(self, fromFilename:str,andRun:bool=False) -> Union[str,None]:
@@ -821,10 +1147,10 @@ class c_unit:
             return TXT_SSMD_ERR10+" "+self._postfix
         try:
             #kopie souboru do systemd
-            subprocess.run(["cp", fromFilename , self.getServiceFilePath() ], check=True)
+            subprocessRun(["cp", fromFilename , self.getServiceFilePath() ], check=True)
             
             # úklid temp
-            subprocess.run(["rm", fromFilename ], check=True)            
+            subprocessRun(["rm", fromFilename ], check=True)            
             
             if andRun:
                 self.enable(True)
@@ -847,12 +1173,38 @@ class c_unit:
             if not self.serviceFileExists():
                 return TXT_SSMD_ERR12
             try:
-                subprocess.run(["rm", self.getServiceFilePath() ], check=True)
+                subprocessRun(["rm", self.getServiceFilePath() ], check=True)
                 return None
             except subprocess.CalledProcessError as e:
                 return TXT_SSMD_ERR13+": "+self.name+"\nChyba: "+str(e)
         return TXT_SSMD_ERR14+": "+self.name
     
+    def journal(
+        self,
+        follow: bool = True,
+        since: Union[str, datetime, None] = None,
+        lines: Union[int, None] = None,
+        priority: Union[int, str, None] = None,
+        ring: c_journalRing = None
+    ) -> Iterator[c_journalEntry]:
+        """ záznamy journalu jednotky jako generátor, čte `journalctl -o json` průběžně po řádcích
+        
+        Parameters:
+            follow (bool): čekat na nové záznamy, jinak skončí po vypsání existujících
+            since (str|datetime): od kdy, např. '-1h', 'today' nebo datetime
+            lines (int): počet posledních záznamů
+            priority (int|str): max priorita, např. 3 nebo 'err'
+            ring (c_journalRing): pokud je zadaný, ukládají se do něj záznamy této jednotky
+            
+        Yields:
+            c_journalEntry: záznam journalu
+            
+        Example:
+            >>> for e in c_service("cron").journal(follow=False, lines=20):
+            ...     print(e.time, e.message)
+        """
+        return journalStream(self.fullName, follow=follow, since=since, lines=lines, priority=priority, ring=ring)
+
     def getHeader(self)->c_header:
         """ vrátí hlavičku souboru služby 
         
@@ -872,7 +1224,10 @@ class c_unit:
         return h
     
     def systemdRestart(self)->None:
-        subprocess.run(["systemctl", "daemon-reload"], check=True)
+        if self.backend is not None:
+            self.backend.reload()
+            return
+        subprocessRun(["systemctl", "daemon-reload"], check=True)
 
 class c_service(c_unit):
     def __init__(self, service_name: str, templateName:str=None):
@@ -892,7 +1247,7 @@ class c_service(c_unit):
         """ vrátí informace o službě pomoci systemctl show"""
         return super().status(c_service_status())
             
-    def create(
+    def getContent(
         self,
         description:str,
         execStart:str,
@@ -907,48 +1262,15 @@ class c_service(c_unit):
         next_unit_params    :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ] =None,
         next_service_params :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ] =None,
         next_install_params :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ]=None,
-        header:c_header=None,
-        andRun:bool=False
-    ) -> Union[str,None]:
-        """
-        Vytvoří a nainstaluje novou službu `systemd` s danou konfigurací.  
-        Next...params může být slovník jehož hodnota může být string nebo list string-ů. Pokud je list, tak se vytvoří více řádků.
-
-        Parameters:
-            description (str): Popis služby, zobrazí se ve výpise `systemctl`.
-            execStart (str): Příkaz nebo aplikace, která se má spustit jako služba (např. '/usr/bin/node-red').
-            startLimitInterval (str, optional): Časový interval pro omezení počtu opakovaných spuštění (např. '1min').
-            startLimitBurst (int, optional): Počet povolených spuštění během `startLimitInterval` (0 = neomezeno).
-            workingDirectory (str, optional): Pracovní adresář, ze kterého bude služba spuštěna.
-            user (str, optional): Uživatel, pod kterým se služba spustí.
-            group (str, optional): Skupina, pod kterou se služba spustí.
-            restart (str, optional): Podmínky restartování služby (`no`, `on-failure`, `always`, atd.).
-            after (str, optional): Název služby nebo target-u, který musí být spuštěn před touto službou.
-            next_unit_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Unit]`.
-            next_service_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Service]`.
-            next_install_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Install]`.
-            andRun (bool, optional): Pokud je `True`, služba bude spuštěna po vytvoření.
-
-        Returns:
-            Union[str, None]: `None` při úspěšném vytvoření. V případě chyby vrací chybovou zprávu popisující problém.
-        
-        Example:
-            >>> service = c_service("example_service")
-            >>> service.create(
-            ...     description="Example Service",
-            ...     execStart="/usr/bin/example_app",
-            ...     user="example_user",
-            ...     restart="always"
-            ... )
-            >>> print(service.start())  # Spustí nově vytvořenou službu.
-        """
-        
+        header:c_header=None
+    ) -> str:
+        """ vrátí obsah souboru služby, parametry viz create """
         # převedeme na string
         next_unit_params = self.next_params_toString(next_unit_params)
         next_service_params = self.next_params_toString(next_service_params)
         next_install_params = self.next_params_toString(next_install_params)
         
-        ## vytvoříme obsah souboru a zapíšeme to /tmp
+        ## vytvoříme obsah souboru
         content = [f"[Unit]"]
         content.append(f"Description={description}")
         content.append(f"After={after}")
@@ -988,6 +1310,65 @@ class c_service(c_unit):
         else:
             content = "\n".join(content)        
         
+        return content
+            
+    def create(
+        self,
+        description:str,
+        execStart:str,
+        startLimitInterval:str=None,
+        startLimitBurst:int=0,
+        workingDirectory:str=None,
+        user:str=None,
+        group:str=None,
+        restart:str="on-failure",
+        after:str='network.target',
+        WantedBy:str='multi-user.target',
+        next_unit_params    :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ] =None,
+        next_service_params :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ] =None,
+        next_install_params :Union[ Dict[ str,str ],  Dict[ str, List[str] ] ]=None,
+        header:c_header=None,
+        andRun:bool=False
+    ) -> Union[str,None]:
+        """
+        Vytvoří a nainstaluje novou službu `systemd` s danou konfigurací.  
+        Next...params může být slovník jehož hodnota může být string nebo list string-ů. Pokud je list, tak se vytvoří více řádků.
+
+        Parameters:
+            description (str): Popis služby, zobrazí se ve výpise `systemctl`.
+            execStart (str): Příkaz nebo aplikace, která se má spustit jako služba (např. '/usr/bin/node-red').
+            startLimitInterval (str, optional): Časový interval pro omezení počtu opakovaných spuštění (např. '1min').
+            startLimitBurst (int, optional): Počet povolených spuštění během `startLimitInterval` (0 = neomezeno).
+            workingDirectory (str, optional): Pracovní adresář, ze kterého bude služba spuštěna.
+            user (str, optional): Uživatel, pod kterým se služba spustí.
+            group (str, optional): Skupina, pod kterou se služba spustí.
+            restart (str, optional): Podmínky restartování služby (`no`, `on-failure`, `always`, atd.).
+            after (str, optional): Název služby nebo target-u, který musí být spuštěn před touto službou.
+            next_unit_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Unit]`.
+            next_service_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Service]`.
+            next_install_params (Union[ Dict[ str,str ],  Dict[ str, List[str] ], optional): Parametry pro další sekci `[Install]`.
+            andRun (bool, optional): Pokud je `True`, služba bude spuštěna po vytvoření.
+
+        Returns:
+            Union[str, None]: `None` při úspěšném vytvoření. V případě chyby vrací chybovou zprávu popisující problém.
+        
+        Example:
+            >>> service = c_service("example_service")
+            >>> service.create(
+            ...     description="Example Service",
+            ...     execStart="/usr/bin/example_app",
+            ...     user="example_user",
+            ...     restart="always"
+            ... )
+            >>> print(service.start())  # Spustí nově vytvořenou službu.
+        """
+        
+        content = self.getContent(
+            description, execStart, startLimitInterval, startLimitBurst, workingDirectory,
+            user, group, restart, after, WantedBy,
+            next_unit_params, next_service_params, next_install_params, header
+        )
+        
         try:
             with open("/tmp/"+self.name, "w") as f:
                 f.write(content)
@@ -1033,6 +1414,61 @@ class c_timer(c_unit):
         """ vrátí informace o timeru """
         return super().status(c_timer_status())
             
+    def getContent(
+        self,
+        description: str,
+        onCalendar: str,
+        accuracy: str = "1m",
+        randomizedDelay: str = "0",
+        unit: str = None,
+        next_unit_params: Union[Dict[str, str], Dict[str, List[str]]] = None,
+        next_timer_params: Union[Dict[str, str], Dict[str, List[str]]] = None,
+        next_install_params: Union[Dict[str, str], Dict[str, List[str]]] = None,
+        header: c_header = None
+    ) -> str:
+        """ vrátí obsah souboru časovače, parametry viz create
+        
+        Raises:
+            ValueError: neplatný výraz onCalendar
+        """
+        err = validateCalendar(onCalendar)
+        if err:
+            raise ValueError(TXT_SSMD_ERR25.format(tx=onCalendar, err=err))
+        
+        # převedeme na string
+        next_unit_params = self.next_params_toString(next_unit_params)
+        next_timer_params = self.next_params_toString(next_timer_params)
+        next_install_params = self.next_params_toString(next_install_params)
+        
+        # Vytvoříme obsah souboru časovače
+        content = ["[Unit]"]
+        content.append(f"Description={description}")
+        if next_unit_params:
+            content.append(next_unit_params)
+        
+        content.append("")
+        content.append("[Timer]")
+        content.append(f"OnCalendar={onCalendar}")
+        content.append(f"AccuracySec={accuracy}")
+        content.append(f"RandomizedDelaySec={randomizedDelay}")
+        if unit:
+            content.append(f"Unit={unit}")
+        else:
+            content.append(f"Unit={self.name.replace('.timer', '.service')}") # Automaticky spojí se službou stejného jména
+        if next_timer_params:
+            content.append(next_timer_params)
+        
+        content.append("")
+        content.append("[Install]")
+        content.append("WantedBy=timers.target")
+        if next_install_params:
+            content.append(next_install_params)
+        
+        content = "\n".join(content) + "\n"
+        if header:
+            content = header.toStr() + content
+        return content
+            
     def create(
         self,
         description: str,
@@ -1049,7 +1485,8 @@ class c_timer(c_unit):
 
         Parameters:
             description (str): Popis časovače, zobrazí se ve výpise `systemctl`.
-            onCalendar (str): Definice času nebo frekvence spouštění časovače (např. "daily" nebo "*-*-* 00:00:00").
+            onCalendar (str): Definice času nebo frekvence spouštění časovače (např. "daily" nebo "*-*-* 00:00:00"),
+                ověřuje se lokálně přes systemdCalendar, neplatný výraz vrátí chybu TXT_SSMD_ERR25.
             accuracy (str, optional): Přesnost spuštění časovače (např. "1m" znamená, že časovač může být spuštěn s přesností na jednu minutu).
             randomizedDelay (str, optional): Náhodné zpoždění při spuštění časovače, které umožňuje rozložit zatížení.
             unit (str, optional): Název služby, kterou má časovač spustit. Pokud není uvedeno, použije se služba se stejným názvem jako časovač (ale s příponou `.service`).
@@ -1067,34 +1504,13 @@ class c_timer(c_unit):
             ... )
         """
         
-        # převedeme na string
-        next_unit_params = self.next_params_toString(next_unit_params)
-        next_timer_params = self.next_params_toString(next_timer_params)
-        next_install_params = self.next_params_toString(next_install_params)
-        
-        # Vytvoříme obsah souboru časovače
-        content = f"""[Unit]
-        Description={description}
-        """ + next_unit_params + """
-
-        [Timer]
-        OnCalendar={onCalendar}
-        AccuracySec={accuracy}
-        RandomizedDelaySec={randomizedDelay}
-        """
-        
-        if unit:
-            content += f"Unit={unit}\n"
-        else:
-            content += f"Unit={self.name.replace('.timer', '.service')}\n" # Automaticky spojí se službou stejného jména
-        
-        content += next_timer_params + """
-        [Install]
-        WantedBy=timers.target
-        """ + next_install_params
-        
-        if header:
-            content = header.toStr() + content
+        try:
+            content = self.getContent(
+                description, onCalendar, accuracy, randomizedDelay, unit,
+                next_unit_params, next_timer_params, next_install_params, header
+            )
+        except ValueError as e:
+            return str(e)
         
         try:
             with open("/tmp/" + self.name, "w") as f:
@@ -1104,3 +1520,190 @@ class c_timer(c_unit):
             return TXT_SSMD_ERR16
 
         return self.createFromFile("/tmp/" + self.name)
+
+class c_unitBatchResult:
+    """ výsledek instalace jedné jednotky v c_unitBatch """
+    unit: str
+    """plný název jednotky"""
+    ok: bool
+    written: bool
+    """soubor jednotky byl zapsán"""
+    enabled: bool
+    started: bool
+    error: Union[str,None]
+    
+    def __init__(self, unit: str):
+        self.unit = unit
+        self.ok = False
+        self.written = False
+        self.enabled = False
+        self.started = False
+        self.error = None
+        
+    def __repr__(self):
+        return f"<c_unitBatchResult {self.unit} ok={self.ok} err={self.error}>"
+
+class c_unitBatch:
+    """ dávková instalace unit souborů
+    
+    Všechny soubory se nejdříve zapíší do dočasných souborů vedle cíle, pokud se to podaří u všech
+    tak se přejmenují (os.replace), pak se provede jeden `daemon-reload` a jednotky se povolí/spustí
+    jedním voláním `systemctl enable --now a b c ...`. Pokud hromadné volání selže, opakuje se
+    po jednotlivých jednotkách, aby byl znám výsledek každé z nich.
+    
+    Šablonové instance (`name@inst.service`) sdílí jeden soubor `name@.service`, ten se zapíše jednou.
+    
+    Example:
+        >>> b = c_unitBatch()
+        >>> for i in range(30):
+        ...     svc = c_service("worker", str(i))
+        ...     b.addService(svc, andRun=True, description="Worker %i", execStart="/usr/bin/worker %i")
+        >>> res = b.commit()
+        >>> print([r.unit for r in res.values() if not r.ok])
+    """
+    
+    def __init__(self, overwrite: bool = False):
+        """
+        Parameters:
+            overwrite (bool): pokud je False, jednotka jejíž soubor již existuje skončí chybou TXT_SSMD_ERR08
+        """
+        self.overwrite = overwrite
+        self._items: List[tuple] = []
+        """(unit, content, enable, start)"""
+        
+    def add(self, unit: c_unit, content: str, enable: bool = True, start: bool = False) -> 'c_unitBatch':
+        """ přidá jednotku s hotovým obsahem souboru
+        
+        Parameters:
+            unit (c_unit): jednotka
+            content (str): obsah unit souboru
+            enable (bool): povolit jednotku
+            start (bool): spustit jednotku
+        """
+        self._items.append((unit, content, enable, start))
+        return self
+    
+    def addService(self, service: 'c_service', andRun: bool = False, **params) -> 'c_unitBatch':
+        """ přidá službu, params jsou parametry c_service.create """
+        return self.add(service, service.getContent(**params), enable=andRun, start=andRun)
+    
+    def addTimer(self, timer: 'c_timer', andRun: bool = True, **params) -> 'c_unitBatch':
+        """ přidá časovač, params jsou parametry c_timer.create """
+        return self.add(timer, timer.getContent(**params), enable=andRun, start=andRun)
+    
+    def _systemctl(self, args: List[str]) -> bool:
+        r = subprocessRun(["systemctl"] + args, capture_output=True, text=True)
+        return r.returncode == 0
+    
+    def _enableStart(self, enable: List[str], start: List[str], both: List[str], res: Dict[str, c_unitBatchResult]) -> None:
+        """ jedno volání systemctl pro každou skupinu, při chybě po jednotlivých jednotkách """
+        for names, args, flags in (
+            (both, ["enable", "--now"], ("enabled", "started")),
+            (enable, ["enable"], ("enabled",)),
+            (start, ["start"], ("started",)),
+        ):
+            if not names:
+                continue
+            if self._systemctl(args + names):
+                ok = {n: True for n in names}
+            else:
+                ok = {n: self._systemctl(args + [n]) for n in names}
+            for n in names:
+                r = res[n]
+                if ok[n]:
+                    for f in flags:
+                        setattr(r, f, True)
+                else:
+                    r.ok = False
+                    r.error = TXT_SSMD_ERR23
+    
+    def commit(self) -> Dict[str, c_unitBatchResult]:
+        """ nainstaluje všechny přidané jednotky
+        
+        Returns:
+            Dict[str, c_unitBatchResult]: výsledek podle plného názvu jednotky
+        """
+        res: Dict[str, c_unitBatchResult] = {}
+        files: Dict[str, str] = {}
+        """cesta -> obsah"""
+        owners: Dict[str, List[str]] = {}
+        """cesta -> jednotky"""
+        
+        for unit, content, enable, start in self._items:
+            r = c_unitBatchResult(unit.fullName)
+            res[unit.fullName] = r
+            path = unit.getServiceFilePath()
+            if path in files:
+                if files[path] != content:
+                    r.error = TXT_SSMD_ERR22
+                    continue
+            elif not self.overwrite and os.path.exists(path):
+                r.error = TXT_SSMD_ERR08
+                continue
+            files[path] = content
+            owners.setdefault(path, []).append(unit.fullName)
+        
+        # zápis do dočasných souborů, při chybě se nezapíše nic
+        tmps: Dict[str, str] = {}
+        failed = None
+        for path, content in files.items():
+            tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+            try:
+                with open(tmp, "w") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp, 0o644)
+                tmps[path] = tmp
+            except OSError as e:
+                failed = path
+                for n in owners[path]:
+                    res[n].error = f"{TXT_SSMD_ERR15}: {e}"
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                break
+        if failed is not None:
+            for tmp in tmps.values():
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            for r in res.values():
+                if r.error is None:
+                    r.error = TXT_SSMD_ERR24
+            return res
+        
+        for path, tmp in tmps.items():
+            os.replace(tmp, path)
+            for n in owners[path]:
+                res[n].written = True
+                res[n].ok = True
+        
+        written = [u for u, _, _, _ in self._items if res[u.fullName].written]
+        if not written:
+            return res
+        
+        # jeden reload pro celou dávku
+        if written[0].backend is not None:
+            written[0].backend.reload()
+        else:
+            self._systemctl(["daemon-reload"])
+        
+        both, enable, start = [], [], []
+        for unit, _, en, st in self._items:
+            if not res[unit.fullName].written:
+                continue
+            unit.ok = True
+            if en and st:
+                both.append(unit.fullName)
+            elif en:
+                enable.append(unit.fullName)
+            elif st:
+                start.append(unit.fullName)
+        self._enableStart(enable, start, both, res)
+        
+        for unit in written:
+            unit._invalidateState()
+        return res
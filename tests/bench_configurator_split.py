@@ -0,0 +1,59 @@
+"""Benchmark tokenizéru c_row_parser na 50k řádcích proti původní implementaci.
+
+Porovná `_reference_split` (z test_configurator_split) s `c_row_parser._smart_split`
+při prvním a opakovaném průchodu (cache `_splitCached` má 8192 položek, unikátní
+řádky 50k konfigurace se do ní nevejdou), a dobu kompilace plánu pro 50k řádkovou konfiguraci.
+
+Spuštění:
+    python tests/bench_configurator_split.py [počet řádků]
+"""
+
+import os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from test_configurator_split import cfg, _reference_split
+
+TEMPLATES = [
+    '+d dir{i}',
+    '+fl file{i}.txt res{j}',
+    '=acc file{i}.txt u+rwx g-w',
+    '=prop "root.sec {j}".key{i} "value with spaces {i}"',
+    '+prop a.b.c{j} {i}',
+    '+app pkg{j}',
+    '=u user{j}',
+    '!fl "my file {i}.txt" res{j} # koment',
+    '°/opt/s.sh --x "a \\"b\\"" {i}',
+]
+
+def _bench(f) -> float:
+    t = time.perf_counter()
+    f()
+    return time.perf_counter() - t
+
+def main(n: int = 50000) -> None:
+    rnd = random.Random(2)
+    lines = [rnd.choice(TEMPLATES).format(i=i, j=i % 50) for i in range(n)]
+    # cesty vlastností jako je dělí c_row_parser pro =prop/+prop (podle '.')
+    props = [_reference_split(l, " ", True)[0][1] for l in lines if "prop" in l]
+    split = cfg.c_row_parser._smart_split
+
+    for l in lines:
+        assert list(split(l, " ", True)[0]) == _reference_split(l, " ", True)[0], l
+
+    ref = _bench(lambda: ([_reference_split(l, " ", True) for l in lines], [_reference_split(p, ".", False) for p in props]))
+    cfg._splitCached.cache_clear()
+    cold = _bench(lambda: ([split(l, " ", True) for l in lines], [split(p, ".", False) for p in props]))
+    warm = _bench(lambda: ([split(l, " ", True) for l in lines], [split(p, ".", False) for p in props]))
+    print(f"{n} lines + {len(props)} prop paths: reference {ref * 1000:.0f} ms, "
+          f"new cold {cold * 1000:.0f} ms ({ref / cold:.1f}x), new repeat {warm * 1000:.0f} ms ({ref / warm:.1f}x)")
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "big.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("*a\n" + "\n".join(lines) + "\n__res__\n" + "\n".join(f"res{j} aGVsbG8K" for j in range(50)) + "\n")
+        cfg._splitCached.cache_clear()
+        t = _bench(lambda: cfg.c_configPlan.fromFile(path))
+    print(f"plan compile {n} lines: {t * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,59 @@
+"""c_fleetRunner přes c_localTransport - zařízení se spustí lokálně bez sshd."""
+
+import importlib, os, sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+# bez souborového logu vedle sys.argv[0] (pytest), log jde jen do logging
+setattr(importlib.import_module(os.path.basename(_ROOT) + ".helper"), "__LoggerInit", True)
+fleetMod = importlib.import_module(os.path.basename(_ROOT) + ".configuratorFleet")
+cfgMod = importlib.import_module(os.path.basename(_ROOT) + ".configurator")
+
+@pytest.fixture
+def plan(tmp_path):
+    p = tmp_path / "c.txt"
+    p.write_text(f"*a\n+d {tmp_path / 'out'}\n=d {tmp_path / 'out'}\n+fl f.txt r1\n__res__\nr1 aGVsbG8K\n", encoding="utf-8")
+    return cfgMod.c_configPlan.fromFile(str(p))
+
+def _runner(plan, tmp_path, inventory, **kw):
+    kw.setdefault("remotePython", sys.executable)
+    return fleetMod.c_fleetRunner(plan, inventory, transport=fleetMod.c_localTransport(), remoteDir=str(tmp_path / "rd"), **kw)
+
+def test_fleet_local_run(plan, tmp_path):
+    lines = []
+    # dvě zařízení se stejnou adresou - každé má vlastní kopii skriptu
+    fleet = _runner(plan, tmp_path, {"dev01": "local", "dev02": "local"}, dryRun=False, onLine=lambda d, l: lines.append(d))
+    results = fleet.run()
+    assert [r.dev for r in results] == ["dev01", "dev02"]
+    for r in results:
+        assert r.ok, (r.error, r.tail)
+        assert r.returncode == 0 and r.result["dev"] == r.dev and r.result["dry_run"] is False
+    assert (tmp_path / "out" / "f.txt").read_bytes() == b"hello\n"
+    assert set(lines) == {"dev01", "dev02"}
+    rd = tmp_path / "rd"
+    assert os.stat(rd).st_mode & 0o777 == 0o700
+    assert os.listdir(rd) == []
+    assert "devices: 2, ok: 2, failed: 0" in fleet.report(results)
+
+def test_fleet_local_dry_run(plan, tmp_path):
+    fleet = _runner(plan, tmp_path, {"dev01": "local"})
+    results = fleet.run()
+    assert results[0].ok, results[0].error
+    assert results[0].result["plan"]["summary"]["changes"] >= 1
+    assert not (tmp_path / "out").exists()
+    assert fleet.rolloutEstimate(results)["devices"] == 1
+
+def test_fleet_rejects_symlinked_remote_dir(plan, tmp_path):
+    (tmp_path / "real").mkdir()
+    os.symlink(tmp_path / "real", tmp_path / "rd")
+    results = _runner(plan, tmp_path, {"dev01": "local"}).run()
+    assert not results[0].ok
+    assert "ship configurator.py" in results[0].error
+    assert os.listdir(tmp_path / "real") == []
+
+def test_fleet_failed_device(plan, tmp_path):
+    results = _runner(plan, tmp_path, {"dev01": "local"}, remotePython="/nonexistent/python3").run()
+    assert not results[0].ok and results[0].returncode != 0
+    assert os.listdir(tmp_path / "rd") == []
@@ -0,0 +1,44 @@
+"""Souběžné +g/!g/-g operace - zapnutí přes gWorkers v konstruktoru a --g-workers v CLI."""
+
+import importlib.util, logging, os
+
+import pytest
+
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configurator.py")
+_spec = importlib.util.spec_from_file_location("configurator_g_under_test", _SRC)
+cfg = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(cfg)
+
+@pytest.fixture
+def conf(tmp_path):
+    p = tmp_path / "c.txt"
+    p.write_text(
+        f"*a\n=g {tmp_path / 'creds'}\n+g r1\n!g r2\n!g r3\n+g r4\n-g r5\n"
+        "__res__\nr1 aGVsbG8K\nr2 aGVsbG8gd29ybGQK\nr3 eA==\nr4 eQ==\n",
+        encoding="utf-8")
+    (tmp_path / "creds").mkdir()
+    return p
+
+def _gThreads(caplog) -> set:
+    return {r.threadName for r in caplog.records if r.threadName.startswith("cfg-g")}
+
+def test_g_sequential_by_default(conf, caplog):
+    caplog.set_level(logging.INFO)
+    c = cfg.Configurator(str(conf), "dev01", logging.getLogger("test"), dry_run=False)
+    assert c.g_workers == 1
+    assert len(c.gStats) == 5
+    assert not _gThreads(caplog)
+
+def test_g_workers_constructor(conf, caplog):
+    caplog.set_level(logging.INFO)
+    c = cfg.Configurator(str(conf), "dev01", logging.getLogger("test"), dry_run=False, gWorkers=4)
+    assert c.g_workers == 4
+    assert sorted(x["name"] for x in c.gStats) == ["r1", "r2", "r3", "r4", "r5"]
+    assert _gThreads(caplog)
+    assert (conf.parent / "creds" / "r1").read_bytes() == b"hello\n"
+
+def test_g_workers_cli(conf, caplog, capsys):
+    caplog.set_level(logging.INFO)
+    assert cfg.main(["--dev", "dev01", "--config", str(conf), "--run", "--g-workers", "3"]) == 0
+    assert _gThreads(caplog)
+    assert cfg.RESULT_PREFIX in capsys.readouterr().out
@@ -0,0 +1,84 @@
+"""Balíčkové kroky - slučování (pkgBatch) a stav (stateDir), neúspěšná instalace se nesmí uložit jako hotová.
+
+`_hlp.run_as_user` se nahradí falešným pip, který drží množinu nainstalovaných balíčků
+a instalace selže dokud není `fake.ok`.
+"""
+
+import importlib.util, json, logging, os
+
+import pytest
+
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configurator.py")
+_spec = importlib.util.spec_from_file_location("configurator_pkg_under_test", _SRC)
+cfg = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(cfg)
+
+class _fakePip:
+    def __init__(self):
+        self.installed = set()
+        self.ok = False
+        self.calls = []
+
+    def __call__(self, user, cmd, cwd=None):
+        if cmd[1] == "list":
+            return 0, json.dumps([{"name": n, "version": "1"} for n in sorted(self.installed)]), ""
+        self.calls.append(cmd[1:])
+        if not self.ok:
+            return 1, "", "network error"
+        if cmd[1] == "install":
+            self.installed.update(p for p in cmd[2:] if not p.startswith("-"))
+        return 0, "", ""
+
+@pytest.fixture
+def fake(monkeypatch):
+    f = _fakePip()
+    monkeypatch.setattr(cfg._hlp, "run_as_user", staticmethod(f))
+    return f
+
+def _run(tmp_path):
+    conf = tmp_path / "c.txt"
+    conf.write_text(f"*a\n=d {tmp_path}\n+pip requests\n=pip flask\n", encoding="utf-8")
+    return cfg.Configurator(str(conf), "dev01", logging.getLogger("test"), dry_run=False, stateDir=str(tmp_path / "st"))
+
+def test_failed_install_is_retried(tmp_path, fake):
+    c = _run(tmp_path)
+    assert fake.calls == [["install", "requests"], ["install", "--upgrade", "flask"]]
+    assert c.idemStats["skipped"] == 0
+
+    fake.calls.clear()
+    c = _run(tmp_path)
+    assert ["install", "requests"] in fake.calls
+    assert c.idemStats["skipped"] == 0
+
+    fake.ok = True
+    fake.calls.clear()
+    _run(tmp_path)
+    assert ["install", "requests"] in fake.calls
+
+    fake.calls.clear()
+    c = _run(tmp_path)
+    assert c.idemStats["skipped"] == 1
+    # aktualizace se nesleduje, zkouší se vždy
+    assert fake.calls == [["install", "--upgrade", "flask"]]
+
+def test_removed_package_is_reinstalled(tmp_path, fake):
+    fake.ok = True
+    _run(tmp_path)
+    fake.installed.discard("requests")
+    fake.calls.clear()
+    c = _run(tmp_path)
+    assert ["install", "requests"] in fake.calls
+    assert c.idemStats["skipped"] == 0
+
+def test_pkg_batch(tmp_path, fake):
+    fake.ok = True
+    conf = tmp_path / "c.txt"
+    conf.write_text(f"*a\n=d {tmp_path}\n+pip requests\n+pip flask\n", encoding="utf-8")
+    cfg.Configurator(str(conf), "dev01", logging.getLogger("test"), dry_run=False)
+    assert fake.calls == [["install", "requests", "flask"]]
+
+    fake.installed.clear()
+    fake.calls.clear()
+    c = cfg.Configurator(str(conf), "dev01", logging.getLogger("test"), dry_run=False, pkgBatch=False)
+    assert not c.pkg_batch
+    assert fake.calls == [["install", "requests"], ["install", "flask"]]
@@ -0,0 +1,34 @@
+"""Cache read-only příkazů v helper.runRet - zneplatnění měnícími příkazy."""
+
+import importlib, os, sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+hlp = importlib.import_module(os.path.basename(_ROOT) + ".helper")
+# bez souborového logu vedle sys.argv[0] (pytest)
+setattr(hlp, "__LoggerInit", True)
+
+@pytest.fixture
+def cache():
+    hlp.runCacheEnable(ttl=60)
+    yield hlp._runCache
+    hlp.runCacheDisable()
+
+def test_whitelisted_cached(cache):
+    hlp.runRet(["id", "-u"])
+    assert ("id", "-u") in cache
+
+@pytest.mark.parametrize("cmd", [["true"], ["sh", "-c", "true"], "true"])
+def test_other_program_clears_cache(cache, cmd):
+    # např. useradd po id, mkfs po lsblk - jiný program, cache se musí smazat celá
+    hlp.runRet(["id", "-u"])
+    hlp.runRet(["uname", "-r"])
+    hlp.runRet(cmd)
+    assert not cache
+
+def test_subprocess_run_clears_cache(cache):
+    hlp.runRet(["id", "-u"])
+    hlp.subprocessRun(["true"])
+    assert not cache
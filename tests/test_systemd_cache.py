@@ -0,0 +1,74 @@
+"""c_unitStateCache v režimu poll - výsledek dotazu začatého před invalidate() se nesmí zapsat."""
+
+import importlib, os, sys, threading
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+_pkg = os.path.basename(_ROOT)
+# bez souborového logu vedle sys.argv[0] (pytest)
+setattr(importlib.import_module(_pkg + ".helper"), "__LoggerInit", True)
+cache = importlib.import_module(_pkg + ".systemdCache")
+svc = importlib.import_module(_pkg + ".systemdService")
+
+UNIT = "cron.service"
+
+def _st(active: str):
+    st = svc.c_service_status()
+    st.ActiveState = active
+    return st
+
+class _slowShow:
+    """ náhrada c_unit.bulk_status, vrací aktuální stav a volitelně čeká na uvolnění """
+
+    def __init__(self):
+        self.state = "inactive"
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, names, *a, **kw):
+        st = self.state
+        self.entered.set()
+        self.release.wait(5)
+        return {n: _st(st) for n in names}
+
+@pytest.fixture
+def show(monkeypatch):
+    s = _slowShow()
+    monkeypatch.setattr(svc.c_unit, "bulk_status", staticmethod(s))
+    return s
+
+def test_poll_result_older_than_invalidate_is_dropped(show):
+    c = cache.c_unitStateCache([UNIT], interval=60, useDbus=False)
+    assert c.get(UNIT).ActiveState == "inactive"
+    c.invalidate(UNIT)
+    show.entered.clear()
+    show.release.clear()
+    c.start()
+    assert show.entered.wait(5)
+    # poll právě čte starý stav, jednotka se mezitím spustí přes c_unit (-> invalidate)
+    show.state = "active"
+    c.invalidate(UNIT)
+    show.release.set()
+    c.stop()  # počká na dokončení rozběhnutého pollu
+    assert c._data.get(UNIT) is None
+    assert c.get(UNIT).ActiveState == "active"
+
+def test_get_result_older_than_invalidate_all_is_dropped(show):
+    c = cache.c_unitStateCache(useDbus=False)
+    show.release.clear()
+    t = threading.Thread(target=c.get, args=(UNIT,))
+    t.start()
+    assert show.entered.wait(5)
+    c.invalidate()
+    show.release.set()
+    t.join(5)
+    assert c._data.get(UNIT) is None
+
+def test_fresh_result_is_stored(show):
+    c = cache.c_unitStateCache(useDbus=False)
+    c.invalidate(UNIT)
+    assert c.get(UNIT).ActiveState == "inactive"
+    assert c._data[UNIT].ActiveState == "inactive"
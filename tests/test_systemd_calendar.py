@@ -0,0 +1,51 @@
+"""Lokální parser OnCalendar proti systemd - co systemd nepřijme, nesmí projít ani lokálně."""
+
+import importlib, os, re, shutil, subprocess, sys
+from datetime import datetime
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+cal = importlib.import_module(os.path.basename(_ROOT) + ".systemdCalendar")
+
+VALID = [
+    "daily", "*:0/15", "Mon..Fri *-*-* 08:00", "Mon-Fri 10:00", "Sat,Sun", "*-*-01 00:00", "*-2-29",
+    "*-*-27/4", "*-*-26/5", "*-*-1/30", "*-*-30/1", "*-*-* 18/5:00", "*-*-* 10:50/9", "*-10/2-01",
+    "2030/169-01-01", "*-*-1..31/31", "*-*-* 10:0..59/60", "*-*-* 0/2:00", "*-05~07/1", "*-02~05/4",
+    "@1700000000", "*-*-* 10:00:39.5/20",
+]
+INVALID = [
+    "*-*-29/5 10:00", "*-*-28/5", "*-*-1/31", "*-*-31/1", "*-*-* 20/5:00", "*-*-* 23/1:00", "*-*-* 10:50/20",
+    "*-11/2-01", "2030/170-01-01", "*-*-* 10:00:40.5/20", "*:*/15", "*-*-*/2", "*-*-* 10:*/5",
+    "*-*~03/5", "*-*~*/2", "*-02~01/3", "Wed..Mon", "*-13-01", "*-*-32",
+]
+
+@pytest.mark.parametrize("spec", VALID)
+def test_valid(spec):
+    cal.c_calendarSpec(spec)
+
+@pytest.mark.parametrize("spec", INVALID)
+def test_invalid(spec):
+    with pytest.raises(ValueError):
+        cal.c_calendarSpec(spec)
+
+def test_next_elapses():
+    after = datetime(2026, 10, 19, 12, 0, 0)
+    assert cal.c_calendarSpec("*-*-26/5 10:00").nextElapses(2, after) == [datetime(2026, 10, 26, 10, 0), datetime(2026, 10, 31, 10, 0)]
+    assert cal.c_calendarSpec("Mon-Fri 10:00").nextElapse(after) == datetime(2026, 10, 20, 10, 0)
+
+@pytest.mark.skipif(shutil.which("systemd-analyze") is None, reason="systemd-analyze není k dispozici")
+@pytest.mark.parametrize("spec", VALID + INVALID)
+def test_matches_systemd_analyze(spec):
+    # bez zóny ve výrazu počítá lokální parser v místním čase, systemd běží v UTC se stejným výchozím okamžikem
+    r = subprocess.run(["systemd-analyze", "calendar", "--iterations=3", "--base-time=2026-10-19 12:00:00 UTC", spec],
+                       capture_output=True, text=True, env={**os.environ, "TZ": "UTC"})
+    try:
+        mine = [x.strftime("%Y-%m-%d %H:%M:%S") for x in cal.c_calendarSpec(spec).nextElapses(3, datetime(2026, 10, 19, 12, 0, 0))]
+    except ValueError:
+        mine = None
+    assert (r.returncode == 0) == (mine is not None), r.stderr
+    if mine is not None:
+        out = r.stdout.split("Normalized form")[-1].split("\n", 1)[-1]
+        assert re.findall(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d", out)[:3] == mine
@@ -0,0 +1,148 @@
+"""c_systemdDbus proti náhradnímu spojení - odpovědi GetAll / LoadUnit / jobů jsou připravené předem.
+
+Zprávy se staví přes jeepney (`new_method_return`, `new_error`), místo sběrnice se podstrčí
+`open_dbus_connection` vracející `_fakeBus`.
+"""
+
+import importlib, os, sys
+from datetime import datetime
+
+import pytest
+
+jeepney = pytest.importorskip("jeepney")
+from jeepney import new_method_return, new_error
+from jeepney.low_level import HeaderFields
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+_pkg = os.path.basename(_ROOT)
+# bez souborového logu vedle sys.argv[0] (pytest)
+setattr(importlib.import_module(_pkg + ".helper"), "__LoggerInit", True)
+sd = importlib.import_module(_pkg + ".systemdDbus")
+svc = importlib.import_module(_pkg + ".systemdService")
+
+UNIT = "cron.service"
+UNIT_PATH = "/org/freedesktop/systemd1/unit/cron_2eservice"
+JOB_PATH = "/org/freedesktop/systemd1/job/42"
+TS = 1700000000 * 1000000
+
+PROPS = {
+    "Id": ("s", UNIT),
+    "Names": ("as", [UNIT, "crond.service"]),
+    "LoadState": ("s", "loaded"),
+    "ActiveState": ("s", "active"),
+    "SubState": ("s", "running"),
+    "CanStart": ("b", True),
+    "MainPID": ("u", 123),
+    "TimeoutStartUSec": ("t", 90000000),
+    "TimeoutAbortUSec": ("t", sd.UINT64_MAX),
+    "ActiveEnterTimestamp": ("t", TS),
+    "ExecStart": ("a(sasbttttuii)", [("/usr/sbin/cron", ["/usr/sbin/cron", "-f"], False, 0, 0, 0, 0, 0, 0)]),
+    "User": ("s", ""),
+}
+
+class _fakeBus:
+    """ náhrada jeepney spojení, odpovídá na volání podle (cesta, metoda) """
+
+    def __init__(self):
+        self.calls = []
+        self.paths = {UNIT: UNIT_PATH}
+        self.gone = set()
+        """cesty objektů, které vrací chybu UnknownObject"""
+        self.jobPolls = 2
+        """kolikrát ještě job existuje, -1 = nikdy neskončí"""
+
+    def send_and_get_reply(self, msg, timeout=None):
+        f = msg.header.fields
+        path, member = f[HeaderFields.path], f[HeaderFields.member]
+        self.calls.append((path, member, msg.body))
+        if path in self.gone:
+            return new_error(msg, "org.freedesktop.DBus.Error.UnknownObject", "s", (path,))
+        if member == "LoadUnit":
+            p = self.paths.get(msg.body[0])
+            if p is None:
+                return new_error(msg, "org.freedesktop.systemd1.NoSuchUnit", "s", ("no such unit",))
+            return new_method_return(msg, "o", (p,))
+        if member == "GetAll":
+            return new_method_return(msg, "a{sv}", (dict(PROPS),))
+        if member in ("StartUnit", "StopUnit", "RestartUnit"):
+            return new_method_return(msg, "o", (JOB_PATH,))
+        if member == "Get" and path == JOB_PATH:
+            if self.jobPolls == 0:
+                return new_error(msg, "org.freedesktop.DBus.Error.UnknownObject", "s", (path,))
+            self.jobPolls -= 1
+            return new_method_return(msg, "v", (("s", "running"),))
+        if member in ("Reload", "EnableUnitFiles"):
+            return new_method_return(msg)
+        return new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod", "s", (member,))
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def bus(monkeypatch):
+    b = _fakeBus()
+    monkeypatch.setattr(sd, "open_dbus_connection", lambda bus: b)
+    return b
+
+@pytest.fixture
+def db(bus):
+    return sd.c_systemdDbus("unix:path=/nonexistent")
+
+def test_status_from_getall(db, bus):
+    st = db.status(UNIT)
+    assert isinstance(st, svc.c_service_status)
+    assert st.Id == UNIT and st.Names == f"{UNIT} crond.service"
+    assert (st.LoadState, st.ActiveState, st.SubState) == ("loaded", "active", "running")
+    assert st.CanStart is True and st.MainPID == 123
+    assert st.ActiveEnterTimestamp == datetime.fromtimestamp(TS / 1000000)
+    assert st.ExecStart == "{ path=/usr/sbin/cron ; argv[]=/usr/sbin/cron -f ; ignore_errors=no }"
+    # LoadUnit jen jednou, cesta se cachuje
+    db.status(UNIT)
+    assert [c[1] for c in bus.calls] == ["LoadUnit", "GetAll", "GetAll"]
+    assert db.pathToUnit(UNIT_PATH) == UNIT
+
+def test_status_matches_systemctl_show(db):
+    """ stejné hodnoty jako z textu `systemctl show` """
+    ref = svc.c_service_status()
+    svc.c_unit._parseShow([
+        f"Id={UNIT}", "LoadState=loaded", "ActiveState=active", "SubState=running", "MainPID=123",
+        "TimeoutStartUSec=1min 30s", "TimeoutAbortUSec=infinity", "CanStart=yes",
+    ], ref)
+    st = db.status(UNIT)
+    for k in ("Id", "LoadState", "ActiveState", "SubState", "MainPID", "CanStart"):
+        assert getattr(st, k) == getattr(ref, k), k
+    assert str(st.TimeoutStartUSec) == str(ref.TimeoutStartUSec)
+
+def test_status_error_returns_none(db, bus):
+    bus.paths.clear()
+    assert db.status("missing.service") is None
+
+def test_getall_reloads_gone_path(db, bus):
+    db.status(UNIT)
+    bus.gone.add(UNIT_PATH)
+    bus.paths[UNIT] = UNIT_PATH + "_2"
+    st = db.status(UNIT)
+    assert st is not None and st.ActiveState == "active"
+    assert db.unitPath(UNIT) == UNIT_PATH + "_2"
+
+def test_start_waits_for_job(db, bus, monkeypatch):
+    monkeypatch.setattr(sd.time, "sleep", lambda s: None)
+    assert db.start(UNIT) is True
+    assert [c[1] for c in bus.calls] == ["StartUnit", "Get", "Get", "Get"]
+    assert bus.calls[0][2] == (UNIT, "replace")
+
+def test_wait_job_timeout(db, bus, monkeypatch):
+    monkeypatch.setattr(sd.time, "sleep", lambda s: None)
+    bus.jobPolls = -1
+    assert db.waitJob(JOB_PATH, timeout=0.05) is False
+
+def test_job_error(db, bus):
+    bus.gone.add(sd.SYSTEMD_PATH)
+    assert db.stop(UNIT) is False
+
+def test_reload_clears_paths(db, bus):
+    db.unitPath(UNIT)
+    assert db.enable(UNIT) is True
+    assert db.pathToUnit(UNIT_PATH) is None
+    assert [c[1] for c in bus.calls] == ["LoadUnit", "EnableUnitFiles", "Reload"]
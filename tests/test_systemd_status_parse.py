@@ -0,0 +1,46 @@
+"""Předkompilované převodníky statusu (compileStatusParser) musí dávat stejné hodnoty jako convert_value."""
+
+import importlib, os, sys
+from datetime import datetime
+from typing import Union
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ROOT))
+_pkg = os.path.basename(_ROOT)
+# bez souborového logu vedle sys.argv[0] (pytest)
+setattr(importlib.import_module(_pkg + ".helper"), "__LoggerInit", True)
+svc = importlib.import_module(_pkg + ".systemdService")
+fmt = importlib.import_module(_pkg + ".format")
+
+TYPES = [str, int, datetime, Union[datetime, None], fmt.strTime, fmt.strTimeUSec, fmt.bytesVal, svc.io_bytes]
+VALUES = [None, "", "0", "123", "yes", "[garbage]", "Mon 2024-01-01 10:00:00 UTC", "1min 30s", "infinity", "18446744073709551615"]
+
+def _outcome(f, value, typ):
+    """ (typ, text) výsledku nebo název výjimky """
+    try:
+        v = f(value, typ)
+        return (type(v).__name__, str(v))
+    except Exception as e:
+        return type(e).__name__
+
+@pytest.mark.parametrize("typ", TYPES, ids=lambda t: getattr(t, "__name__", str(t)))
+@pytest.mark.parametrize("value", VALUES)
+def test_converter_matches_convert_value(typ, value):
+    exp = _outcome(svc.convert_value, value, typ)
+    got = _outcome(lambda v, t: svc._compileConverter(t)(v), value, typ)
+    if exp == "OverflowError":
+        # původní _parseShow zachytával jen ValueError - tady spadl, nový převodník vrací None
+        assert got == ("NoneType", "None")
+        return
+    assert got == exp
+
+@pytest.mark.parametrize("value", VALUES[1:])
+def test_bool_converter(value):
+    assert svc._compileConverter(bool)(value) == svc.convert_value(value, bool)
+
+def test_not_set_str():
+    st = svc.c_service_status()
+    svc.c_unit._parseShow(["User=[not set]", "Id=cron.service"], st)
+    assert st.User == "None" and st.Id == "cron.service"